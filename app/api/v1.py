@@ -1,13 +1,48 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+from contextlib import ExitStack
+import logging
+import os
+import re
+import time
+from typing import Any, Iterator, Optional
+import uuid
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 import requests
 
-from app.core.llm_service import GetLlmService
-from app.schemas import AssistantRequest, AssistantResponse, LlmMessage
+from app.config.config import GetSettings
+from app.core.admission import AdmissionRejected
+from app.core.chat_sessions import ChatSession, GetChatSessionStore
+from app.core.circuit_breaker import BreakerOpen
+from app.core.deadline import BindDeadline, Deadline, DeadlineExceeded
+from app.core.json_codec import DecodeJson, EncodeJson
+from app.core.llm_service import BuildSystemContextForUser, GetLlmService, LLMService
+from app.core.metrics import BindRequestTimings, RecordStage, RequestTimings
+from app.core.rate_limit import GetUserRateLimiter, RateLimited
+from app.core.structured_log import BindRequestId
+from app.schemas import (
+    SESSION_ID_PATTERN,
+    AssistantRequest,
+    AssistantResponse,
+    BatchGenerateRequest,
+    LlmMessage,
+    PrefetchLoginRequest,
+    PrefetchLoginResponse,
+)
+from app.services.batch import BatchItem, BatchRunner, CheckpointMismatch
+from app.services.prefetch import GetPrefetchWorker
 from app.services.tool_executor import ExecuteToolCall
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+_SESSION_ID_RE = re.compile(SESSION_ID_PATTERN)
+# Batches are submitted by a service, not a user; they all share one quota.
+_BATCH_CALLER_ID = 0
 
 
 def _ValidateMessage(message: LlmMessage) -> None:
@@ -19,21 +54,266 @@ def _ValidateMessage(message: LlmMessage) -> None:
         raise HTTPException(status_code=400, detail="message.user_id must be positive")
 
 
-def _GenerateResponse(payload: AssistantRequest) -> AssistantResponse:
+def _ResolveDeadline(header_value: Optional[str]) -> Deadline:
+    budget = GetSettings().request_deadline_sec
+    if header_value:
+        try:
+            requested = float(header_value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid request timeout header")
+        if requested > 0:
+            # Clients may shorten the server budget but never extend it.
+            budget = min(budget, requested)
+    return Deadline.After(budget)
+
+
+def _MapGenerateError(exc: Exception, deadline: Optional[Deadline]) -> Optional[HTTPException]:
+    if isinstance(exc, DeadlineExceeded):
+        return HTTPException(
+            status_code=504,
+            detail=f"요청 처리 시간 초과: {exc.stage}",
+        )
+    if isinstance(exc, RateLimited):
+        return HTTPException(
+            status_code=429,
+            detail=f"사용자 요청 한도 초과: {exc.reason}",
+            headers={"Retry-After": str(exc.retry_after_sec)},
+        )
+    if isinstance(exc, AdmissionRejected):
+        return HTTPException(
+            status_code=429,
+            detail=f"LLM 서버 혼잡: {exc.reason}",
+            headers={"Retry-After": str(exc.retry_after_sec)},
+        )
+    if isinstance(exc, requests.RequestException):
+        if isinstance(exc, requests.Timeout) and deadline and deadline.Remaining() <= 0:
+            return HTTPException(
+                status_code=504,
+                detail="요청 처리 시간 초과: llm_call",
+            )
+        return HTTPException(
+            status_code=502,
+            detail=f"LLM 서버 연결 실패: {exc.__class__.__name__}",
+        )
+    return None
+
+
+def _ReplyOrDegrade(
+    service: LLMService, message: LlmMessage, **kwargs: Any
+) -> tuple[str, bool]:
+    """The assistant reply, or a fallback answer while the LLM circuit is open."""
+    try:
+        return service.GenerateAssistantReply(message, ExecuteToolCall, **kwargs), False
+    except BreakerOpen:
+        text, _ = service.DegradedReply(message, ExecuteToolCall)
+        return text, True
+
+
+def _GenerateResponse(
+    payload: AssistantRequest, deadline: Optional[Deadline] = None
+) -> AssistantResponse:
     message = payload.message
     _ValidateMessage(message)
 
     service = GetLlmService()
     try:
-        reply = service.GenerateAssistantReply(message, ExecuteToolCall)
-    except requests.RequestException as exc:
+        with GetUserRateLimiter().Acquire("generate", message.user_id), BindDeadline(deadline):
+            session = (
+                GetChatSessionStore().Get(payload.session_id, message.user_id)
+                if payload.session_id
+                else None
+            )
+            reply, degraded = _ReplyOrDegrade(service, message, session=session)
+    except (
+        DeadlineExceeded, AdmissionRejected, RateLimited, requests.RequestException
+    ) as exc:
+        raise _MapGenerateError(exc, deadline) from exc
+    return AssistantResponse(
+        text=reply, model=service.model_id, session_id=payload.session_id, degraded=degraded
+    )
+
+
+@router.post("/generate", response_model=AssistantResponse)
+def Generate(payload: AssistantRequest, request: Request) -> AssistantResponse:
+    header_name = GetSettings().request_deadline_header
+    deadline = _ResolveDeadline(request.headers.get(header_name))
+    return _GenerateResponse(payload, deadline)
+
+
+@router.post("/generate/batch")
+def GenerateBatch(payload: BatchGenerateRequest) -> StreamingResponse:
+    """Answer many prompts; results stream back as NDJSON in completion order.
+
+    Reposting the same ``batch_id`` resumes: items already answered are
+    replayed from the checkpoint (``"resumed": true``) instead of regenerated.
+    A ``batch_id`` whose checkpoint answered a different user or prompt under
+    the same item id is rejected with 409. All batches share the ``batch``
+    rate limit route; a batch over it is refused with 429.
+    """
+    settings = GetSettings()
+    if len(payload.items) > settings.batch_max_items:
         raise HTTPException(
-            status_code=502,
-            detail=f"LLM 서버 연결 실패: {exc.__class__.__name__}",
+            status_code=413,
+            detail=f"items must not exceed {settings.batch_max_items}",
+        )
+    items = [
+        BatchItem(item.id or str(index), item.user_id, item.content)
+        for index, item in enumerate(payload.items)
+    ]
+    if len({item.item_id for item in items}) != len(items):
+        raise HTTPException(status_code=400, detail="items[].id must be unique")
+    batch_id = payload.batch_id or uuid.uuid4().hex
+    runner = BatchRunner(
+        GetLlmService(),
+        checkpoint_path=os.path.join(settings.batch_checkpoint_dir, f"{batch_id}.jsonl"),
+    )
+    # The quota is held until the last line is streamed, not just until we return.
+    quota = ExitStack()
+    try:
+        quota.enter_context(GetUserRateLimiter().Acquire("batch", _BATCH_CALLER_ID))
+        results = runner.Run(items)
+    except RateLimited as exc:
+        raise _MapGenerateError(exc, None) from exc
+    except CheckpointMismatch as exc:
+        quota.close()
+        raise HTTPException(
+            status_code=409,
+            detail=f"batch_id {batch_id} was used for different items (id {exc.item_id})",
         ) from exc
-    return AssistantResponse(text=reply, model=service.model_id)
 
+    def Lines() -> Iterator[bytes]:
+        with quota:
+            for result in results:
+                yield EncodeJson(result.ToDict()) + b"\n"
 
-@router.post("/generate", response_model=AssistantResponse)
-def Generate(payload: AssistantRequest) -> AssistantResponse:
-    return _GenerateResponse(payload)
+    return StreamingResponse(
+        Lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Id": batch_id},
+    )
+
+
+@router.post("/prefetch/login", response_model=PrefetchLoginResponse, status_code=202)
+def PrefetchOnLogin(payload: PrefetchLoginRequest) -> PrefetchLoginResponse:
+    """Login hook: warm the user's summaries before their first question."""
+    if not GetSettings().prefetch_enabled:
+        return PrefetchLoginResponse(queued=False)
+    return PrefetchLoginResponse(queued=GetPrefetchWorker().RequestUsers([payload.user_id]))
+
+
+def _ParseSocketUserId(value: Optional[str]) -> Optional[int]:
+    try:
+        user_id = int(value or "")
+    except ValueError:
+        return None
+    return user_id if user_id > 0 else None
+
+
+async def _StreamSocketReply(
+    websocket: WebSocket,
+    service: LLMService,
+    message: LlmMessage,
+    session: ChatSession,
+    system_context: str,
+) -> None:
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue[Optional[dict[str, Any]]] = asyncio.Queue()
+    deadline = Deadline.After(GetSettings().request_deadline_sec)
+    timings = RequestTimings()
+
+    def Emit(event: Optional[dict[str, Any]]) -> None:
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    def Run() -> tuple[str, bool]:
+        # One request id per chat message, like an HTTP request.
+        request_id = BindRequestId(uuid.uuid4().hex)
+        quota = GetUserRateLimiter().Acquire("ws", message.user_id)
+        try:
+            with request_id, quota, BindRequestTimings(timings), BindDeadline(deadline):
+                return _ReplyOrDegrade(
+                    service,
+                    message,
+                    session=session,
+                    on_event=Emit,
+                    system_context=system_context,
+                )
+        finally:
+            Emit(None)
+
+    started = time.perf_counter()
+    task = asyncio.ensure_future(run_in_threadpool(Run))
+    while True:
+        event = await events.get()
+        if event is None:
+            break
+        await websocket.send_json(event)
+    try:
+        reply, degraded = await task
+    except Exception as exc:
+        error = _MapGenerateError(exc, deadline)
+        if error is None:
+            logger.exception("WebSocket 응답 생성 실패 session_id=%s", session.session_id)
+            error = HTTPException(status_code=500, detail="응답 생성 실패")
+        frame: dict[str, Any] = {
+            "type": "error",
+            "status": error.status_code,
+            "detail": error.detail,
+        }
+        if error.headers and "Retry-After" in error.headers:
+            frame["retry_after_sec"] = int(error.headers["Retry-After"])
+        await websocket.send_json(frame)
+        return
+    finally:
+        RecordStage("request", time.perf_counter() - started, "/api/ws")
+    await websocket.send_json(
+        {
+            "type": "done",
+            "text": reply,
+            "model": service.model_id,
+            "session_id": session.session_id,
+            "degraded": degraded,
+            "server_timing": timings.Header(),
+        }
+    )
+
+
+@router.websocket("/ws")
+async def ChatSocket(websocket: WebSocket) -> None:
+    """Long-lived chat channel: ``/api/ws?user_id=1[&session_id=...]``.
+
+    Client frames are ``{"content": "..."}``. The server replies with
+    ``ready`` once, then per message any number of ``tool`` and ``token``
+    frames followed by ``done`` or ``error``.
+    """
+    user_id = _ParseSocketUserId(websocket.query_params.get("user_id"))
+    session_id = websocket.query_params.get("session_id") or uuid.uuid4().hex
+    if user_id is None or not _SESSION_ID_RE.match(session_id):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    service = GetLlmService()
+    # Identity, prompt prefix and history stay bound to the connection.
+    system_context = BuildSystemContextForUser(user_id)
+    session = await run_in_threadpool(GetChatSessionStore().Get, session_id, user_id)
+    await websocket.send_json(
+        {"type": "ready", "session_id": session_id, "model": service.model_id}
+    )
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                frame = DecodeJson(raw)
+            except ValueError:
+                frame = None
+            content = frame.get("content") if isinstance(frame, dict) else None
+            if not isinstance(content, str) or not content.strip():
+                await websocket.send_json(
+                    {"type": "error", "status": 400, "detail": "content is required"}
+                )
+                continue
+            message = LlmMessage.model_construct(
+                role="user", user_id=user_id, content=content.strip()
+            )
+            await _StreamSocketReply(websocket, service, message, session, system_context)
+    except WebSocketDisconnect:
+        return
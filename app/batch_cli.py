@@ -0,0 +1,75 @@
+"""Command-line batch generation: ``python -m app.batch_cli --input items.jsonl``.
+
+Each input line is ``{"id": "...", "user_id": 1, "content": "..."}`` (``id``
+defaults to the line number). Successful results are appended to
+``--output``, which doubles as the checkpoint: rerunning with the same
+output file only processes items that have not succeeded yet. Failures are
+reported on stderr and retried on the next run. An output file written for
+different items (same id, other user or prompt) is refused.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Optional
+
+from app.config.config import ConfigureLogging, GetSettings
+from app.core.json_codec import DecodeJson, EncodeJsonText
+from app.core.llm_service import GetLlmService
+from app.services.batch import STATUS_OK, BatchItem, BatchRunner, CheckpointMismatch
+
+
+def _ReadItems(path: str) -> list[BatchItem]:
+    items: list[BatchItem] = []
+    with open(path, "rb") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            record = DecodeJson(line)
+            items.append(
+                BatchItem(
+                    str(record.get("id") or line_number),
+                    int(record["user_id"]),
+                    str(record["content"]).strip(),
+                )
+            )
+    return items
+
+
+def _Main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch assistant reply generation")
+    parser.add_argument("--input", required=True, help="JSONL of {id, user_id, content}")
+    parser.add_argument("--output", required=True, help="JSONL results and resume checkpoint")
+    parser.add_argument("--concurrency", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    ConfigureLogging(GetSettings())
+    items = _ReadItems(args.input)
+    runner = BatchRunner(
+        GetLlmService(),
+        concurrency=args.concurrency or None,
+        checkpoint_path=args.output,
+    )
+    started = time.perf_counter()
+    counts = {"ok": 0, "resumed": 0, "error": 0}
+    try:
+        results = runner.Run(items)
+    except CheckpointMismatch as exc:
+        print(f"{args.output}: {exc}; use a new --output for a different input", file=sys.stderr)
+        return 2
+    for result in results:
+        if result.resumed:
+            counts["resumed"] += 1
+        elif result.status == STATUS_OK:
+            counts["ok"] += 1
+        else:
+            counts["error"] += 1
+            print(EncodeJsonText(result.ToDict()), file=sys.stderr)
+    counts["elapsed_sec"] = round(time.perf_counter() - started, 2)
+    print(EncodeJsonText(counts), file=sys.stderr)
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_Main())
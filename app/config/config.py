@@ -36,6 +36,11 @@ def _LoadToolKeywordMap(path: str) -> dict[str, list[str]]:
     except (OSError, json.JSONDecodeError):
         return {}
 
+def _EnvList(name: str) -> list[str]:
+    value = os.getenv(name, "")
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
 def _NormalizePath(path: str) -> str:
     if not path:
         return ""
@@ -70,9 +75,131 @@ class Settings:
     trust_remote_code: bool = _EnvBool("TRUST_REMOTE_CODE", True)
 
     llm_base_url: str = _BuildBaseUrlFromParts()
+    llm_base_urls: list[str] = field(default_factory=lambda: _EnvList("LLM_BASE_URLS"))
+    llm_balance_strategy: str = os.getenv("LLM_BALANCE_STRATEGY", "least_outstanding")
+    llm_health_check_interval_sec: float = float(
+        os.getenv("LLM_HEALTH_CHECK_INTERVAL_SEC", "10")
+    )
+    llm_eject_after_failures: int = int(os.getenv("LLM_EJECT_AFTER_FAILURES", "3"))
+    llm_readmit_after_successes: int = int(os.getenv("LLM_READMIT_AFTER_SUCCESSES", "2"))
     llm_api_key: str = os.getenv("LLM_API_KEY", "EMPTY")
     llm_timeout_sec: float = float(os.getenv("LLM_TIMEOUT_SEC", "60"))
     llm_tool_fallback_on_400: bool = _EnvBool("LLM_TOOL_FALLBACK_ON_400", True)
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    llm_max_queue: int = int(os.getenv("LLM_MAX_QUEUE", "32"))
+    llm_queue_timeout_sec: float = float(os.getenv("LLM_QUEUE_TIMEOUT_SEC", "10"))
+    # Circuit breaker over all LLM replicas: opens on consecutive failed or slow calls.
+    llm_breaker_enabled: bool = _EnvBool("LLM_BREAKER_ENABLED", True)
+    llm_breaker_failures: int = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+    # Non-streamed calls slower than this count as failures; 0 disables.
+    llm_breaker_slow_call_sec: float = float(os.getenv("LLM_BREAKER_SLOW_CALL_SEC", "30"))
+    llm_breaker_open_sec: float = float(os.getenv("LLM_BREAKER_OPEN_SEC", "10"))
+    llm_breaker_max_open_sec: float = float(os.getenv("LLM_BREAKER_MAX_OPEN_SEC", "120"))
+    llm_breaker_half_open_ratio: float = float(os.getenv("LLM_BREAKER_HALF_OPEN_RATIO", "0.1"))
+    llm_breaker_half_open_step: int = int(os.getenv("LLM_BREAKER_HALF_OPEN_STEP", "5"))
+    # Degraded answers while the breaker is open.
+    llm_faq_cache_size: int = int(os.getenv("LLM_FAQ_CACHE_SIZE", "500"))
+    # Only general questions containing one of these are cached for degraded replies.
+    llm_faq_keywords: list[str] = field(
+        default_factory=lambda: _EnvList("LLM_FAQ_KEYWORDS")
+        or [
+            "안전",
+            "헬멧",
+            "대여 방법",
+            "반납 방법",
+            "이용 방법",
+            "운영 시간",
+            "회원가입",
+            "회원 가입",
+            "고장 신고",
+            "분실",
+            "환불 규정",
+            "이용 약관",
+        ]
+    )
+    llm_faq_cache_ttl_sec: float = float(os.getenv("LLM_FAQ_CACHE_TTL_SEC", "86400"))
+    llm_degraded_max_rows: int = int(os.getenv("LLM_DEGRADED_MAX_ROWS", "5"))
+    # Per-user token buckets and in-flight quotas in front of the LLM routes.
+    rate_limit_enabled: bool = _EnvBool("RATE_LIMIT_ENABLED", True)
+    # route=rate_per_sec:burst:max_in_flight; 0 turns that part off.
+    rate_limit_routes: list[str] = field(
+        default_factory=lambda: _EnvList("RATE_LIMIT_ROUTES")
+        or ["generate=0.5:10:2", "ws=0.5:10:1", "batch=0.05:2:1"]
+    )
+    rate_limit_max_users: int = int(os.getenv("RATE_LIMIT_MAX_USERS", "100000"))
+    rate_limit_idle_sec: float = float(os.getenv("RATE_LIMIT_IDLE_SEC", "600"))
+    llm_short_intent_tools: list[str] = field(
+        default_factory=lambda: _EnvList("LLM_SHORT_INTENT_TOOLS")
+        or [
+            "get_user_profile",
+            "get_pricing_summary",
+            "get_total_payments",
+            "get_total_usage",
+        ]
+    )
+    # Keep-alive sockets per LLM replica; 0 keeps the requests default (10).
+    llm_http_pool_size: int = int(os.getenv("LLM_HTTP_POOL_SIZE", "0"))
+    llm_capability_ttl_sec: float = float(os.getenv("LLM_CAPABILITY_TTL_SEC", "600"))
+    # "native" (tools + tool_choice=auto) or "guided" (constrained JSON tool pick).
+    llm_tool_selection_mode: str = os.getenv("LLM_TOOL_SELECTION_MODE", "native").strip().lower()
+    # "response_format" (OpenAI json_schema) or "guided_json" (older vLLM extra param).
+    llm_guided_decoding_format: str = (
+        os.getenv("LLM_GUIDED_DECODING_FORMAT", "response_format").strip().lower()
+    )
+    llm_tool_selection_max_tokens: int = int(os.getenv("LLM_TOOL_SELECTION_MAX_TOKENS", "128"))
+    # Start the inferred tool's DB query alongside the first LLM call.
+    llm_speculative_tools_enabled: bool = _EnvBool("LLM_SPECULATIVE_TOOLS_ENABLED", True)
+    llm_speculative_tools: list[str] = field(
+        default_factory=lambda: _EnvList("LLM_SPECULATIVE_TOOLS")
+        or [
+            "get_user_profile",
+            "get_pricing_summary",
+            "get_usage_summary",
+            "get_total_payments",
+            "get_total_usage",
+            "get_history_digest",
+        ]
+    )
+    llm_speculative_max_in_flight: int = int(os.getenv("LLM_SPECULATIVE_MAX_IN_FLIGHT", "4"))
+    llm_min_call_budget_sec: float = float(os.getenv("LLM_MIN_CALL_BUDGET_SEC", "1"))
+    # Concurrent startup warm-up of DB/LLM connections, capped at the budget; see /ready.
+    warmup_enabled: bool = _EnvBool("WARMUP_ENABLED", True)
+    warmup_budget_sec: float = float(os.getenv("WARMUP_BUDGET_SEC", "20"))
+    warmup_retry_interval_sec: float = float(os.getenv("WARMUP_RETRY_INTERVAL_SEC", "10"))
+    # app.server: worker count (0 = CPU count) and process-wide budgets split across workers.
+    server_workers: int = int(os.getenv("SERVER_WORKERS", "0"))
+    server_db_connections: int = int(os.getenv("SERVER_DB_CONNECTIONS", "0"))
+    server_llm_concurrency: int = int(os.getenv("SERVER_LLM_CONCURRENCY", "0"))
+    server_shared_cache: bool = _EnvBool("SERVER_SHARED_CACHE", True)
+    request_deadline_sec: float = float(os.getenv("REQUEST_DEADLINE_SEC", "90"))
+    request_deadline_header: str = os.getenv("REQUEST_DEADLINE_HEADER", "X-Request-Timeout")
+    chat_history_token_budget: int = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "1024"))
+    chat_session_cache_size: int = int(os.getenv("CHAT_SESSION_CACHE_SIZE", "1000"))
+    chat_session_load_turns: int = int(os.getenv("CHAT_SESSION_LOAD_TURNS", "20"))
+    chat_tool_result_ttl_sec: float = float(os.getenv("CHAT_TOOL_RESULT_TTL_SEC", "300"))
+    chat_write_queue_size: int = int(os.getenv("CHAT_WRITE_QUEUE_SIZE", "10000"))
+    chat_write_batch_size: int = int(os.getenv("CHAT_WRITE_BATCH_SIZE", "100"))
+    chat_write_flush_interval_sec: float = float(
+        os.getenv("CHAT_WRITE_FLUSH_INTERVAL_SEC", "1")
+    )
+    # "jsonl" (rotating files under AUDIT_DIR), "db" (AUDIT_TABLE) or "off"
+    audit_sink: str = os.getenv("AUDIT_SINK", "jsonl").strip().lower()
+    audit_table: str = os.getenv("AUDIT_TABLE", "chat_audit")
+    audit_dir: str = _NormalizePath(os.getenv("AUDIT_DIR", "audit"))
+    audit_jsonl_max_bytes: int = int(os.getenv("AUDIT_JSONL_MAX_BYTES", str(64 * 1024 * 1024)))
+    audit_jsonl_backups: int = int(os.getenv("AUDIT_JSONL_BACKUPS", "10"))
+    audit_queue_size: int = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+    audit_batch_size: int = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+    audit_flush_interval_sec: float = float(os.getenv("AUDIT_FLUSH_INTERVAL_SEC", "2"))
+    # Share of turns recorded for bench/replay.py; 0 = off. Messages are only partly
+    # masked (e-mail, phone, long numbers), so the files hold personal data.
+    traffic_record_rate: float = float(os.getenv("TRAFFIC_RECORD_RATE", "0"))
+    traffic_record_dir: str = _NormalizePath(os.getenv("TRAFFIC_RECORD_DIR", "traffic"))
+    traffic_record_max_bytes: int = int(
+        os.getenv("TRAFFIC_RECORD_MAX_BYTES", str(256 * 1024 * 1024))
+    )
+    # HMAC key for user/session pseudonyms; set it to correlate files across restarts.
+    traffic_record_salt: str = os.getenv("TRAFFIC_RECORD_SALT", "")
     tool_keywords_path: str = os.getenv(
         "TOOL_KEYWORDS_PATH",
         os.path.join(os.path.dirname(__file__), "tool_keywords.json"),
@@ -87,6 +214,58 @@ class Settings:
     )
 
     db_backend: str = os.getenv("DB_BACKEND", "")
+    db_path: str = _NormalizePath(os.getenv("DB_PATH", "local.db"))
+    db_analytics_backend: str = os.getenv("DB_ANALYTICS_BACKEND", "")
+    db_analytics_path: str = _NormalizePath(os.getenv("DB_ANALYTICS_PATH", ""))
+    db_call_timeout_sec: float = float(os.getenv("DB_CALL_TIMEOUT_SEC", "15"))
+    # "records" (list of dicts) or "compact" ({"columns": [...], "rows": [...]})
+    tool_rows_format: str = os.getenv("TOOL_ROWS_FORMAT", "records").strip().lower()
+    # Hold single-user summary lookups this long to answer them with one IN query while
+    # other lookups are in flight; 0 (default) disables.
+    db_micro_batch_window_ms: float = float(os.getenv("DB_MICRO_BATCH_WINDOW_MS", "0"))
+    db_micro_batch_max_users: int = int(os.getenv("DB_MICRO_BATCH_MAX_USERS", "200"))
+    db_micro_batch_queries: list[str] = field(
+        default_factory=lambda: _EnvList("DB_MICRO_BATCH_QUERIES")
+        or [
+            "latest_period",
+            "pricing_summary",
+            "usage_summary",
+            "total_payments",
+            "total_usage",
+        ]
+    )
+    tool_cache_size: int = int(os.getenv("TOOL_CACHE_SIZE", "10000"))
+    tool_cache_ttl_sec: float = float(os.getenv("TOOL_CACHE_TTL_SEC", "60"))
+    # Unix socket of the supervisor's shared cache (set by app.server); empty = per process.
+    tool_cache_socket: str = os.getenv("TOOL_CACHE_SOCKET", "")
+    # Hex key for that socket, generated per run by app.server.
+    tool_cache_authkey: str = os.getenv("TOOL_CACHE_AUTHKEY", "")
+    batch_concurrency: int = int(os.getenv("BATCH_CONCURRENCY", "0"))
+    batch_max_items: int = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+    batch_checkpoint_dir: str = _NormalizePath(
+        os.getenv("BATCH_CHECKPOINT_DIR", "batch_checkpoints")
+    )
+    # Opt-in: the startup sweep reads every recently active user from the analytics DB.
+    prefetch_enabled: bool = _EnvBool("PREFETCH_ENABLED", False)
+    prefetch_tools: list[str] = field(
+        default_factory=lambda: _EnvList("PREFETCH_TOOLS")
+        or [
+            "get_pricing_summary",
+            "get_usage_summary",
+            "get_total_payments",
+            "get_total_usage",
+        ]
+    )
+    # Users active in the current month or the (N-1) months before it.
+    prefetch_active_months: int = int(os.getenv("PREFETCH_ACTIVE_MONTHS", "2"))
+    prefetch_max_users: int = int(os.getenv("PREFETCH_MAX_USERS", "5000"))
+    prefetch_chunk_size: int = int(os.getenv("PREFETCH_CHUNK_SIZE", "200"))
+    prefetch_pause_sec: float = float(os.getenv("PREFETCH_PAUSE_SEC", "0.2"))
+    # Closed months only; the current month keeps TOOL_CACHE_TTL_SEC.
+    prefetch_ttl_sec: float = float(os.getenv("PREFETCH_TTL_SEC", "3600"))
+    # 0 sweeps only at startup and when the month rolls over.
+    prefetch_interval_sec: float = float(os.getenv("PREFETCH_INTERVAL_SEC", "0"))
+    prefetch_queue_size: int = int(os.getenv("PREFETCH_QUEUE_SIZE", "10000"))
 
     oracle_host: str = os.getenv("ORACLE_HOST", "")
     oracle_port: int = int(os.getenv("ORACLE_PORT", "1521") or 1521)
@@ -108,6 +287,27 @@ class Settings:
     bastion_port: int = int(os.getenv("BASTION_PORT", "22"))
     bastion_user: str = os.getenv("BASTION_USER", "")
     bastion_key_path: str = _NormalizePath(os.getenv("BASTION_KEY_PATH", ""))
+    # Failover list of "host" or "host:port"; overrides BASTION_HOST when set.
+    bastion_hosts: list[str] = field(default_factory=lambda: _EnvList("BASTION_HOSTS"))
+    db_pool_enabled: bool = _EnvBool("DB_POOL_ENABLED", True)
+    db_pool_min: int = int(os.getenv("DB_POOL_MIN", "2"))
+    db_pool_max: int = int(os.getenv("DB_POOL_MAX", "8"))
+    db_pool_acquire_timeout_sec: float = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT_SEC", "5"))
+    db_health_interval_sec: float = float(os.getenv("DB_HEALTH_INTERVAL_SEC", "15"))
+    db_rotate_after_failures: int = int(os.getenv("DB_ROTATE_AFTER_FAILURES", "2"))
+    # Keep a second tunnel + pool open on the next bastion host for instant failover.
+    db_tunnel_standby: bool = _EnvBool("DB_TUNNEL_STANDBY", True)
+    db_tunnel_keepalive_sec: float = float(os.getenv("DB_TUNNEL_KEEPALIVE_SEC", "30"))
+
+    log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    # "json" (one object per line) or "text".
+    log_format: str = os.getenv("LOG_FORMAT", "json").strip().lower()
+    log_queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Share of requests whose per-call (".calls" logger) lines are kept.
+    log_sample_rate: float = float(os.getenv("LOG_SAMPLE_RATE", "0.05"))
+    log_max_message_chars: int = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "2000"))
+    log_max_body_chars: int = int(os.getenv("LOG_MAX_BODY_CHARS", "300"))
+    request_id_header: str = os.getenv("REQUEST_ID_HEADER", "X-Request-Id")
 
     cors_allow_origins: list[str] = field(
         default_factory=lambda: (
@@ -124,9 +324,8 @@ def GetSettings() -> Settings:
 
 
 def ConfigureLogging(settings: Settings) -> None:
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s %(levelname)s %(name)s - %(message)s",
-    )
+    from app.core.structured_log import StartLogging
+
+    StartLogging(settings)
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.info("Booting %s", settings.app_name)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Iterator, Optional
+
+from app.config.config import GetSettings
+
+
+PRIORITY_IN_PROGRESS = 0
+PRIORITY_SHORT = 1
+PRIORITY_NORMAL = 2
+PRIORITY_BATCH = 3
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after_sec: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_sec = retry_after_sec
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    start_tag: float
+    seq: int
+    event: threading.Event = field(compare=False, default_factory=threading.Event)
+    granted: bool = field(compare=False, default=False)
+    cancelled: bool = field(compare=False, default=False)
+
+
+class AdmissionController:
+    """Bounded concurrency in front of the LLM backend with a priority queue.
+
+    Callers beyond ``max_concurrency`` wait in a queue of at most ``max_queue``
+    entries, lowest priority value first. Requests are shed immediately when
+    the queue is full or the estimated wait already exceeds their budget.
+
+    Within a priority, waiters carrying a ``fair_key`` (the user) are ordered
+    by start-time fair queuing: a user's n-th queued call is tagged n slots
+    after the current virtual time, so one user with many queued calls is
+    interleaved with everybody else instead of served first-come.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        max_wait_sec: float,
+    ) -> None:
+        self._max_concurrency = max(1, max_concurrency)
+        self._max_queue = max(0, max_queue)
+        self._max_wait_sec = max_wait_sec
+        self._lock = threading.Lock()
+        self._queue: list[_Waiter] = []
+        self._queued = 0
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._finish_tags: dict[str, float] = {}
+        # Exponentially weighted service time, seeded pessimistically.
+        self._avg_service_sec = 1.0
+        self._admitted = 0
+        self._rejected = 0
+        self._wait_total_sec = 0.0
+        self._wait_max_sec = 0.0
+
+    def _EstimatedWaitSec(self, position: int) -> float:
+        rounds = math.ceil(position / self._max_concurrency)
+        return rounds * self._avg_service_sec
+
+    def _RetryAfter(self) -> int:
+        return max(1, math.ceil(self._EstimatedWaitSec(self._queued + 1)))
+
+    def _Reject(self, reason: str) -> AdmissionRejected:
+        self._rejected += 1
+        return AdmissionRejected(reason, self._RetryAfter())
+
+    def _StartTag(self, fair_key: str) -> float:
+        start = max(self._virtual_time, self._finish_tags.get(fair_key, 0.0))
+        if fair_key:
+            self._finish_tags[fair_key] = start + 1.0
+        return start
+
+    def _Acquire(
+        self, priority: int, timeout_sec: Optional[float], fair_key: str = ""
+    ) -> float:
+        budget = self._max_wait_sec if timeout_sec is None else min(timeout_sec, self._max_wait_sec)
+        started = time.monotonic()
+        with self._lock:
+            if self._in_flight < self._max_concurrency and self._queued == 0:
+                self._in_flight += 1
+                self._admitted += 1
+                return 0.0
+            if self._queued >= self._max_queue:
+                raise self._Reject("queue_full")
+            if self._EstimatedWaitSec(self._queued + 1) > budget:
+                raise self._Reject("wait_exceeds_budget")
+            waiter = _Waiter(
+                priority=priority, start_tag=self._StartTag(fair_key), seq=next(self._seq)
+            )
+            heapq.heappush(self._queue, waiter)
+            self._queued += 1
+        waiter.event.wait(max(0.0, budget))
+        with self._lock:
+            if not waiter.granted:
+                waiter.cancelled = True
+                self._queued -= 1
+                raise self._Reject("wait_timeout")
+            waited = time.monotonic() - started
+            self._admitted += 1
+            self._wait_total_sec += waited
+            self._wait_max_sec = max(self._wait_max_sec, waited)
+            return waited
+
+    def _Release(self, service_sec: float) -> None:
+        with self._lock:
+            self._avg_service_sec = 0.8 * self._avg_service_sec + 0.2 * service_sec
+            while self._queue:
+                waiter = heapq.heappop(self._queue)
+                if waiter.cancelled:
+                    continue
+                # Hand the slot over directly; in_flight stays the same.
+                waiter.granted = True
+                self._queued -= 1
+                self._virtual_time = max(self._virtual_time, waiter.start_tag)
+                if self._queued == 0:
+                    self._finish_tags.clear()
+                waiter.event.set()
+                return
+            self._in_flight -= 1
+            self._finish_tags.clear()
+
+    @contextmanager
+    def Admit(
+        self,
+        priority: int = PRIORITY_NORMAL,
+        timeout_sec: Optional[float] = None,
+        fair_key: str = "",
+    ) -> Iterator[float]:
+        waited = self._Acquire(priority, timeout_sec, fair_key)
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self._Release(time.monotonic() - started)
+
+    def Snapshot(self) -> dict[str, float]:
+        with self._lock:
+            admitted_total = max(1, self._admitted)
+            return {
+                "in_flight": self._in_flight,
+                "max_concurrency": self._max_concurrency,
+                "queue_depth": self._queued,
+                "max_queue": self._max_queue,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_total_sec / admitted_total * 1000, 2),
+                "max_wait_ms": round(self._wait_max_sec * 1000, 2),
+                "avg_service_ms": round(self._avg_service_sec * 1000, 2),
+            }
+
+
+@lru_cache(maxsize=1)
+def GetAdmissionController() -> AdmissionController:
+    settings = GetSettings()
+    return AdmissionController(
+        max_concurrency=settings.llm_max_concurrency,
+        max_queue=settings.llm_max_queue,
+        max_wait_sec=settings.llm_queue_timeout_sec,
+    )
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+import logging
+import os
+import threading
+from typing import Any, Optional
+
+from app.config.config import GetSettings
+from app.core.json_codec import EncodeJson, EncodeJsonText
+from app.core.services_db import ExecuteMany, MysqlConnection
+from app.core.write_behind import BatchWriter
+
+
+logger = logging.getLogger(__name__)
+
+AUDIT_SINK_DB = "db"
+AUDIT_SINK_JSONL = "jsonl"
+AUDIT_SINK_OFF = "off"
+
+
+class JsonlSink:
+    """Appends one JSON object per line, rotating like ``RotatingFileHandler``."""
+
+    def __init__(self, path: str, max_bytes: int, backups: int) -> None:
+        self._path = path
+        self._max_bytes = max(0, max_bytes)
+        self._backups = max(0, backups)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, entries: list[dict[str, Any]]) -> None:
+        data = b"".join(EncodeJson(entry) + b"\n" for entry in entries)
+        with self._lock:
+            with open(self._path, "ab") as handle:
+                handle.write(data)
+                size = handle.tell()
+            if self._max_bytes and size >= self._max_bytes:
+                self._Rotate()
+
+    def _Rotate(self) -> None:
+        if not self._backups:
+            os.remove(self._path)
+            return
+        for index in range(self._backups - 1, 0, -1):
+            source = f"{self._path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self._path}.{index + 1}")
+        os.replace(self._path, f"{self._path}.1")
+
+
+class DbSink:
+    """Bulk-inserts audit entries into their own table, away from chat history reads."""
+
+    def __init__(self, table: str) -> None:
+        self._query = (
+            f"INSERT INTO {table} "
+            "(session_id, user_id, content, created_at) "
+            "VALUES (:session_id, :user_id, :content, :created_at)"
+        )
+
+    def __call__(self, entries: list[dict[str, Any]]) -> None:
+        rows = [
+            {
+                "session_id": entry.get("session_id"),
+                "user_id": entry.get("user_id"),
+                "content": EncodeJsonText(entry),
+                "created_at": datetime.fromtimestamp(entry["ts"]).replace(microsecond=0),
+            }
+            for entry in entries
+        ]
+        with MysqlConnection() as connection:
+            with connection.cursor() as cursor:
+                ExecuteMany(cursor, "audit_insert", self._query, rows)
+            connection.commit()
+
+
+class AuditLog:
+    """Fire-and-forget recorder of completed turns.
+
+    ``Record`` only enqueues; serialization and I/O happen on the writer
+    thread. When the queue is full the entry is dropped and counted.
+    """
+
+    def __init__(self, writer: Optional[BatchWriter] = None) -> None:
+        self._writer = writer
+
+    @property
+    def enabled(self) -> bool:
+        return self._writer is not None
+
+    def Record(self, entry: dict[str, Any]) -> bool:
+        if self._writer is None:
+            return False
+        return self._writer.Submit(entry)
+
+    def Flush(self, timeout_sec: float = 5.0) -> bool:
+        return self._writer.Flush(timeout_sec) if self._writer is not None else True
+
+    def Stop(self) -> None:
+        if self._writer is not None:
+            self._writer.Stop()
+
+    def Snapshot(self) -> dict[str, Any]:
+        if self._writer is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._writer.Snapshot()}
+
+
+def _CreateSink(settings: Any) -> Optional[Any]:
+    sink = settings.audit_sink
+    if sink == AUDIT_SINK_OFF:
+        return None
+    if sink == AUDIT_SINK_DB:
+        return DbSink(settings.audit_table)
+    if sink == AUDIT_SINK_JSONL:
+        return JsonlSink(
+            os.path.join(settings.audit_dir, "audit.jsonl"),
+            max_bytes=settings.audit_jsonl_max_bytes,
+            backups=settings.audit_jsonl_backups,
+        )
+    raise RuntimeError(f"Unsupported AUDIT_SINK: {sink}")
+
+
+@lru_cache(maxsize=1)
+def GetAuditLog() -> AuditLog:
+    settings = GetSettings()
+    sink = _CreateSink(settings)
+    if sink is None:
+        return AuditLog()
+    writer = BatchWriter(
+        "audit",
+        sink,
+        max_queue=settings.audit_queue_size,
+        batch_size=settings.audit_batch_size,
+        flush_interval_sec=settings.audit_flush_interval_sec,
+    )
+    return AuditLog(writer)
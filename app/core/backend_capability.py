@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+import threading
+import time
+from typing import Optional
+
+from app.config.config import GetSettings
+
+
+@dataclass(frozen=True)
+class BackendCapability:
+    base_url: str
+    model_id: Optional[str] = None
+    max_context: Optional[int] = None
+    # Server-counted input tokens per estimated token (largest seen).
+    token_ratio: Optional[float] = None
+    tools_supported: Optional[bool] = None
+    guided_supported: Optional[bool] = None
+    learned_at: float = field(default_factory=time.monotonic)
+
+    def IsStale(self, ttl_sec: float, now: Optional[float] = None) -> bool:
+        if ttl_sec <= 0:
+            return False
+        current = time.monotonic() if now is None else now
+        return current - self.learned_at >= ttl_sec
+
+
+class BackendCapabilityCache:
+    """Per-backend facts learned from 404/400 responses.
+
+    Records live for the process lifetime but are dropped once older than
+    ``ttl_sec`` so the next request re-probes the configured values.
+    """
+
+    def __init__(self, ttl_sec: float) -> None:
+        self._ttl_sec = ttl_sec
+        self._records: dict[str, BackendCapability] = {}
+        self._lock = threading.Lock()
+
+    def Get(self, base_url: str) -> BackendCapability:
+        with self._lock:
+            record = self._records.get(base_url)
+            if record is None:
+                return BackendCapability(base_url=base_url)
+            if record.IsStale(self._ttl_sec):
+                del self._records[base_url]
+                return BackendCapability(base_url=base_url)
+            return record
+
+    def _Update(self, base_url: str, **changes: object) -> BackendCapability:
+        with self._lock:
+            record = self._records.get(base_url)
+            if record is None or record.IsStale(self._ttl_sec):
+                record = BackendCapability(base_url=base_url)
+            record = replace(record, learned_at=time.monotonic(), **changes)
+            self._records[base_url] = record
+            return record
+
+    def RecordModelId(self, base_url: str, model_id: str) -> BackendCapability:
+        return self._Update(base_url, model_id=model_id)
+
+    def RecordMaxContext(self, base_url: str, max_context: int) -> BackendCapability:
+        return self._Update(base_url, max_context=max_context)
+
+    def RecordTokenRatio(self, base_url: str, token_ratio: float) -> BackendCapability:
+        return self._Update(base_url, token_ratio=token_ratio)
+
+    def RecordToolsSupported(self, base_url: str, supported: bool) -> BackendCapability:
+        return self._Update(base_url, tools_supported=supported)
+
+    def RecordGuidedSupported(self, base_url: str, supported: bool) -> BackendCapability:
+        return self._Update(base_url, guided_supported=supported)
+
+    def Invalidate(self, base_url: Optional[str] = None) -> None:
+        with self._lock:
+            if base_url is None:
+                self._records.clear()
+            else:
+                self._records.pop(base_url, None)
+
+
+@lru_cache(maxsize=1)
+def GetBackendCapabilityCache() -> BackendCapabilityCache:
+    return BackendCapabilityCache(GetSettings().llm_capability_ttl_sec)
@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from app.config.config import GetSettings
+from app.core.deadline import DeadlineExceeded
+from app.core.json_codec import DecodeJson, EncodeJsonText
+from app.core.metrics import CountEvent
+from app.core.services_db import (
+    ExecuteMany,
+    ExecuteQuery,
+    FetchAllDicts,
+    GetDialect,
+    GetMysqlConfig,
+    MysqlConnection,
+)
+from app.core.write_behind import BatchWriter
+
+
+logger = logging.getLogger(__name__)
+
+ROLE_USER = "user"
+ROLE_ASSISTANT = "assistant"
+ROLE_TOOL = "tool"
+
+_MAX_TOOL_RESULTS = 8
+_SUMMARY_SNIPPET_CHARS = 60
+_SENTENCE_END = re.compile(r"(?<=[.!?。])\s|\n")
+
+
+@dataclass
+class ChatTurn:
+    role: str
+    content: str
+    tool_name: Optional[str] = None
+    tool_args: Optional[dict[str, Any]] = None
+
+
+@dataclass
+class _ToolResult:
+    result: dict[str, Any]
+    stored_at: float
+
+
+def _ToolKey(tool_name: str, args: dict[str, Any]) -> str:
+    normalized = {
+        key: str(value) if key == "user_id" else value
+        for key, value in args.items()
+        if value not in (None, "")
+    }
+    return f"{tool_name}:{EncodeJsonText(dict(sorted(normalized.items())))}"
+
+
+@dataclass
+class ChatSession:
+    session_id: str
+    user_id: int
+    turns: list[ChatTurn] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _tool_results: "OrderedDict[str, _ToolResult]" = field(
+        default_factory=OrderedDict, repr=False
+    )
+
+    def LastTool(self) -> Optional[tuple[str, dict[str, Any]]]:
+        with self.lock:
+            for turn in reversed(self.turns):
+                if turn.role == ROLE_TOOL and turn.tool_name:
+                    return turn.tool_name, dict(turn.tool_args or {})
+        return None
+
+    def LookupToolResult(
+        self, tool_name: str, args: dict[str, Any], ttl_sec: float
+    ) -> Optional[dict[str, Any]]:
+        key = _ToolKey(tool_name, args)
+        with self.lock:
+            entry = self._tool_results.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.stored_at > ttl_sec:
+                del self._tool_results[key]
+                return None
+            self._tool_results.move_to_end(key)
+            return entry.result
+
+    def RememberToolResult(
+        self, tool_name: str, args: dict[str, Any], result: dict[str, Any]
+    ) -> None:
+        if not isinstance(result, dict) or result.get("error"):
+            return
+        key = _ToolKey(tool_name, args)
+        with self.lock:
+            self._tool_results[key] = _ToolResult(result, time.monotonic())
+            self._tool_results.move_to_end(key)
+            while len(self._tool_results) > _MAX_TOOL_RESULTS:
+                self._tool_results.popitem(last=False)
+
+
+def _Snippet(text: str) -> str:
+    first = _SENTENCE_END.split(text.strip(), maxsplit=1)[0]
+    if len(first) > _SUMMARY_SNIPPET_CHARS:
+        first = first[:_SUMMARY_SNIPPET_CHARS].rstrip() + "…"
+    return first
+
+
+def _SummarizeTurns(
+    turns: list[ChatTurn], budget_tokens: int, estimate_tokens: Callable[[str], int]
+) -> str:
+    """Extractive summary: first sentence of each turn plus tools used, newest kept."""
+    lines: list[str] = []
+    for turn in turns:
+        if turn.role == ROLE_TOOL:
+            period = (turn.tool_args or {}).get("period")
+            lines.append(f"- 도구: {turn.tool_name}" + (f" ({period})" if period else ""))
+        elif turn.content:
+            speaker = "사용자" if turn.role == ROLE_USER else "답변"
+            lines.append(f"- {speaker}: {_Snippet(turn.content)}")
+    kept: list[str] = []
+    used = 0
+    for line in reversed(lines):
+        cost = estimate_tokens(line)
+        if used + cost > budget_tokens:
+            break
+        kept.append(line)
+        used += cost
+    if not kept:
+        return ""
+    return "이전 대화 요약:\n" + "\n".join(reversed(kept))
+
+
+class ChatSessionStore:
+    """Hot sessions in an LRU; history persisted to ``chat_table`` via write-behind.
+
+    Sessions are keyed by ``(user_id, session_id)`` so one user can never
+    resume another user's conversation. A miss reloads the latest turns from
+    the table; writes never block the request thread.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int,
+        load_turns: int,
+        tool_result_ttl_sec: float,
+        writer: Optional[BatchWriter] = None,
+    ) -> None:
+        self._max_sessions = max(1, max_sessions)
+        self._load_turns = max(0, load_turns)
+        self._tool_result_ttl_sec = tool_result_ttl_sec
+        self._writer = writer
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[tuple[int, str], ChatSession]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def Get(self, session_id: str, user_id: int) -> ChatSession:
+        key = (user_id, session_id)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                self._hits += 1
+                return session
+            self._misses += 1
+        loaded = ChatSession(session_id, user_id, self._LoadTurns(session_id, user_id))
+        with self._lock:
+            # Another request may have loaded it while we were reading the table.
+            session = self._sessions.setdefault(key, loaded)
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def LookupToolResult(
+        self, session: ChatSession, tool_name: str, args: dict[str, Any]
+    ) -> Optional[dict[str, Any]]:
+        return session.LookupToolResult(tool_name, args, self._tool_result_ttl_sec)
+
+    def BuildHistory(
+        self,
+        session: ChatSession,
+        budget_tokens: int,
+        estimate_tokens: Callable[[str], int],
+    ) -> tuple[list[dict[str, Any]], str]:
+        """Newest user/assistant turns that fit the budget, plus a summary of the rest.
+
+        Roughly a quarter of the budget is reserved for the summary.
+        """
+        with session.lock:
+            turns = list(session.turns)
+        summary_budget = budget_tokens // 4
+        remaining = budget_tokens - summary_budget
+        recent: list[tuple[int, ChatTurn]] = []
+        for index in range(len(turns) - 1, -1, -1):
+            turn = turns[index]
+            if turn.role == ROLE_TOOL:
+                continue
+            cost = estimate_tokens(turn.content)
+            if cost > remaining:
+                break
+            recent.append((index, turn))
+            remaining -= cost
+        recent.reverse()
+        # Chat templates expect the history to open with a user turn.
+        while recent and recent[0][1].role != ROLE_USER:
+            recent.pop(0)
+        cutoff = recent[0][0] if recent else len(turns)
+        messages = [{"role": turn.role, "content": turn.content} for _, turn in recent]
+        summary = _SummarizeTurns(turns[:cutoff], summary_budget, estimate_tokens)
+        return messages, summary
+
+    def RecordExchange(
+        self,
+        session: ChatSession,
+        user_content: str,
+        reply: str,
+        tool_calls: list[tuple[str, dict[str, Any], dict[str, Any]]],
+    ) -> None:
+        new_turns = [ChatTurn(ROLE_USER, user_content)]
+        for tool_name, args, result in tool_calls:
+            session.RememberToolResult(tool_name, args, result)
+            new_turns.append(
+                ChatTurn(
+                    ROLE_TOOL,
+                    EncodeJsonText({"name": tool_name, "args": args}),
+                    tool_name=tool_name,
+                    tool_args=args,
+                )
+            )
+        new_turns.append(ChatTurn(ROLE_ASSISTANT, reply))
+        with session.lock:
+            session.turns.extend(new_turns)
+            overflow = len(session.turns) - max(self._load_turns, len(new_turns))
+            if overflow > 0:
+                del session.turns[:overflow]
+        if self._writer is None:
+            return
+        created_at = datetime.now().replace(microsecond=0)
+        for turn in new_turns:
+            self._writer.Submit(
+                {
+                    "session_id": session.session_id,
+                    "user_id": session.user_id,
+                    "role": turn.role,
+                    "content": turn.content,
+                    "created_at": created_at,
+                }
+            )
+
+    def Flush(self, timeout_sec: float = 5.0) -> bool:
+        return self._writer.Flush(timeout_sec) if self._writer is not None else True
+
+    def Stop(self) -> None:
+        if self._writer is not None:
+            self._writer.Stop()
+
+    def Snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            snapshot: dict[str, Any] = {
+                "sessions": len(self._sessions),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+        if self._writer is not None:
+            snapshot["writer"] = self._writer.Snapshot()
+        return snapshot
+
+    def _LoadTurns(self, session_id: str, user_id: int) -> list[ChatTurn]:
+        if not self._load_turns:
+            return []
+        config = GetMysqlConfig()
+        dialect = GetDialect()
+        query = (
+            "SELECT role, content "
+            f"FROM {config.chat_table} "
+            "WHERE session_id = :session_id AND user_id = :user_id "
+            "AND role IN ('user', 'assistant', 'tool') "
+            f"ORDER BY chat_id DESC {dialect.Limit(':limit')}"
+        )
+        params = {"session_id": session_id, "user_id": user_id, "limit": self._load_turns}
+        try:
+            with MysqlConnection() as connection:
+                with connection.cursor() as cursor:
+                    ExecuteQuery(
+                        cursor, "chat_history", query, params, expected_rows=self._load_turns
+                    )
+                    rows = FetchAllDicts(cursor)
+        except DeadlineExceeded:
+            raise
+        except Exception as exc:
+            # History is best-effort: answer without it rather than fail the turn.
+            logger.warning("대화 기록 조회 실패 session_id=%s error=%s", session_id, exc)
+            CountEvent("chat_history_load_failed")
+            return []
+        turns: list[ChatTurn] = []
+        for row in reversed(rows):
+            role = str(row.get("role") or "")
+            content = str(row.get("content") or "")
+            if role == ROLE_TOOL:
+                try:
+                    record = DecodeJson(content)
+                except ValueError:
+                    continue
+                turns.append(
+                    ChatTurn(
+                        ROLE_TOOL,
+                        content,
+                        tool_name=record.get("name"),
+                        tool_args=record.get("args") or {},
+                    )
+                )
+            elif role in (ROLE_USER, ROLE_ASSISTANT):
+                turns.append(ChatTurn(role, content))
+        return turns
+
+
+def _WriteChatRows(rows: list[dict[str, Any]]) -> None:
+    config = GetMysqlConfig()
+    query = (
+        f"INSERT INTO {config.chat_table} "
+        "(session_id, user_id, role, content, created_at) "
+        "VALUES (:session_id, :user_id, :role, :content, :created_at)"
+    )
+    with MysqlConnection() as connection:
+        with connection.cursor() as cursor:
+            ExecuteMany(cursor, "chat_insert", query, rows)
+        connection.commit()
+
+
+@lru_cache(maxsize=1)
+def GetChatSessionStore() -> ChatSessionStore:
+    settings = GetSettings()
+    writer = BatchWriter(
+        "chat_history",
+        _WriteChatRows,
+        max_queue=settings.chat_write_queue_size,
+        batch_size=settings.chat_write_batch_size,
+        flush_interval_sec=settings.chat_write_flush_interval_sec,
+    )
+    return ChatSessionStore(
+        max_sessions=settings.chat_session_cache_size,
+        load_turns=settings.chat_session_load_turns,
+        tool_result_ttl_sec=settings.chat_tool_result_ttl_sec,
+        writer=writer,
+    )
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from functools import lru_cache
+import logging
+import math
+import random
+import threading
+import time
+from typing import Any
+
+from app.config.config import GetSettings
+from app.core.metrics import CountEvent
+
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_HALF_OPEN = "half_open"
+STATE_OPEN = "open"
+
+_STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+
+class BreakerOpen(Exception):
+    def __init__(self, retry_after_sec: int) -> None:
+        super().__init__("llm circuit open")
+        self.retry_after_sec = retry_after_sec
+
+
+class CircuitBreaker:
+    """Fails LLM work fast while the backend as a whole is unhealthy.
+
+    ``failure_threshold`` consecutive bad calls (transport error, 5xx, or
+    slower than ``slow_call_sec``) open the circuit for ``open_sec``; each
+    reopen without a full recovery doubles that, up to ``max_open_sec``.
+    After the wait the circuit is half-open: ``AllowTurn`` admits only
+    ``half_open_ratio`` of new turns, doubling the share after every
+    ``half_open_step_successes`` good calls until everything is admitted
+    and the circuit closes. One bad call while half-open reopens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        slow_call_sec: float,
+        open_sec: float,
+        max_open_sec: float,
+        half_open_ratio: float,
+        half_open_step_successes: int,
+    ) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._slow_call_sec = slow_call_sec
+        self._base_open_sec = max(0.1, open_sec)
+        self._max_open_sec = max(self._base_open_sec, max_open_sec)
+        self._initial_ratio = min(1.0, max(0.01, half_open_ratio))
+        self._step_successes = max(1, half_open_step_successes)
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._open_sec = self._base_open_sec
+        self._opened_at = 0.0
+        self._admit_ratio = 1.0
+        self._step_count = 0
+        self._opened = 0
+        self._rejected = 0
+
+    def _RetryAfter(self, now: float) -> int:
+        return max(1, math.ceil(self._opened_at + self._open_sec - now))
+
+    def _Transition(self, state: str) -> None:
+        logger.warning("LLM 차단기 상태 변경 %s -> %s", self._state, state)
+        self._state = state
+        CountEvent(f"llm_breaker_{state}")
+
+    def _Open(self, now: float) -> None:
+        if self._state == STATE_HALF_OPEN:
+            self._open_sec = min(self._max_open_sec, self._open_sec * 2)
+        self._opened_at = now
+        self._opened += 1
+        self._Transition(STATE_OPEN)
+
+    def _Refresh(self, now: float) -> None:
+        if self._state == STATE_OPEN and now - self._opened_at >= self._open_sec:
+            self._admit_ratio = self._initial_ratio
+            self._step_count = 0
+            self._Transition(STATE_HALF_OPEN)
+
+    def AllowTurn(self) -> None:
+        """Raises ``BreakerOpen`` unless a new turn may use the LLM now."""
+        now = time.monotonic()
+        with self._lock:
+            self._Refresh(now)
+            if self._state == STATE_CLOSED:
+                return
+            if self._state == STATE_HALF_OPEN and random.random() < self._admit_ratio:
+                return
+            self._rejected += 1
+            retry_after = self._RetryAfter(now) if self._state == STATE_OPEN else 1
+        CountEvent("llm_breaker_rejected")
+        raise BreakerOpen(retry_after)
+
+    def CheckCall(self) -> None:
+        """Raises ``BreakerOpen`` while open; turns already admitted keep going otherwise."""
+        now = time.monotonic()
+        with self._lock:
+            self._Refresh(now)
+            if self._state != STATE_OPEN:
+                return
+            self._rejected += 1
+            retry_after = self._RetryAfter(now)
+        raise BreakerOpen(retry_after)
+
+    def Record(self, ok: bool, elapsed_sec: float) -> None:
+        if ok and self._slow_call_sec > 0 and elapsed_sec > self._slow_call_sec:
+            CountEvent("llm_breaker_slow_call")
+            ok = False
+        now = time.monotonic()
+        with self._lock:
+            if not ok:
+                self._consecutive_failures += 1
+                if self._state == STATE_HALF_OPEN or (
+                    self._state == STATE_CLOSED
+                    and self._consecutive_failures >= self._failure_threshold
+                ):
+                    self._Open(now)
+                return
+            self._consecutive_failures = 0
+            if self._state != STATE_HALF_OPEN:
+                return
+            self._step_count += 1
+            if self._step_count < self._step_successes:
+                return
+            self._step_count = 0
+            self._admit_ratio = min(1.0, self._admit_ratio * 2)
+            if self._admit_ratio >= 1.0:
+                self._open_sec = self._base_open_sec
+                self._Transition(STATE_CLOSED)
+
+    def Snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._Refresh(now)
+            return {
+                "state": self._state,
+                "state_value": _STATE_VALUES[self._state],
+                "admit_ratio": 1.0 if self._state == STATE_CLOSED else (
+                    self._admit_ratio if self._state == STATE_HALF_OPEN else 0.0
+                ),
+                "consecutive_failures": self._consecutive_failures,
+                "open_sec": self._open_sec,
+                "retry_after_sec": self._RetryAfter(now) if self._state == STATE_OPEN else 0,
+                "opened": self._opened,
+                "rejected": self._rejected,
+            }
+
+
+@lru_cache(maxsize=1)
+def GetLlmCircuitBreaker() -> CircuitBreaker:
+    settings = GetSettings()
+    return CircuitBreaker(
+        failure_threshold=settings.llm_breaker_failures,
+        slow_call_sec=settings.llm_breaker_slow_call_sec,
+        open_sec=settings.llm_breaker_open_sec,
+        max_open_sec=settings.llm_breaker_max_open_sec,
+        half_open_ratio=settings.llm_breaker_half_open_ratio,
+        half_open_step_successes=settings.llm_breaker_half_open_step,
+    )
@@ -0,0 +1,507 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+import logging
+import os
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from app.core.deadline import CheckDeadline, DeadlineExceeded
+from app.core.metrics import CountEvent, ObserveStage, RecordStage
+
+
+logger = logging.getLogger(__name__)
+
+ROUTE_CURRENT = "current"
+ROUTE_STANDBY = "standby"
+
+# Oracle/python-oracledb errors that mean the session or the path to it is gone.
+_CONNECTION_LOST_CODES = (
+    "DPY-1001",
+    "DPY-4011",
+    "DPY-6000",
+    "DPY-6005",
+    "DPI-1080",
+    "ORA-03113",
+    "ORA-03114",
+    "ORA-03135",
+    "ORA-12170",
+    "ORA-12541",
+    "ORA-12547",
+)
+
+# Pool exhausted: no session came free within the acquire timeout.
+_POOL_EXHAUSTED_CODES = ("DPY-4005",)
+
+
+@dataclass(frozen=True)
+class BastionHost:
+    host: str
+    port: int
+
+    @property
+    def label(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+def ParseBastionHosts(hosts: list[str], default_host: str, default_port: int) -> list[BastionHost]:
+    """``BASTION_HOSTS`` entries (``host`` or ``host:port``), else the single ``BASTION_HOST``."""
+    parsed: list[BastionHost] = []
+    for entry in hosts or ([default_host] if default_host else []):
+        host, _, port = entry.strip().partition(":")
+        if host:
+            parsed.append(BastionHost(host, int(port) if port else default_port))
+    return parsed
+
+
+def ValidateBastionConfig(config: Any, bastions: list[BastionHost]) -> bool:
+    """Return whether a bastion is configured; raise if it is only half configured."""
+    if not (bastions or config.bastion_user or config.bastion_key_path):
+        return False
+    if not (bastions and config.bastion_user and config.bastion_key_path):
+        raise RuntimeError(
+            "Bastion settings are incomplete: BASTION_HOST/BASTION_USER/BASTION_KEY_PATH are required"
+        )
+    if not os.path.exists(config.bastion_key_path):
+        raise RuntimeError(f"BASTION_KEY_PATH does not exist: {config.bastion_key_path}")
+    if not os.path.isfile(config.bastion_key_path):
+        raise RuntimeError(f"BASTION_KEY_PATH is not a file: {config.bastion_key_path}")
+    if not os.access(config.bastion_key_path, os.R_OK):
+        raise RuntimeError(f"BASTION_KEY_PATH is not readable: {config.bastion_key_path}")
+    return True
+
+
+def StartTunnel(config: Any, bastion: BastionHost, keepalive_sec: float = 0.0) -> Any:
+    try:
+        from sshtunnel import SSHTunnelForwarder  # type: ignore
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("sshtunnel is required for bastion access") from exc
+
+    tunnel = SSHTunnelForwarder(
+        (bastion.host, bastion.port),
+        ssh_username=config.bastion_user,
+        ssh_pkey=config.bastion_key_path,
+        remote_bind_address=(config.host, config.port),
+        local_bind_address=("127.0.0.1", 0),
+        set_keepalive=keepalive_sec,
+    )
+    with ObserveStage("db_tunnel", bastion.host):
+        tunnel.start()
+    return tunnel
+
+
+def IsConnectionLost(exc: BaseException) -> bool:
+    text = str(exc)
+    return any(code in text for code in _CONNECTION_LOST_CODES)
+
+
+def IsPoolExhausted(exc: BaseException) -> bool:
+    text = str(exc)
+    return any(code in text for code in _POOL_EXHAUSTED_CODES)
+
+
+class _Route:
+    """One way to reach Oracle: an SSH tunnel (or none) plus the pool over it."""
+
+    def __init__(
+        self, generation: int, bastion: Optional[BastionHost], tunnel: Any, pool: Any
+    ) -> None:
+        self.generation = generation
+        self.bastion = bastion
+        self.tunnel = tunnel
+        self.pool = pool
+        self.started_at = time.monotonic()
+        self.leases = 0
+        self.failures = 0
+        self.retired = False
+
+    @property
+    def label(self) -> str:
+        return self.bastion.label if self.bastion is not None else "direct"
+
+    def TunnelActive(self) -> bool:
+        return self.tunnel is None or bool(getattr(self.tunnel, "is_active", True))
+
+    def Close(self) -> None:
+        try:
+            self.pool.close(force=True)
+        except Exception as exc:
+            logger.info("DB 풀 종료 실패 route=%s error=%s", self.label, exc)
+        if self.tunnel is not None:
+            try:
+                self.tunnel.stop()
+            except Exception as exc:
+                logger.info("DB 터널 종료 실패 route=%s error=%s", self.label, exc)
+
+
+class DbConnectionManager:
+    """Owns the SSH tunnels and Oracle session pools behind ``MysqlConnection``.
+
+    Borrowers lease the current route, take a pooled session and give both
+    back. A daemon thread pings the current route (and a warm standby route,
+    built on the next bastion host) every ``health_interval_sec``; after
+    ``rotate_after_failures`` failed pings or lost sessions the standby is
+    promoted, or a new route is built on the next host. Rotation only swaps
+    the pointer: borrowers holding the old route finish on it and the last
+    one out closes it.
+    """
+
+    def __init__(
+        self,
+        config: Any,
+        bastions: list[BastionHost],
+        pool_min: int,
+        pool_max: int,
+        acquire_timeout_sec: float,
+        connect_timeout_sec: float,
+        health_interval_sec: float,
+        rotate_after_failures: int,
+        standby: bool,
+        tunnel_keepalive_sec: float = 0.0,
+    ) -> None:
+        self._config = config
+        self._bastions = bastions
+        self._pool_min = max(0, pool_min)
+        self._pool_max = max(1, pool_max, self._pool_min)
+        self._acquire_timeout_sec = acquire_timeout_sec
+        self._connect_timeout_sec = connect_timeout_sec
+        self._health_interval_sec = health_interval_sec
+        self._rotate_after = max(1, rotate_after_failures)
+        self._standby_wanted = standby and bool(bastions)
+        self._tunnel_keepalive_sec = tunnel_keepalive_sec
+        self._lock = threading.Lock()
+        # Serializes route construction; borrowers never wait on it once a route exists.
+        self._build_lock = threading.Lock()
+        self._current: Optional[_Route] = None
+        self._standby: Optional[_Route] = None
+        self._generation = 0
+        self._bastion_index = 0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._acquisitions = 0
+        self._reconnects = 0
+        self._failovers = 0
+        self._ping_failures = 0
+        self._lost_sessions = 0
+
+    @contextmanager
+    def Connection(self) -> Iterator[Any]:
+        self.Start()
+        started = time.perf_counter()
+        route = self._Lease()
+        try:
+            CheckDeadline("db_acquire")
+            connection = route.pool.acquire()
+        except DeadlineExceeded:
+            self._Release(route)
+            raise
+        except Exception as exc:
+            self._Release(route)
+            # A full pool (DPY-4005) is back-pressure, not a broken route.
+            if IsConnectionLost(exc):
+                self.ReportFailure(route, exc)
+            raise
+        RecordStage("db_acquire", time.perf_counter() - started)
+        with self._lock:
+            self._acquisitions += 1
+        lost = False
+        try:
+            yield connection
+        except Exception as exc:
+            lost = IsConnectionLost(exc)
+            if lost:
+                self.ReportFailure(route, exc)
+            raise
+        finally:
+            try:
+                if lost:
+                    route.pool.drop(connection)
+                else:
+                    route.pool.release(connection)
+            except Exception as exc:
+                logger.info("DB 세션 반환 실패 route=%s error=%s", route.label, exc)
+            self._Release(route)
+
+    def ReportFailure(self, route: _Route, exc: BaseException) -> None:
+        """Count a failure against ``route``; the health thread rotates it if needed."""
+        logger.warning("DB 경로 오류 route=%s error=%s", route.label, exc)
+        CountEvent("db_session_lost")
+        with self._lock:
+            route.failures += 1
+            self._lost_sessions += 1
+            due = route is self._current and route.failures >= self._rotate_after
+        if due:
+            self._wake.set()
+
+    def Start(self) -> None:
+        if self._thread is not None or self._health_interval_sec <= 0:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._Run, name="db-lifecycle", daemon=True)
+            self._thread.start()
+
+    def Stop(self, timeout_sec: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout_sec)
+        with self._lock:
+            self._thread = None
+            routes = [route for route in (self._current, self._standby) if route is not None]
+            self._current = None
+            self._standby = None
+        for route in routes:
+            route.Close()
+
+    def Warm(self) -> None:
+        """Build the current (and standby) route now instead of on first use."""
+        self._Release(self._Lease())
+        if self._standby_wanted:
+            self._EnsureStandby()
+
+    def Snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            routes = {
+                role: route
+                for role, route in ((ROUTE_CURRENT, self._current), (ROUTE_STANDBY, self._standby))
+                if route is not None
+            }
+            snapshot: dict[str, Any] = {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "acquisitions": self._acquisitions,
+                "reconnects": self._reconnects,
+                "failovers": self._failovers,
+                "ping_failures": self._ping_failures,
+                "lost_sessions": self._lost_sessions,
+                "routes": {},
+            }
+            for role, route in routes.items():
+                snapshot["routes"][role] = {
+                    "bastion": route.label,
+                    "generation": route.generation,
+                    "uptime_sec": round(now - route.started_at, 1),
+                    "leases": route.leases,
+                    "failures": route.failures,
+                    "pool_open": _PoolStat(route.pool, "opened"),
+                    "pool_busy": _PoolStat(route.pool, "busy"),
+                }
+        return snapshot
+
+    def _Lease(self) -> _Route:
+        with self._lock:
+            route = self._current
+            if route is not None:
+                route.leases += 1
+                return route
+        with self._build_lock:
+            with self._lock:
+                route = self._current
+                if route is not None:
+                    route.leases += 1
+                    return route
+            route = self._BuildAny()
+            with self._lock:
+                self._current = route
+                route.leases += 1
+            return route
+
+    def _Release(self, route: _Route) -> None:
+        with self._lock:
+            route.leases -= 1
+            close = route.retired and route.leases <= 0
+        if close:
+            route.Close()
+
+    def _BuildAny(self) -> _Route:
+        """Build a route on the next bastion host, failing over through the list."""
+        if not self._bastions:
+            return self._BuildRoute(None)
+        last_error: Optional[BaseException] = None
+        for attempt in range(len(self._bastions)):
+            with self._lock:
+                bastion = self._bastions[self._bastion_index % len(self._bastions)]
+                self._bastion_index += 1
+            try:
+                return self._BuildRoute(bastion)
+            except Exception as exc:
+                last_error = exc
+                logger.warning("DB 터널 생성 실패 bastion=%s error=%s", bastion.label, exc)
+                if attempt + 1 < len(self._bastions):
+                    CountEvent("db_tunnel_failover")
+                    with self._lock:
+                        self._failovers += 1
+        assert last_error is not None
+        raise last_error
+
+    def _BuildRoute(self, bastion: Optional[BastionHost]) -> _Route:
+        try:
+            import oracledb  # type: ignore
+        except Exception as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("oracledb is required for Oracle access") from exc
+        tunnel = StartTunnel(self._config, bastion, self._tunnel_keepalive_sec) if bastion else None
+        try:
+            dsn = self._config.dsn
+            if tunnel is not None or not dsn:
+                host, port = (
+                    ("127.0.0.1", int(tunnel.local_bind_port))
+                    if tunnel is not None
+                    else (self._config.host, self._config.port)
+                )
+                dsn = oracledb.makedsn(host, port, service_name=self._config.service)
+            with ObserveStage("db_pool_create"):
+                pool = oracledb.create_pool(
+                    user=self._config.user,
+                    password=self._config.password,
+                    dsn=dsn,
+                    min=self._pool_min,
+                    max=self._pool_max,
+                    increment=1,
+                    getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                    wait_timeout=max(1, int(self._acquire_timeout_sec * 1000)),
+                    tcp_connect_timeout=self._connect_timeout_sec,
+                    # Sessions idle longer than this are pinged on acquire.
+                    ping_interval=max(1, int(self._health_interval_sec or 60)),
+                )
+        except BaseException:
+            if tunnel is not None:
+                tunnel.stop()
+            raise
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        route = _Route(generation, bastion, tunnel, pool)
+        logger.info("DB 경로 생성 route=%s generation=%s", route.label, generation)
+        return route
+
+    def _Ping(self, route: _Route) -> Optional[bool]:
+        """True/False for a healthy/broken route; None when the pool is too busy to probe."""
+        if not route.TunnelActive():
+            return False
+        # Every session is out serving queries: that is load, not a broken route.
+        if _PoolStat(route.pool, "busy") >= self._pool_max:
+            return None
+        try:
+            connection = route.pool.acquire()
+        except Exception as exc:
+            return None if IsPoolExhausted(exc) else False
+        try:
+            with ObserveStage("db_ping", route.label):
+                connection.ping()
+            route.pool.release(connection)
+            return True
+        except Exception:
+            try:
+                route.pool.drop(connection)
+            except Exception:
+                pass
+            return False
+
+    def _Rotate(self) -> None:
+        with self._build_lock:
+            with self._lock:
+                old = self._current
+                standby = self._standby
+                self._standby = None
+            new: Optional[_Route] = None
+            if standby is not None:
+                if self._Ping(standby) is True:
+                    new = standby
+                else:
+                    standby.Close()
+            if new is None:
+                try:
+                    new = self._BuildAny()
+                except Exception as exc:
+                    # Keep serving from the old route; the next check tries again.
+                    logger.warning("DB 경로 교체 실패 error=%s", exc)
+                    return
+            with self._lock:
+                self._current = new
+                self._reconnects += 1
+                close_old = False
+                if old is not None:
+                    old.retired = True
+                    close_old = old.leases <= 0
+        CountEvent("db_tunnel_reconnect")
+        logger.warning(
+            "DB 경로 교체 old=%s new=%s",
+            old.label if old is not None else None,
+            new.label,
+        )
+        if old is not None and close_old:
+            old.Close()
+
+    def _EnsureStandby(self) -> None:
+        with self._lock:
+            standby = self._standby
+        if standby is not None:
+            if self._Ping(standby) is not False:
+                return
+            with self._lock:
+                if self._standby is standby:
+                    self._standby = None
+                else:
+                    # Promoted or replaced meanwhile; it is not ours to close.
+                    standby = None
+            if standby is not None:
+                standby.Close()
+        # Check and assign under the build lock so Warm and the health thread
+        # cannot both build a standby and leak one of them.
+        with self._build_lock:
+            with self._lock:
+                if self._standby is not None:
+                    return
+            try:
+                route = self._BuildAny()
+            except Exception as exc:
+                logger.warning("DB 대기 경로 생성 실패 error=%s", exc)
+                return
+            with self._lock:
+                self._standby = route
+
+    def CheckHealth(self) -> None:
+        with self._lock:
+            current = self._current
+        if current is not None:
+            ok = self._Ping(current)
+            if ok is None:
+                CountEvent("db_ping_skipped")
+            with self._lock:
+                if ok:
+                    current.failures = 0
+                elif ok is False:
+                    current.failures += 1
+                    self._ping_failures += 1
+                due = current.failures >= self._rotate_after
+            if ok is False:
+                CountEvent("db_ping_failed")
+            if due:
+                self._Rotate()
+        if self._standby_wanted and current is not None:
+            self._EnsureStandby()
+
+    def _Run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._health_interval_sec)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.CheckHealth()
+            except Exception:  # pragma: no cover - keep the checker alive
+                logger.exception("DB 헬스체크 실패")
+
+
+def _PoolStat(pool: Any, name: str) -> int:
+    try:
+        return int(getattr(pool, name))
+    except Exception:
+        return 0
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import time
+from typing import Iterator, Optional
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, stage: str, remaining_sec: float) -> None:
+        super().__init__(f"deadline exceeded before {stage}")
+        self.stage = stage
+        self.remaining_sec = remaining_sec
+
+
+@dataclass(frozen=True)
+class Deadline:
+    expires_at: float
+
+    @classmethod
+    def After(cls, seconds: float) -> "Deadline":
+        return cls(expires_at=time.monotonic() + seconds)
+
+    def Remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def Check(self, stage: str, min_remaining_sec: float = 0.0) -> float:
+        remaining = self.Remaining()
+        if remaining <= min_remaining_sec:
+            raise DeadlineExceeded(stage, remaining)
+        return remaining
+
+    def TimeoutFor(self, stage: str, default_sec: float, min_remaining_sec: float = 0.0) -> float:
+        return min(default_sec, self.Check(stage, min_remaining_sec))
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def GetCurrentDeadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def BindDeadline(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def CheckDeadline(stage: str, min_remaining_sec: float = 0.0) -> None:
+    deadline = GetCurrentDeadline()
+    if deadline is not None:
+        deadline.Check(stage, min_remaining_sec)
+
+
+def RemainingTimeout(stage: str, default_sec: float, min_remaining_sec: float = 0.0) -> float:
+    """Timeout for a downstream call: the configured default capped by the deadline."""
+    deadline = GetCurrentDeadline()
+    if deadline is None:
+        return default_sec
+    return deadline.TimeoutFor(stage, default_sec, min_remaining_sec)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from functools import lru_cache
+import re
+import threading
+import time
+from typing import Any, Optional
+
+from app.config.config import GetSettings
+
+
+DEGRADED_FAQ = "faq"
+DEGRADED_TOOL = "tool"
+DEGRADED_BUSY = "busy"
+
+BUSY_MESSAGE = (
+    "현재 AI 상담 서버에 접속이 원활하지 않습니다. 잠시 후 다시 시도해 주세요."
+)
+_TOOL_NOTICE = "AI 답변 생성이 잠시 어려워 조회 결과를 그대로 안내해 드립니다."
+_MAX_REPLY_CHARS = 1500
+
+TOOL_LABELS = {
+    "get_user_profile": "회원 정보",
+    "get_payments": "결제 내역",
+    "get_rentals": "이용 내역",
+    "get_history_digest": "전체 이용 기록",
+    "get_pricing_summary": "요금 요약",
+    "get_usage_summary": "이용 요약",
+    "get_available_bikes": "대여 가능한 자전거",
+    "get_total_payments": "전체 결제 내역",
+    "get_total_usage": "사용 내역",
+}
+
+_FAQ_KEY_RE = re.compile(r"[\W_]+")
+
+
+def _FaqKey(content: str) -> str:
+    # "안전 수칙 알려줘!" and "안전수칙 알려줘" share an entry.
+    return _FAQ_KEY_RE.sub("", content.lower())
+
+
+def IsFaqQuestion(content: str, keywords: list[str]) -> bool:
+    """Whether ``content`` asks one of the allow-listed general questions."""
+    text = content.lower()
+    return any(keyword.lower() in text for keyword in keywords if keyword)
+
+
+class FaqReplyCache:
+    """Recent answers to allow-listed general questions, for use while the LLM is down.
+
+    Shared by every user, so callers must only ``Put`` replies that used no
+    session history, no user-specific prompt and no tool.
+    """
+
+    def __init__(self, max_entries: int, ttl_sec: float) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def Put(self, content: str, reply: str) -> None:
+        key = _FaqKey(content)
+        if not key or not reply.strip():
+            return
+        with self._lock:
+            self._entries[key] = (reply, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def Get(self, content: str) -> Optional[str]:
+        key = _FaqKey(content)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            reply, stored_at = entry
+            if self._ttl_sec > 0 and time.monotonic() - stored_at > self._ttl_sec:
+                del self._entries[key]
+                return None
+            return reply
+
+    def Snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self._max_entries}
+
+
+def _FormatValue(value: Any) -> str:
+    if isinstance(value, dict):
+        return ", ".join(f"{key}: {_FormatValue(item)}" for key, item in value.items())
+    if isinstance(value, list):
+        return f"{len(value)}건"
+    return "-" if value is None else str(value)
+
+
+def _Rows(data: Any) -> Optional[list[dict[str, Any]]]:
+    if isinstance(data, dict) and isinstance(data.get("columns"), list):
+        # TOOL_ROWS_FORMAT=compact: {"columns": [...], "rows": [[...], ...]}
+        columns = data["columns"]
+        return [dict(zip(columns, row)) for row in data.get("rows") or []]
+    if isinstance(data, list):
+        return [row if isinstance(row, dict) else {"value": row} for row in data]
+    for key in ("items", "rows"):
+        if isinstance(data, dict) and isinstance(data.get(key), list):
+            return _Rows(data[key])
+    return None
+
+
+def RenderToolResult(tool_name: str, result: dict[str, Any], max_rows: int) -> str:
+    """A plain-text answer built from a tool result, without the LLM."""
+    label = TOOL_LABELS.get(tool_name, tool_name)
+    data = result.get("data") if isinstance(result, dict) else result
+    lines = [_TOOL_NOTICE, f"[{label}]"]
+    rows = _Rows(data)
+    if rows is not None:
+        if not rows:
+            lines.append("조회된 내역이 없습니다.")
+        for row in rows[:max_rows]:
+            lines.append(f"- {_FormatValue(row)}")
+        if len(rows) > max_rows:
+            lines.append(f"외 {len(rows) - max_rows}건")
+    elif isinstance(data, dict):
+        lines.extend(f"- {key}: {_FormatValue(value)}" for key, value in data.items())
+    else:
+        lines.append(_FormatValue(data))
+    text = "\n".join(lines)
+    return text if len(text) <= _MAX_REPLY_CHARS else text[: _MAX_REPLY_CHARS - 3] + "..."
+
+
+@lru_cache(maxsize=1)
+def GetFaqReplyCache() -> FaqReplyCache:
+    settings = GetSettings()
+    return FaqReplyCache(settings.llm_faq_cache_size, settings.llm_faq_cache_ttl_sec)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from decimal import Decimal
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerator
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional accelerator
+    msgspec = None
+
+
+def _EncodeFallback(value: Any) -> Any:
+    # Oracle NUMBER columns come back as Decimal when fetch_decimals is on;
+    # keep them numeric instead of stringifying.
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode("utf-8", errors="replace")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+if orjson is not None:
+    ENCODER_NAME = "orjson"
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def EncodeJson(data: Any) -> bytes:
+        return orjson.dumps(data, default=_EncodeFallback, option=_ORJSON_OPTIONS)
+
+    def DecodeJson(raw: Union[bytes, str]) -> Any:
+        return orjson.loads(raw)
+
+elif msgspec is not None:
+    ENCODER_NAME = "msgspec"
+    _MSGSPEC_ENCODER = msgspec.json.Encoder(
+        enc_hook=_EncodeFallback, decimal_format="number"
+    )
+
+    def EncodeJson(data: Any) -> bytes:
+        return _MSGSPEC_ENCODER.encode(data)
+
+    def DecodeJson(raw: Union[bytes, str]) -> Any:
+        try:
+            return msgspec.json.decode(raw)
+        except msgspec.DecodeError as exc:
+            raise ValueError(str(exc)) from exc
+
+else:
+    ENCODER_NAME = "json"
+
+    def EncodeJson(data: Any) -> bytes:
+        return json.dumps(
+            data, ensure_ascii=False, separators=(",", ":"), default=_EncodeFallback
+        ).encode("utf-8")
+
+    def DecodeJson(raw: Union[bytes, str]) -> Any:
+        return json.loads(raw)
+
+
+def EncodeJsonText(data: Any) -> str:
+    return EncodeJson(data).decode("utf-8")
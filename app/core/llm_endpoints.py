@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import itertools
+import logging
+import re
+import threading
+from typing import Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_LEAST_OUTSTANDING = "least_outstanding"
+STRATEGY_QUEUE_DEPTH = "queue_depth"
+
+_QUEUE_METRIC_PATTERN = re.compile(
+    r"^vllm:(num_requests_waiting|num_requests_running)(?:\{[^}]*\})?\s+([0-9.eE+-]+)",
+    re.MULTILINE,
+)
+
+
+def _RootUrl(base_url: str) -> str:
+    if base_url.endswith("/v1"):
+        return base_url[: -len("/v1")]
+    return base_url
+
+
+def _ParseQueueDepth(body: str) -> Optional[float]:
+    if not body:
+        return None
+    total = 0.0
+    found = False
+    for match in _QUEUE_METRIC_PATTERN.finditer(body):
+        try:
+            total += float(match.group(2))
+        except ValueError:
+            continue
+        found = True
+    return total if found else None
+
+
+@dataclass
+class LlmEndpoint:
+    base_url: str
+    session: requests.Session = field(default_factory=requests.Session, repr=False)
+    outstanding: int = 0
+    queue_depth: float = 0.0
+    healthy: bool = True
+    consecutive_failures: int = 0
+    consecutive_successes: int = 0
+
+    @property
+    def root_url(self) -> str:
+        return _RootUrl(self.base_url)
+
+
+class LlmEndpointPool:
+    """Client-side balancer over one or more vLLM replicas.
+
+    Endpoints are ejected after ``eject_after_failures`` consecutive failed
+    health checks or requests and re-admitted after ``readmit_after_successes``
+    consecutive good health checks.
+    """
+
+    def __init__(
+        self,
+        base_urls: list[str],
+        strategy: str = STRATEGY_LEAST_OUTSTANDING,
+        health_check_interval_sec: float = 10.0,
+        health_check_timeout_sec: float = 2.0,
+        eject_after_failures: int = 3,
+        readmit_after_successes: int = 2,
+        http_pool_size: int = 0,
+    ) -> None:
+        if not base_urls:
+            raise RuntimeError("At least one LLM endpoint is required")
+        self.endpoints = [LlmEndpoint(base_url=url) for url in base_urls]
+        if http_pool_size > 0:
+            for endpoint in self.endpoints:
+                # One host per session; keep enough sockets for every concurrent call.
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=http_pool_size)
+                endpoint.session.mount("http://", adapter)
+                endpoint.session.mount("https://", adapter)
+        self._strategy = strategy
+        self._interval = health_check_interval_sec
+        self._timeout = health_check_timeout_sec
+        self._eject_after = max(1, eject_after_failures)
+        self._readmit_after = max(1, readmit_after_successes)
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _Score(self, endpoint: LlmEndpoint) -> float:
+        if self._strategy == STRATEGY_QUEUE_DEPTH:
+            return endpoint.queue_depth + endpoint.outstanding
+        return float(endpoint.outstanding)
+
+    def Pick(self) -> LlmEndpoint:
+        with self._lock:
+            candidates = [ep for ep in self.endpoints if ep.healthy]
+            if not candidates:
+                # Everything is ejected: keep serving from the least broken replica.
+                candidates = sorted(self.endpoints, key=lambda ep: ep.consecutive_failures)[:1]
+            offset = next(self._round_robin) % len(candidates)
+            rotated = candidates[offset:] + candidates[:offset]
+            return min(rotated, key=self._Score)
+
+    @contextmanager
+    def Track(self, endpoint: LlmEndpoint) -> Iterator[LlmEndpoint]:
+        with self._lock:
+            endpoint.outstanding += 1
+        try:
+            yield endpoint
+        except requests.RequestException:
+            self.RecordResult(endpoint, ok=False)
+            raise
+        finally:
+            with self._lock:
+                endpoint.outstanding -= 1
+
+    def RecordResult(self, endpoint: LlmEndpoint, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                endpoint.consecutive_failures = 0
+                endpoint.consecutive_successes += 1
+                if not endpoint.healthy and endpoint.consecutive_successes >= self._readmit_after:
+                    endpoint.healthy = True
+                    logger.info("LLM 엔드포인트 복귀 url=%s", endpoint.base_url)
+                return
+            endpoint.consecutive_successes = 0
+            endpoint.consecutive_failures += 1
+            if endpoint.healthy and endpoint.consecutive_failures >= self._eject_after:
+                endpoint.healthy = False
+                logger.warning(
+                    "LLM 엔드포인트 제외 url=%s failures=%s",
+                    endpoint.base_url,
+                    endpoint.consecutive_failures,
+                )
+
+    def _CheckEndpoint(self, endpoint: LlmEndpoint) -> None:
+        try:
+            response = endpoint.session.get(
+                f"{endpoint.root_url}/health", timeout=self._timeout
+            )
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        self.RecordResult(endpoint, ok=ok)
+        if not ok or self._strategy != STRATEGY_QUEUE_DEPTH:
+            return
+        try:
+            response = endpoint.session.get(
+                f"{endpoint.root_url}/metrics", timeout=self._timeout
+            )
+        except requests.RequestException:
+            return
+        depth = _ParseQueueDepth(response.text) if response.ok else None
+        if depth is not None:
+            with self._lock:
+                endpoint.queue_depth = depth
+
+    def CheckHealth(self) -> None:
+        for endpoint in self.endpoints:
+            self._CheckEndpoint(endpoint)
+
+    def _Run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.CheckHealth()
+            except Exception:  # pragma: no cover - keep the checker alive
+                logger.exception("LLM 헬스체크 실패")
+
+    def Start(self) -> None:
+        if self._interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._Run, name="llm-health-check", daemon=True
+        )
+        self._thread.start()
+
+    def Stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._timeout + 1)
+            self._thread = None
+
+    def Snapshot(self) -> list[dict[str, object]]:
+        with self._lock:
+            return [
+                {
+                    "base_url": ep.base_url,
+                    "healthy": ep.healthy,
+                    "outstanding": ep.outstanding,
+                    "queue_depth": ep.queue_depth,
+                    "consecutive_failures": ep.consecutive_failures,
+                }
+                for ep in self.endpoints
+            ]
@@ -2,14 +2,43 @@ from __future__ import annotations
 
 import json
 import logging
+import math
 import re
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from functools import lru_cache
 from typing import Any, Callable, Optional
 
 import requests
 
-from app.config.config import GetSettings
+from app.config.config import GetSettings, Settings
+from app.core.admission import (
+    PRIORITY_IN_PROGRESS,
+    PRIORITY_NORMAL,
+    PRIORITY_SHORT,
+    GetAdmissionController,
+)
+from app.core.audit_log import GetAuditLog
+from app.core.backend_capability import BackendCapability, GetBackendCapabilityCache
+from app.core.chat_sessions import ChatSession, GetChatSessionStore
+from app.core.circuit_breaker import GetLlmCircuitBreaker
+from app.core.deadline import Deadline, DeadlineExceeded, GetCurrentDeadline
+from app.core.degraded import (
+    BUSY_MESSAGE,
+    DEGRADED_BUSY,
+    DEGRADED_FAQ,
+    DEGRADED_TOOL,
+    GetFaqReplyCache,
+    IsFaqQuestion,
+    RenderToolResult,
+)
+from app.core.json_codec import DecodeJson, EncodeJson, EncodeJsonText
+from app.core.llm_endpoints import LlmEndpoint, LlmEndpointPool
+from app.core.metrics import CountEvent, ObserveStage, RecordLlmUsage, RecordStage
+from app.core.speculation import GetToolSpeculator, SpeculativeToolCall
+from app.core.structured_log import SAMPLED_LOGGER_SUFFIX, TruncateForLog
+from app.core.traffic_record import CurrentRecording, GetTrafficRecorder
 from app.schemas import LlmMessage
 
 
@@ -22,10 +51,12 @@ SYSTEM_PROMPT = (
 )
 
 logger = logging.getLogger(__name__)
+# Per-call lines; only LOG_SAMPLE_RATE of requests keep them.
+call_logger = logging.getLogger(__name__ + SAMPLED_LOGGER_SUFFIX)
 
 
 def _AsJson(data: Any) -> str:
-    return json.dumps(data, ensure_ascii=False, indent=2, default=str)
+    return EncodeJsonText(data)
 
 
 def _EstimateTokens(text: str) -> int:
@@ -72,6 +103,14 @@ def _ParseContextLimitFromError(body: str) -> Optional[tuple[int, int]]:
     return int(match.group(1)), int(match.group(2))
 
 
+_TOOL_REJECTION_RE = re.compile(r"tool[_ ]?choice|tool[_ ]?call|\btools?\b", re.IGNORECASE)
+
+
+def _RejectsToolCalling(body: str) -> bool:
+    """Whether a 400 body blames tools; anything else is this request's problem."""
+    return bool(body) and _TOOL_REJECTION_RE.search(body) is not None
+
+
 def _ParseToolCallsFromContent(content: str) -> list[dict[str, Any]]:
     if not content:
         return []
@@ -110,13 +149,17 @@ def _ParseToolCallArgs(raw_args: Any) -> dict[str, Any]:
         return {}
 
 
-def _ExtractPeriodFromMessage(content: str) -> Optional[str]:
+def ExtractPeriodFromMessage(content: str) -> Optional[str]:
     if not content:
         return None
     text = content.strip()
     if re.search(r"\bthis_month\b|이번\s*달|이번달", text, re.IGNORECASE):
         now = datetime.utcnow()
         return f"{now.year:04d}-{now.month:02d}"
+    if re.search(r"\blast_month\b|지난\s*달|저번\s*달|전월", text, re.IGNORECASE):
+        now = datetime.utcnow()
+        year, month = (now.year, now.month - 1) if now.month > 1 else (now.year - 1, 12)
+        return f"{year:04d}-{month:02d}"
     year_match = re.search(r"(\d{4})", text)
     month_match = re.search(r"(\d{1,2})\s*월", text)
     if month_match:
@@ -133,6 +176,16 @@ def _ExtractPeriodFromMessage(content: str) -> Optional[str]:
     return None
 
 
+_FOLLOW_UP_PATTERN = re.compile(
+    r"^(그럼|그러면|그건|그거|그리고|또|이번엔|저번엔|지난번엔)|(은|는|도)\s*\??$"
+)
+
+
+def _IsFollowUpMessage(content: str) -> bool:
+    text = (content or "").strip()
+    return 0 < len(text) <= 30 and bool(_FOLLOW_UP_PATTERN.search(text))
+
+
 def _PreferTotalUsageTool(tool_calls: list[dict[str, Any]], user_message: str) -> None:
     if not tool_calls or not user_message:
         return
@@ -148,7 +201,7 @@ def _PreferTotalUsageTool(tool_calls: list[dict[str, Any]], user_message: str) -
 def _InjectPeriodIfMissing(tool_calls: list[dict[str, Any]], user_message: str) -> None:
     if not tool_calls:
         return
-    period_hint = _ExtractPeriodFromMessage(user_message)
+    period_hint = ExtractPeriodFromMessage(user_message)
     if not period_hint:
         return
     for tool_call in tool_calls:
@@ -159,6 +212,7 @@ def _InjectPeriodIfMissing(tool_calls: list[dict[str, Any]], user_message: str)
             "get_usage_summary",
             "get_total_payments",
             "get_total_usage",
+            "get_history_digest",
         }:
             continue
         args = _ParseToolCallArgs(function.get("arguments"))
@@ -168,7 +222,7 @@ def _InjectPeriodIfMissing(tool_calls: list[dict[str, Any]], user_message: str)
         function["arguments"] = json.dumps(args, ensure_ascii=False)
 
 
-def _InferToolFromUserMessage(
+def InferToolFromUserMessage(
     content: str, tool_keywords_map: dict[str, list[str]]
 ) -> Optional[str]:
     if not content:
@@ -195,6 +249,7 @@ def _BuildForcedToolCall(tool_name: str, user_id: int) -> dict[str, Any]:
         "get_usage_summary",
         "get_total_payments",
         "get_total_usage",
+        "get_history_digest",
     }:
         args["user_id"] = str(user_id)
     return {
@@ -208,14 +263,19 @@ def _BuildForcedToolCall(tool_name: str, user_id: int) -> dict[str, Any]:
 
 
 def BuildSystemContext(message: LlmMessage) -> str:
+    return BuildSystemContextForUser(message.user_id)
+
+
+def BuildSystemContextForUser(user_id: int) -> str:
     return (
         f"{SYSTEM_PROMPT}\n"
-        f"UserId: {message.user_id}\n"
+        f"UserId: {user_id}\n"
         "Locale: ko\n"
         "필요한 정보가 있으면 적절한 도구를 호출하세요.\n"
         "사용자 정보/프로필 요청: get_user_profile 호출.\n"
         "결제 내역 요청: get_payments 호출.\n"
-        "이용 내역 요청: get_rentals 호출.\n"
+        "이용 내역 요청: get_rentals 호출. next_cursor가 있으면 다음 페이지가 있다.\n"
+        "전체/누적 이용 기록, 통계 요청: get_history_digest 호출.\n"
         "요금 요약 요청: get_pricing_summary 호출.\n"
         "이용 요약 요청: get_usage_summary 호출.\n"
         "자전거 목록 요청: get_available_bikes 호출.\n"
@@ -225,6 +285,16 @@ def BuildSystemContext(message: LlmMessage) -> str:
     )
 
 
+# Largest page each list tool returns; ExecuteTool clamps to the same bounds.
+TOOL_LIMIT_MAX = {
+    "get_available_bikes": 10,
+    "get_payments": 20,
+    "get_rentals": 20,
+}
+
+_CURSOR_DESCRIPTION = "이전 결과의 next_cursor 값. 넣으면 그보다 오래된 다음 페이지를 조회한다."
+
+
 def BuildToolSchema() -> list[dict[str, Any]]:
     return [
         {
@@ -235,7 +305,11 @@ def BuildToolSchema() -> list[dict[str, Any]]:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "limit": {"type": "integer", "minimum": 1, "maximum": 10},
+                        "limit": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "maximum": TOOL_LIMIT_MAX["get_available_bikes"],
+                        },
                     },
                 },
             },
@@ -244,12 +318,17 @@ def BuildToolSchema() -> list[dict[str, Any]]:
             "type": "function",
             "function": {
                 "name": "get_payments",
-                "description": "사용자의 결제 내역을 조회한다.",
+                "description": "사용자의 결제 내역을 최신순으로 한 페이지씩 조회한다.",
                 "parameters": {
                     "type": "object",
                     "properties": {
                         "user_id": {"type": "string"},
-                        "limit": {"type": "integer", "minimum": 1, "maximum": 10},
+                        "limit": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "maximum": TOOL_LIMIT_MAX["get_payments"],
+                        },
+                        "cursor": {"type": "integer", "description": _CURSOR_DESCRIPTION},
                     },
                     "required": ["user_id"],
                 },
@@ -259,12 +338,35 @@ def BuildToolSchema() -> list[dict[str, Any]]:
             "type": "function",
             "function": {
                 "name": "get_rentals",
-                "description": "사용자의 이용 내역을 조회한다.",
+                "description": "사용자의 이용 내역을 최신순으로 한 페이지씩 조회한다.",
                 "parameters": {
                     "type": "object",
                     "properties": {
                         "user_id": {"type": "string"},
-                        "limit": {"type": "integer", "minimum": 1, "maximum": 100},
+                        "limit": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "maximum": TOOL_LIMIT_MAX["get_rentals"],
+                        },
+                        "cursor": {"type": "integer", "description": _CURSOR_DESCRIPTION},
+                    },
+                    "required": ["user_id"],
+                },
+            },
+        },
+        {
+            "type": "function",
+            "function": {
+                "name": "get_history_digest",
+                "description": (
+                    "사용자의 전체(또는 특정 월) 이용/결제 기록 통계를 조회한다. "
+                    "횟수, 합계, 거리/시간 분포, 자주 탄 자전거를 포함한다."
+                ),
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "user_id": {"type": "string"},
+                        "period": {"type": "string"},
                     },
                     "required": ["user_id"],
                 },
@@ -345,12 +447,242 @@ def BuildToolSchema() -> list[dict[str, Any]]:
     ]
 
 
+TOOL_SELECTION_NATIVE = "native"
+TOOL_SELECTION_GUIDED = "guided"
+
+
+def BuildToolSelectionSchema(tools: list[dict[str, Any]]) -> dict[str, Any]:
+    """JSON Schema whose instances are exactly ``{"name": <tool>, "arguments": {...}}``."""
+    return {
+        "anyOf": [
+            {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "enum": [function["name"]]},
+                    "arguments": function.get("parameters") or {"type": "object"},
+                },
+                "required": ["name", "arguments"],
+                "additionalProperties": False,
+            }
+            for function in (tool.get("function") or {} for tool in tools)
+            if function.get("name")
+        ]
+    }
+
+
+def _BuildToolSelectionMessages(
+    messages: list[dict[str, Any]], tools: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    # The hint goes on the last user turn so the system prompt and history
+    # stay a shared prefix with the answer call.
+    catalog = "\n".join(
+        f"- {function.get('name')}: {function.get('description', '')}"
+        for function in (tool.get("function") or {} for tool in tools)
+    )
+    last = messages[-1]
+    hint = (
+        f"{last.get('content') or ''}\n\n"
+        "아래 도구 중 하나를 골라 {\"name\": ..., \"arguments\": {...}} JSON으로만 답하세요.\n"
+        f"{catalog}"
+    )
+    return messages[:-1] + [{**last, "content": hint}]
+
+
+def _ParseToolSelection(content: str) -> list[dict[str, Any]]:
+    try:
+        selection = DecodeJson(content.strip())
+    except ValueError:
+        return []
+    if not isinstance(selection, dict) or not selection.get("name"):
+        return []
+    arguments = selection.get("arguments")
+    return [
+        {
+            "id": "guided_tool_call_0",
+            "type": "function",
+            "function": {
+                "name": str(selection["name"]),
+                "arguments": json.dumps(
+                    arguments if isinstance(arguments, dict) else {}, ensure_ascii=False
+                ),
+            },
+        }
+    ]
+
+
+def _ReadChatStream(
+    response: requests.Response,
+    on_token: Optional[Callable[[str], None]],
+    deadline: Optional[Deadline],
+) -> dict[str, Any]:
+    """Fold an SSE chat stream into the body shape of a non-streamed completion."""
+    started = time.perf_counter()
+    content_parts: list[str] = []
+    tool_calls: dict[int, dict[str, Any]] = {}
+    finish_reason: Optional[str] = None
+    usage: Optional[dict[str, Any]] = None
+    try:
+        for raw_line in response.iter_lines():
+            if not raw_line or not raw_line.startswith(b"data:"):
+                continue
+            data = raw_line[5:].strip()
+            if data == b"[DONE]":
+                break
+            try:
+                chunk = DecodeJson(data)
+            except ValueError:
+                continue
+            usage = chunk.get("usage") or usage
+            for choice in chunk.get("choices") or []:
+                delta = choice.get("delta") or {}
+                text = delta.get("content")
+                if text:
+                    if not content_parts:
+                        RecordStage("llm_first_token", time.perf_counter() - started)
+                    content_parts.append(text)
+                    if on_token is not None:
+                        on_token(text)
+                for call in delta.get("tool_calls") or []:
+                    entry = tool_calls.setdefault(
+                        call.get("index", 0),
+                        {"id": None, "type": "function", "function": {"name": "", "arguments": ""}},
+                    )
+                    if call.get("id"):
+                        entry["id"] = call["id"]
+                    function = call.get("function") or {}
+                    entry["function"]["name"] += function.get("name") or ""
+                    entry["function"]["arguments"] += function.get("arguments") or ""
+                finish_reason = choice.get("finish_reason") or finish_reason
+            if deadline is not None and deadline.Remaining() <= 0 and finish_reason is None:
+                # Keep what was streamed so far; the caller stops continuing.
+                CountEvent("stream_deadline_cut")
+                finish_reason = "deadline"
+                break
+    finally:
+        response.close()
+    message: dict[str, Any] = {"role": "assistant", "content": "".join(content_parts) or None}
+    if tool_calls:
+        message["tool_calls"] = [tool_calls[index] for index in sorted(tool_calls)]
+    return {
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": usage,
+    }
+
+
+_TOOL_CALL_TAG = "<tool_call>"
+
+
+class _ToolCallTokenGate:
+    """Relay streamed tokens, holding back anything that may open a ``<tool_call>`` block.
+
+    A completion sent without tool schemas can still carry a tool call as content;
+    that text must never reach the client, so the gate drops everything from the
+    tag on and only releases a held partial tag once the stream ends without one.
+    """
+
+    def __init__(self, on_token: Callable[[str], None]) -> None:
+        self._on_token = on_token
+        self._held = ""
+        self._blocked = False
+
+    def Feed(self, text: str) -> None:
+        if self._blocked:
+            return
+        self._held += text
+        tag_at = self._held.find(_TOOL_CALL_TAG)
+        if tag_at >= 0:
+            self._blocked = True
+            self._Emit(self._held[:tag_at])
+            self._held = ""
+            return
+        # Keep the longest suffix that is still a prefix of the tag.
+        keep = 0
+        for size in range(min(len(self._held), len(_TOOL_CALL_TAG) - 1), 0, -1):
+            if _TOOL_CALL_TAG.startswith(self._held[-size:]):
+                keep = size
+                break
+        self._Emit(self._held[: len(self._held) - keep])
+        self._held = self._held[len(self._held) - keep :]
+
+    def Flush(self) -> None:
+        if not self._blocked:
+            self._Emit(self._held)
+        self._held = ""
+
+    def _Emit(self, text: str) -> None:
+        if text:
+            self._on_token(text)
+
+
+@dataclass
+class _ChatResult:
+    """One chat completion call; streamed calls carry the completion folded from the stream."""
+
+    response: requests.Response
+    folded: Optional[dict[str, Any]] = None
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    def Body(self) -> dict[str, Any]:
+        if self.folded is not None:
+            return self.folded
+        return DecodeJson(self.response.content)
+
+
+@dataclass
+class LlmTurn:
+    """State shared by every LLM call made for one user turn."""
+
+    endpoint: LlmEndpoint
+    priority: int = PRIORITY_NORMAL
+    calls: int = 0
+    deadline: Optional[Deadline] = None
+    # Fair-queuing key for admission; empty for calls not made for a user.
+    user_key: str = ""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def AddUsage(self, usage: Any) -> None:
+        if not isinstance(usage, dict):
+            return
+        self.prompt_tokens += int(usage.get("prompt_tokens") or 0)
+        self.completion_tokens += int(usage.get("completion_tokens") or 0)
+
+
+@dataclass
+class _ReplyTrace:
+    """What one assistant reply did; feeds session history and the audit log."""
+
+    turn: Optional[LlmTurn] = None
+    inferred_tool: Optional[str] = None
+    tools: list[tuple[str, dict[str, Any], dict[str, Any]]] = field(default_factory=list)
+    reused_tools: int = 0
+    # native / guided / content / forced; None when no tool was selected.
+    tool_selection: Optional[str] = None
+    speculation: Optional[SpeculativeToolCall] = None
+
+
 class LLMService:
-    def __init__(self) -> None:
-        settings = GetSettings()
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        settings = settings or GetSettings()
         self._settings = settings
         self.model_id = settings.model_id
-        self._base_url = self._normalize_base_url(settings.llm_base_url)
+        base_urls = settings.llm_base_urls or [settings.llm_base_url]
+        self._pool = LlmEndpointPool(
+            [self._normalize_base_url(url) for url in base_urls],
+            strategy=settings.llm_balance_strategy,
+            health_check_interval_sec=settings.llm_health_check_interval_sec,
+            eject_after_failures=settings.llm_eject_after_failures,
+            readmit_after_successes=settings.llm_readmit_after_successes,
+            http_pool_size=settings.llm_http_pool_size,
+        )
+        if len(self._pool.endpoints) > 1:
+            self._pool.Start()
+        self._capabilities = GetBackendCapabilityCache()
+        self._admission = GetAdmissionController()
+        self._breaker = GetLlmCircuitBreaker() if settings.llm_breaker_enabled else None
 
     def _normalize_base_url(self, base_url: str) -> str:
         base_url = base_url.rstrip("/")
@@ -358,30 +690,88 @@ class LLMService:
             base_url = f"{base_url}/v1"
         return base_url
 
-    def _fetch_first_model_id(self) -> Optional[str]:
-        url = f"{self._base_url}/models"
-        response = requests.get(url, timeout=self._settings.llm_timeout_sec)
+    def _fetch_model_ids(self, turn: LlmTurn) -> list[str]:
+        url = f"{turn.endpoint.base_url}/models"
+        response = turn.endpoint.session.get(
+            url, timeout=self._CallTimeout(turn, "llm_models")
+        )
         response.raise_for_status()
         data: dict[str, Any] = response.json()
-        models = data.get("data") or []
-        if not models:
-            return None
-        return models[0].get("id")
+        return [model.get("id") for model in data.get("data") or [] if model.get("id")]
+
+    def _fetch_first_model_id(self, turn: LlmTurn) -> Optional[str]:
+        models = self._fetch_model_ids(turn)
+        return models[0] if models else None
+
+    def Warm(self) -> dict[str, str]:
+        """Open a keep-alive connection to every replica and resolve its model id.
+
+        Returns the model id each replica will be sent, keyed by base URL.
+        """
+        served: dict[str, str] = {}
+        for endpoint in self._pool.endpoints:
+            turn = LlmTurn(endpoint=endpoint, deadline=GetCurrentDeadline())
+            with ObserveStage("warmup", "llm_models"):
+                models = self._fetch_model_ids(turn)
+            model_id = self._capabilities.Get(endpoint.base_url).model_id or self.model_id
+            if models and model_id not in models:
+                # Same substitution a 404 would trigger, done before the first request.
+                model_id = models[0]
+                self._capabilities.RecordModelId(endpoint.base_url, model_id)
+                logger.warning("LLM 모델 대체 url=%s model=%s", endpoint.base_url, model_id)
+            served[endpoint.base_url] = model_id
+        return served
+
+    def EndpointSnapshot(self) -> list[dict[str, Any]]:
+        return self._pool.Snapshot()
+
+    def BreakerSnapshot(self) -> Optional[dict[str, Any]]:
+        return self._breaker.Snapshot() if self._breaker is not None else None
+
+    def StartTurn(self, priority: int = PRIORITY_NORMAL, user_key: str = "") -> LlmTurn:
+        return LlmTurn(
+            endpoint=self._pool.Pick(),
+            priority=priority,
+            deadline=GetCurrentDeadline(),
+            user_key=user_key,
+        )
+
+    def _CallTimeout(self, turn: LlmTurn, stage: str) -> float:
+        if turn.deadline is None:
+            return self._settings.llm_timeout_sec
+        return turn.deadline.TimeoutFor(
+            stage,
+            self._settings.llm_timeout_sec,
+            self._settings.llm_min_call_budget_sec,
+        )
 
     def _PostChatMessage(
         self,
         messages: list[dict[str, Any]],
         tools: Optional[list[dict[str, Any]]] = None,
+        turn: Optional[LlmTurn] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        overrides: Optional[dict[str, Any]] = None,
     ) -> dict[str, Any]:
-        url = f"{self._base_url}/chat/completions"
-        input_tokens = _EstimatePayloadTokens(messages, tools)
+        turn = turn or self.StartTurn()
+        endpoint = turn.endpoint
+        url = f"{endpoint.base_url}/chat/completions"
+        capability = self._capabilities.Get(endpoint.base_url)
+        if tools and capability.tools_supported is False:
+            call_logger.info("도구 호출 미지원 백엔드: 도구 없이 요청")
+            tools = None
+        model_id = capability.model_id or self.model_id
+        max_model_len = capability.max_context or self._settings.max_model_len
+        input_tokens = math.ceil(
+            _EstimatePayloadTokens(messages, tools) * (capability.token_ratio or 1.0)
+        )
         max_tokens = _ClampMaxTokens(
             self._settings.max_tokens,
-            self._settings.max_model_len,
+            max_model_len,
             input_tokens,
         )
         payload: dict[str, Any] = {
-            "model": self.model_id,
+            "model": model_id,
             "messages": messages,
             "temperature": self._settings.temperature,
             "top_p": self._settings.top_p,
@@ -390,35 +780,97 @@ class LLMService:
         if tools:
             payload["tools"] = tools
             payload["tool_choice"] = "auto"
+        if on_token is not None:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        if overrides:
+            payload.update(overrides)
         headers = {"Authorization": f"Bearer {self._settings.llm_api_key}"}
-        logger.info(
-            "LLM 요청 시작 url=%s model=%s messages=%s tools=%s",
-            url,
-            payload.get("model"),
-            len(messages),
-            [tool.get("function", {}).get("name") for tool in (tools or [])],
-        )
-        logger.info(
-            "LLM 토큰 계산 input_est=%s max_tokens=%s",
-            input_tokens,
-            payload.get("max_tokens"),
-        )
-        response = self._PostRequest(url, payload, headers)
-        if response.status_code == 404:
-            fallback_model_id = self._fetch_first_model_id()
+        if call_logger.isEnabledFor(logging.INFO):
+            call_logger.info(
+                "LLM 요청 시작 url=%s model=%s messages=%s tools=%s input_est=%s max_tokens=%s",
+                url,
+                payload.get("model"),
+                len(messages),
+                [tool.get("function", {}).get("name") for tool in (tools or [])],
+                input_tokens,
+                payload.get("max_tokens"),
+            )
+        priority = PRIORITY_IN_PROGRESS if turn.calls else turn.priority
+        turn.calls += 1
+        queue_budget = self._CallTimeout(turn, "llm_admission")
+        with self._admission.Admit(
+            priority, timeout_sec=queue_budget, fair_key=turn.user_key
+        ) as waited:
+            RecordStage("admission_wait", waited)
+            result = self._SendChatPayload(
+                turn, url, payload, headers, tools, capability, on_token
+            )
+        self._RaiseForStatus(result.response, payload)
+        if "tools" in payload and capability.tools_supported is not True:
+            self._capabilities.RecordToolsSupported(endpoint.base_url, True)
+        data = result.Body()
+        usage = data.get("usage")
+        if isinstance(usage, dict) and usage.get("prompt_tokens"):
+            self._LearnTokenRatio(endpoint.base_url, payload, int(usage["prompt_tokens"]))
+        RecordLlmUsage(usage)
+        turn.AddUsage(data.get("usage"))
+        choices = data.get("choices") or []
+        if not choices:
+            return {}
+        message = choices[0].get("message") or {}
+        finish_reason = choices[0].get("finish_reason")
+        if isinstance(message, dict):
+            message["_finish_reason"] = finish_reason
+        return message
+
+    def _LearnTokenRatio(
+        self, base_url: str, payload: dict[str, Any], server_tokens: int
+    ) -> None:
+        """Keeps the worst underestimate seen so the next clamp leaves room for it."""
+        estimated = _EstimatePayloadTokens(payload.get("messages") or [], payload.get("tools"))
+        if estimated <= 0:
+            return
+        ratio = round(server_tokens / estimated, 3)
+        known = self._capabilities.Get(base_url).token_ratio
+        if known is None or ratio > known:
+            self._capabilities.RecordTokenRatio(base_url, ratio)
+            call_logger.info(
+                "토큰 추정 보정 ratio=%s estimated=%s server=%s", ratio, estimated, server_tokens
+            )
+
+    def _SendChatPayload(
+        self,
+        turn: LlmTurn,
+        url: str,
+        payload: dict[str, Any],
+        headers: dict[str, str],
+        tools: Optional[list[dict[str, Any]]],
+        capability: BackendCapability,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> _ChatResult:
+        endpoint = turn.endpoint
+        result = self._PostRequest(turn, url, payload, headers, on_token)
+        if result.status_code == 404:
+            fallback_model_id = self._fetch_first_model_id(turn)
             if fallback_model_id and fallback_model_id != payload["model"]:
                 payload["model"] = fallback_model_id
-                self.model_id = fallback_model_id
+                # Per endpoint only: the other replicas may still serve the configured id.
+                self._capabilities.RecordModelId(endpoint.base_url, fallback_model_id)
                 logger.warning("LLM 모델 대체: %s", fallback_model_id)
-                response = self._PostRequest(url, payload, headers)
-        if response.status_code == 400:
+                CountEvent("retry_model_404")
+                result = self._PostRequest(turn, url, payload, headers, on_token)
+        if result.status_code == 400:
             logger.warning(
                 "요청 400 응답 body=%s",
-                response.text,
+                TruncateForLog(result.response.text, self._settings.log_max_body_chars),
             )
-            parsed = _ParseContextLimitFromError(response.text)
+            parsed = _ParseContextLimitFromError(result.response.text)
             if parsed:
                 max_context_len, input_ctx_tokens = parsed
+                if capability.max_context != max_context_len:
+                    self._capabilities.RecordMaxContext(endpoint.base_url, max_context_len)
+                self._LearnTokenRatio(endpoint.base_url, payload, input_ctx_tokens)
                 adjusted_max = _ClampMaxTokens(
                     payload.get("max_tokens") or self._settings.max_tokens,
                     max_context_len,
@@ -432,63 +884,114 @@ class LLMService:
                         adjusted_max,
                     )
                     payload["max_tokens"] = adjusted_max
-                    response = self._PostRequest(url, payload, headers)
+                    CountEvent("retry_context_400")
+                    result = self._PostRequest(turn, url, payload, headers, on_token)
             if (
-                response.status_code == 400
+                result.status_code == 400
                 and tools
                 and self._settings.llm_tool_fallback_on_400
             ):
                 logger.warning("도구 호출 미지원 가능성: 도구 없이 재시도")
                 payload.pop("tools", None)
                 payload.pop("tool_choice", None)
-                response = self._PostRequest(url, payload, headers)
-        self._RaiseForStatus(response, payload)
-        data: dict[str, Any] = response.json()
-        choices = data.get("choices") or []
-        if not choices:
-            return {}
-        message = choices[0].get("message") or {}
-        finish_reason = choices[0].get("finish_reason")
-        if isinstance(message, dict):
-            message["_finish_reason"] = finish_reason
-        return message
+                CountEvent("retry_without_tools_400")
+                rejected_body = result.response.text
+                result = self._PostRequest(turn, url, payload, headers, on_token)
+                if result.response.ok and _RejectsToolCalling(rejected_body):
+                    self._capabilities.RecordToolsSupported(endpoint.base_url, False)
+        return result
 
     def _PostRequest(
         self,
+        turn: LlmTurn,
         url: str,
         payload: dict[str, Any],
         headers: dict[str, str],
-    ) -> requests.Response:
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> _ChatResult:
+        endpoint = turn.endpoint
+        timeout = self._CallTimeout(turn, "llm_call")
+        stream = bool(payload.get("stream"))
+        recording = CurrentRecording()
+        if self._breaker is not None:
+            self._breaker.CheckCall()
+        started = time.perf_counter()
+        folded: Optional[dict[str, Any]] = None
         try:
-            return requests.post(
-                url,
-                json=payload,
-                headers=headers,
-                timeout=self._settings.llm_timeout_sec,
-            )
+            with self._pool.Track(endpoint), ObserveStage("llm_call"):
+                response = endpoint.session.post(
+                    url,
+                    data=EncodeJson(payload),
+                    headers={**headers, "Content-Type": "application/json"},
+                    timeout=timeout,
+                    stream=stream,
+                )
+                if stream and response.ok:
+                    # Drain the stream while the endpoint is still tracked.
+                    folded = _ReadChatStream(response, on_token, turn.deadline)
         except requests.RequestException as exc:
             logger.exception("LLM 요청 실패 url=%s error=%s", url, exc)
+            out_of_budget = (
+                isinstance(exc, requests.Timeout)
+                and turn.deadline is not None
+                and turn.deadline.Remaining() <= 0
+            )
+            if self._breaker is not None and not out_of_budget:
+                # Our own deadline running out says nothing about the backend.
+                self._breaker.Record(False, time.perf_counter() - started)
+            if recording is not None:
+                recording.AddLlmCall(
+                    payload, time.perf_counter() - started, 0, None, exc.__class__.__name__
+                )
             raise
+        self._pool.RecordResult(endpoint, ok=response.status_code < 500)
+        if self._breaker is not None:
+            # A streamed call lasts as long as the answer; only judge latency unstreamed.
+            self._breaker.Record(
+                response.status_code < 500, 0.0 if stream else time.perf_counter() - started
+            )
+        if recording is not None:
+            recording.AddLlmCall(
+                payload,
+                time.perf_counter() - started,
+                response.status_code,
+                EncodeJson(folded) if folded is not None else response.content,
+            )
+        return _ChatResult(response, folded)
 
     def _RaiseForStatus(self, response: requests.Response, payload: dict[str, Any]) -> None:
         try:
             response.raise_for_status()
         except requests.HTTPError as exc:
-            body = response.text
             logger.error(
                 "LLM 응답 오류 status=%s body=%s payload_keys=%s",
                 response.status_code,
-                body,
+                TruncateForLog(response.text, self._settings.log_max_body_chars),
                 sorted(payload.keys()),
             )
             raise exc
 
-    def _PostChat(self, messages: list[dict[str, Any]]) -> str:
+    def _PostChat(
+        self,
+        messages: list[dict[str, Any]],
+        turn: Optional[LlmTurn] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        turn = turn or self.StartTurn()
         accumulated: list[str] = []
         current_messages = list(messages)
         max_continuations = 3
-        for _ in range(max_continuations):
-            message = self._PostChatMessage(current_messages)
+        for attempt in range(max_continuations):
+            try:
+                message = self._PostChatMessage(
+                    current_messages, turn=turn, on_token=on_token
+                )
+            except DeadlineExceeded:
+                if not accumulated:
+                    raise
+                # Out of budget mid-answer: return what we have instead of failing.
+                logger.warning("요청 기한 임박: 이어쓰기 중단 attempt=%s", attempt)
+                break
             content = message.get("content") or ""
             if content:
                 accumulated.append(content)
@@ -497,6 +1000,7 @@ class LLMService:
                 break
             if not content:
                 break
+            CountEvent("continuation")
             current_messages = current_messages + [
                 {"role": "assistant", "content": content},
                 {"role": "user", "content": "계속"},
@@ -506,39 +1010,316 @@ class LLMService:
     def Generate(self, prompt: str) -> str:
         return self.GenerateChat([{"role": "user", "content": prompt}])
 
-    def GenerateChat(self, messages: list[dict[str, Any]]) -> str:
-        return self._PostChat(messages)
+    def GenerateChat(
+        self,
+        messages: list[dict[str, Any]],
+        turn: Optional[LlmTurn] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        return self._PostChat(messages, turn=turn, on_token=on_token)
 
     def GenerateChatWithTools(
         self,
         messages: list[dict[str, Any]],
         tools: list[dict[str, Any]],
+        turn: Optional[LlmTurn] = None,
     ) -> dict[str, Any]:
-        return self._PostChatMessage(messages, tools=tools)
+        return self._PostChatMessage(messages, tools=tools, turn=turn)
+
+    def _SelectToolGuided(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]],
+        turn: LlmTurn,
+    ) -> Optional[dict[str, Any]]:
+        """Pick a tool with a short schema-constrained decode instead of free text.
+
+        Returns None when the backend rejects structured output so the caller
+        can use native tool calling; an unparsable pick comes back without
+        ``tool_calls`` and takes the usual forced-call fallback.
+        """
+        base_url = turn.endpoint.base_url
+        if self._capabilities.Get(base_url).guided_supported is False:
+            return None
+        schema = BuildToolSelectionSchema(tools)
+        overrides: dict[str, Any] = {
+            "max_tokens": self._settings.llm_tool_selection_max_tokens,
+            "temperature": 0.0,
+        }
+        if self._settings.llm_guided_decoding_format == "guided_json":
+            overrides["guided_json"] = schema
+        else:
+            overrides["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "tool_selection", "schema": schema},
+            }
+        try:
+            message = self._PostChatMessage(
+                _BuildToolSelectionMessages(messages, tools), turn=turn, overrides=overrides
+            )
+        except requests.HTTPError as exc:
+            if exc.response is None or exc.response.status_code != 400:
+                raise
+            logger.warning("구조화 출력 미지원 백엔드: 네이티브 도구 호출로 전환")
+            self._capabilities.RecordGuidedSupported(base_url, False)
+            CountEvent("guided_unsupported_400")
+            return None
+        tool_calls = _ParseToolSelection(message.get("content") or "")
+        if not tool_calls:
+            CountEvent("guided_tool_parse_failed")
+            return {"role": "assistant", "content": ""}
+        CountEvent("guided_tool_call")
+        return {"role": "assistant", "content": "", "tool_calls": tool_calls}
 
     def GenerateAssistantReply(
         self,
         message: LlmMessage,
         tool_executor: Callable[[dict[str, Any], int], dict[str, Any]],
+        session: Optional[ChatSession] = None,
+        on_event: Optional[Callable[[dict[str, Any]], None]] = None,
+        system_context: Optional[str] = None,
+        priority: Optional[int] = None,
     ) -> str:
-        llm_messages: list[dict[str, Any]] = [
-            {"role": "system", "content": BuildSystemContext(message)},
+        """Answer one user message, calling tools as needed.
+
+        ``on_event`` receives ``{"type": "tool", ...}`` progress events and,
+        for answer-producing calls, streamed ``{"type": "token", ...}`` chunks.
+        ``system_context`` lets long-lived callers reuse a prebuilt prompt prefix.
+        ``priority`` overrides the intent-based admission priority (batch jobs).
+        """
+        trace = _ReplyTrace()
+        started = time.perf_counter()
+        status = "ok"
+        recorder = GetTrafficRecorder()
+        # Decided before the reply is added to the session it would depend on.
+        faq_cacheable = self._IsFaqCacheable(message, session, system_context)
+        try:
+            if self._breaker is not None:
+                self._breaker.AllowTurn()
+            with recorder.Turn(
+                message.user_id, session.session_id if session else None, message.content
+            ):
+                reply = self._GenerateAssistantReply(
+                    message, tool_executor, session, trace, on_event, system_context, priority
+                )
+        except Exception as exc:
+            status = f"error:{exc.__class__.__name__}"
+            raise
+        finally:
+            if trace.speculation is not None:
+                trace.speculation.Finish()
+            self._RecordAudit(message, session, trace, status, time.perf_counter() - started)
+        if session is not None:
+            GetChatSessionStore().RecordExchange(session, message.content, reply, trace.tools)
+        if (
+            faq_cacheable
+            and trace.inferred_tool is None
+            and not trace.tools
+            and str(message.user_id) not in reply
+        ):
+            # General questions ("안전 수칙 알려줘") can be answered from here while the LLM is down.
+            GetFaqReplyCache().Put(message.content, reply)
+        return reply
+
+    def _IsFaqCacheable(
+        self,
+        message: LlmMessage,
+        session: Optional[ChatSession],
+        system_context: Optional[str],
+    ) -> bool:
+        """Only first-turn, allow-listed questions under the generic prompt may be shared."""
+        if not IsFaqQuestion(message.content, self._settings.llm_faq_keywords):
+            return False
+        if _IsFollowUpMessage(message.content):
+            return False
+        if session is not None:
+            with session.lock:
+                if session.turns:
+                    return False
+        return system_context is None or system_context == BuildSystemContext(message)
+
+    def DegradedReply(
+        self,
+        message: LlmMessage,
+        tool_executor: Callable[[dict[str, Any], int], dict[str, Any]],
+    ) -> tuple[str, str]:
+        """``(text, kind)`` answered without the LLM: cached FAQ, templated tool result or busy."""
+        cached = (
+            GetFaqReplyCache().Get(message.content)
+            if IsFaqQuestion(message.content, self._settings.llm_faq_keywords)
+            else None
+        )
+        if cached is not None:
+            CountEvent(f"degraded_{DEGRADED_FAQ}")
+            return cached, DEGRADED_FAQ
+        tool_name = InferToolFromUserMessage(message.content, self._settings.tool_keywords_map)
+        if tool_name is not None:
+            tool_call = _BuildForcedToolCall(tool_name, message.user_id)
+            _InjectPeriodIfMissing([tool_call], message.content)
+            try:
+                with ObserveStage("tool", tool_name):
+                    result = tool_executor(tool_call, message.user_id)
+            except Exception as exc:
+                logger.warning("대체 응답 도구 실행 실패 name=%s error=%s", tool_name, exc)
+            else:
+                CountEvent(f"degraded_{DEGRADED_TOOL}")
+                return (
+                    RenderToolResult(tool_name, result, self._settings.llm_degraded_max_rows),
+                    DEGRADED_TOOL,
+                )
+        CountEvent(f"degraded_{DEGRADED_BUSY}")
+        return BUSY_MESSAGE, DEGRADED_BUSY
+
+    def _RecordAudit(
+        self,
+        message: LlmMessage,
+        session: Optional[ChatSession],
+        trace: _ReplyTrace,
+        status: str,
+        elapsed_sec: float,
+    ) -> None:
+        audit = GetAuditLog()
+        if not audit.enabled:
+            return
+        turn = trace.turn
+        audit.Record(
+            {
+                "ts": time.time(),
+                "session_id": session.session_id if session is not None else None,
+                "user_id": message.user_id,
+                "message": message.content,
+                "status": status,
+                "latency_ms": round(elapsed_sec * 1000, 1),
+                "inferred_tool": trace.inferred_tool,
+                "tools": [{"name": name, "args": args} for name, args, _ in trace.tools],
+                "reused_tools": trace.reused_tools,
+                "tool_selection": trace.tool_selection,
+                "speculation": trace.speculation.outcome if trace.speculation else None,
+                "llm_calls": turn.calls if turn else 0,
+                "prompt_tokens": turn.prompt_tokens if turn else 0,
+                "completion_tokens": turn.completion_tokens if turn else 0,
+                "endpoint": turn.endpoint.base_url if turn else None,
+            }
+        )
+
+    def _BuildReplyMessages(
+        self,
+        message: LlmMessage,
+        session: Optional[ChatSession],
+        system_context: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        system_content = system_context or BuildSystemContext(message)
+        history: list[dict[str, Any]] = []
+        if session is not None:
+            history, summary = GetChatSessionStore().BuildHistory(
+                session, self._settings.chat_history_token_budget, _EstimateTokens
+            )
+            if summary:
+                system_content = f"{system_content}{summary}\n"
+        return [
+            {"role": "system", "content": system_content},
+            *history,
             {"role": message.role, "content": message.content},
         ]
-        inferred_tool = _InferToolFromUserMessage(
-            message.content, self._settings.tool_keywords_map
+
+    def _StartSpeculation(
+        self,
+        inferred_tool: str,
+        message: LlmMessage,
+        session: Optional[ChatSession],
+        tool_executor: Callable[[dict[str, Any], int], dict[str, Any]],
+    ) -> Optional[SpeculativeToolCall]:
+        """Run the call the forced fallback would make while the model decides."""
+        if (
+            not self._settings.llm_speculative_tools_enabled
+            or inferred_tool not in self._settings.llm_speculative_tools
+        ):
+            return None
+        tool_call = _BuildForcedToolCall(inferred_tool, message.user_id)
+        _PreferTotalUsageTool([tool_call], message.content)
+        _InjectPeriodIfMissing([tool_call], message.content)
+        function = tool_call["function"]
+        args = _ParseToolCallArgs(function.get("arguments"))
+        if session is not None and (
+            GetChatSessionStore().LookupToolResult(session, function["name"], args) is not None
+        ):
+            # The session already holds this answer; nothing to overlap.
+            return None
+        return GetToolSpeculator().Start(tool_executor, tool_call, args, message.user_id)
+
+    def _GenerateAssistantReply(
+        self,
+        message: LlmMessage,
+        tool_executor: Callable[[dict[str, Any], int], dict[str, Any]],
+        session: Optional[ChatSession],
+        trace: _ReplyTrace,
+        on_event: Optional[Callable[[dict[str, Any]], None]] = None,
+        system_context: Optional[str] = None,
+        priority: Optional[int] = None,
+    ) -> str:
+        llm_messages = self._BuildReplyMessages(message, session, system_context)
+        on_token = (
+            (lambda text: on_event({"type": "token", "text": text}))
+            if on_event is not None
+            else None
         )
+        with ObserveStage("intent_inference"):
+            inferred_tool = InferToolFromUserMessage(
+                message.content, self._settings.tool_keywords_map
+            )
+            if (
+                inferred_tool is None
+                and session is not None
+                and _IsFollowUpMessage(message.content)
+            ):
+                # "그럼 지난달은?" carries no keyword; reuse the tool of the previous turn.
+                last_tool = session.LastTool()
+                if last_tool is not None:
+                    inferred_tool = last_tool[0]
+                    CountEvent("session_tool_inherited")
+        trace.inferred_tool = inferred_tool
         tools = BuildToolSchema() if inferred_tool else None
-        if tools:
-            llm_message = self.GenerateChatWithTools(llm_messages, tools)
-        else:
-            llm_message = self._PostChatMessage(llm_messages)
+        # One replica serves the whole turn so follow-up calls hit its prefix cache.
+        if priority is None:
+            priority = (
+                PRIORITY_SHORT
+                if inferred_tool in self._settings.llm_short_intent_tools
+                else PRIORITY_NORMAL
+            )
+        turn = self.StartTurn(priority=priority, user_key=str(message.user_id))
+        trace.turn = turn
+        if inferred_tool:
+            trace.speculation = self._StartSpeculation(
+                inferred_tool, message, session, tool_executor
+            )
+        llm_message: Optional[dict[str, Any]] = None
+        selection = TOOL_SELECTION_NATIVE
+        if tools and self._settings.llm_tool_selection_mode == TOOL_SELECTION_GUIDED:
+            with ObserveStage("tool_selection", TOOL_SELECTION_GUIDED):
+                llm_message = self._SelectToolGuided(llm_messages, tools, turn)
+            selection = TOOL_SELECTION_GUIDED
+        if llm_message is None:
+            selection = TOOL_SELECTION_NATIVE
+            if tools:
+                with ObserveStage("tool_selection", TOOL_SELECTION_NATIVE):
+                    llm_message = self.GenerateChatWithTools(llm_messages, tools, turn=turn)
+            else:
+                gate = _ToolCallTokenGate(on_token) if on_token is not None else None
+                llm_message = self._PostChatMessage(
+                    llm_messages, turn=turn, on_token=gate.Feed if gate is not None else None
+                )
+                if gate is not None:
+                    gate.Flush()
         tool_calls = llm_message.get("tool_calls") or []
-        if not tool_calls:
+        if tool_calls:
+            trace.tool_selection = selection
+        else:
             raw_content = llm_message.get("content") or ""
             content_tool_calls = _ParseToolCallsFromContent(raw_content)
             if content_tool_calls:
+                CountEvent("content_tool_call")
                 tool_calls = content_tool_calls
+                trace.tool_selection = "content"
             else:
                 if "<tool_call>" in raw_content:
                     logger.warning("불완전한 tool_call 감지: 내용 무시 후 보정")
@@ -546,25 +1327,67 @@ class LLMService:
                     logger.info("도구 호출 없음: 의도 기반 보정 tool=%s", inferred_tool)
                     forced_tool_call = _BuildForcedToolCall(inferred_tool, message.user_id)
                     tool_calls = [forced_tool_call]
+                    CountEvent("forced_tool_call")
+                    trace.tool_selection = "forced"
                 else:
-                    logger.info("LLM 도구 호출 없음")
+                    call_logger.info("LLM 도구 호출 없음")
                     content = llm_message.get("content") or ""
                     if content:
                         return content
                     logger.info("LLM 응답 비어있음: 도구 없이 재시도")
-                    return self.GenerateChat(llm_messages)
+                    gate = _ToolCallTokenGate(on_token) if on_token is not None else None
+                    content = self.GenerateChat(
+                        llm_messages, turn=turn, on_token=gate.Feed if gate is not None else None
+                    )
+                    if gate is not None:
+                        gate.Flush()
+                    return content
 
         _PreferTotalUsageTool(tool_calls, message.content)
         _InjectPeriodIfMissing(tool_calls, message.content)
 
+        store = GetChatSessionStore() if session is not None else None
         tool_messages: list[dict[str, Any]] = []
         for idx, tool_call in enumerate(tool_calls):
             tool_call_id = tool_call.get("id") or f"tool_call_{idx}"
-            tool_name = (tool_call.get("function") or {}).get("name")
-            logger.info("도구 호출 실행 name=%s id=%s", tool_name, tool_call_id)
-            result = tool_executor(tool_call, message.user_id)
+            function = tool_call.get("function") or {}
+            tool_name = function.get("name") or ""
+            tool_args = _ParseToolCallArgs(function.get("arguments"))
+            result = (
+                store.LookupToolResult(session, tool_name, tool_args)
+                if store is not None
+                else None
+            )
+            if result is not None:
+                call_logger.info("도구 결과 재사용 name=%s id=%s", tool_name, tool_call_id)
+                CountEvent("session_tool_reuse")
+                trace.reused_tools += 1
+                if on_event is not None:
+                    on_event({"type": "tool", "name": tool_name, "status": "reused"})
+            else:
+                call_logger.info("도구 호출 실행 name=%s id=%s", tool_name, tool_call_id)
+                if on_event is not None:
+                    on_event({"type": "tool", "name": tool_name, "status": "start"})
+                tool_started = time.perf_counter()
+                with ObserveStage("tool", tool_name):
+                    if trace.speculation is not None:
+                        result = trace.speculation.Claim(tool_name, tool_args, message.user_id)
+                    if result is None:
+                        result = tool_executor(tool_call, message.user_id)
+                if on_event is not None:
+                    on_event(
+                        {
+                            "type": "tool",
+                            "name": tool_name,
+                            "status": "done",
+                            "elapsed_ms": round((time.perf_counter() - tool_started) * 1000, 1),
+                        }
+                    )
+            trace.tools.append((tool_name, tool_args, result))
+            with ObserveStage("json_encode", tool_name):
+                content = _AsJson(result)
             tool_messages.append(
-                {"role": "tool", "tool_call_id": tool_call_id, "content": _AsJson(result)}
+                {"role": "tool", "tool_call_id": tool_call_id, "content": content}
             )
 
         assistant_message = {
@@ -573,7 +1396,7 @@ class LLMService:
             "tool_calls": tool_calls,
         }
         final_messages = llm_messages + [assistant_message] + tool_messages
-        return self.GenerateChat(final_messages)
+        return self.GenerateChat(final_messages, turn=turn, on_token=on_token)
 
 
 @lru_cache(maxsize=1)
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import os
+import re
+import threading
+import time
+from typing import Iterator, Optional
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
+except ImportError:  # pragma: no cover - optional metrics backend
+    CollectorRegistry = None
+
+    class _NoopMetric:
+        """Stands in for a Prometheus metric when prometheus_client is not installed."""
+
+        def __init__(self, *args: object, **kwargs: object) -> None:
+            pass
+
+        def labels(self, *args: object, **kwargs: object) -> "_NoopMetric":
+            return self
+
+        def observe(self, value: float) -> None:
+            pass
+
+        def inc(self, amount: float = 1) -> None:
+            pass
+
+        def set(self, value: float) -> None:
+            pass
+
+        def clear(self) -> None:
+            pass
+
+    Counter = Gauge = Histogram = _NoopMetric
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+METRICS_ENABLED = CollectorRegistry is not None
+
+
+_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0,
+)
+_TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+STAGE_SECONDS = Histogram(
+    "llm_app_stage_seconds",
+    "Latency of one request stage",
+    ["stage", "name"],
+    buckets=_LATENCY_BUCKETS,
+)
+LLM_CALL_TOKENS = Histogram(
+    "llm_app_llm_call_tokens",
+    "Tokens per LLM call as reported by the backend usage block",
+    ["kind"],
+    buckets=_TOKEN_BUCKETS,
+)
+EVENTS = Counter(
+    "llm_app_events_total",
+    "Retries, forced tool calls, continuations and similar events",
+    ["event"],
+)
+THROTTLED = Counter(
+    "llm_app_throttled_total",
+    "Requests refused by the per-user rate limiter",
+    ["route", "reason"],
+)
+ADMISSION_GAUGE = Gauge(
+    "llm_app_admission",
+    "Admission controller state",
+    ["field"],
+    multiprocess_mode="livesum",
+)
+ENDPOINT_GAUGE = Gauge(
+    "llm_app_llm_endpoint",
+    "LLM endpoint state",
+    ["base_url", "field"],
+    multiprocess_mode="liveall",
+)
+BREAKER_GAUGE = Gauge(
+    "llm_app_llm_breaker",
+    "LLM circuit breaker (state_value 0 closed, 1 half-open, 2 open; admit_ratio, ...)",
+    ["field"],
+    multiprocess_mode="liveall",
+)
+
+DB_ROUTE_GAUGE = Gauge(
+    "llm_app_db_route",
+    "Oracle tunnel/pool route state (uptime_sec, leases, pool_open, pool_busy, ...)",
+    ["route", "bastion", "field"],
+    multiprocess_mode="liveall",
+)
+
+_TIMING_NAME_PATTERN = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class RequestTimings:
+    """Per-request stage durations rendered as a Server-Timing header."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str], float] = {}
+
+    def Add(self, stage: str, name: str, seconds: float) -> None:
+        key = (stage, name)
+        with self._lock:
+            self._entries[key] = self._entries.get(key, 0.0) + seconds
+
+    def Entries(self) -> dict[tuple[str, str], float]:
+        with self._lock:
+            return dict(self._entries)
+
+    def DurationsMs(self) -> dict[str, float]:
+        """Milliseconds keyed by the metric names used in the Server-Timing header."""
+        durations: dict[str, float] = {}
+        for (stage, name), seconds in self.Entries().items():
+            metric = _TIMING_NAME_PATTERN.sub("_", f"{stage}.{name}" if name else stage)
+            durations[metric] = durations.get(metric, 0.0) + seconds * 1000
+        return durations
+
+    def Header(self) -> str:
+        return ", ".join(f"{metric};dur={ms:.1f}" for metric, ms in self.DurationsMs().items())
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def GetRequestTimings() -> Optional[RequestTimings]:
+    return _current_timings.get()
+
+
+@contextmanager
+def BindRequestTimings(timings: RequestTimings) -> Iterator[RequestTimings]:
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def RecordStage(stage: str, seconds: float, name: str = "") -> None:
+    STAGE_SECONDS.labels(stage=stage, name=name).observe(seconds)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.Add(stage, name, seconds)
+
+
+@contextmanager
+def ObserveStage(stage: str, name: str = "") -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        RecordStage(stage, time.perf_counter() - started, name)
+
+
+def CountEvent(event: str) -> None:
+    EVENTS.labels(event=event).inc()
+
+
+def CountThrottled(route: str, reason: str) -> None:
+    THROTTLED.labels(route=route, reason=reason).inc()
+
+
+def RecordLlmUsage(usage: Optional[dict]) -> None:
+    if not isinstance(usage, dict):
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = usage.get(kind)
+        if isinstance(value, (int, float)):
+            LLM_CALL_TOKENS.labels(kind=kind.replace("_tokens", "")).observe(value)
+
+
+def UpdateAdmissionGauges(snapshot: dict) -> None:
+    for field, value in snapshot.items():
+        if isinstance(value, (int, float)):
+            ADMISSION_GAUGE.labels(field=field).set(value)
+
+
+def UpdateEndpointGauges(snapshots: list[dict]) -> None:
+    for snapshot in snapshots:
+        base_url = str(snapshot.get("base_url", ""))
+        for field, value in snapshot.items():
+            if isinstance(value, (bool, int, float)):
+                ENDPOINT_GAUGE.labels(base_url=base_url, field=field).set(float(value))
+
+
+def UpdateBreakerGauges(snapshot: dict) -> None:
+    for field, value in snapshot.items():
+        if isinstance(value, (int, float)):
+            BREAKER_GAUGE.labels(field=field).set(value)
+
+
+def UpdateDbGauges(snapshot: dict) -> None:
+    # Routes are replaced on rotation; drop the label sets of retired ones.
+    DB_ROUTE_GAUGE.clear()
+    for field, value in snapshot.items():
+        if isinstance(value, (bool, int, float)):
+            DB_ROUTE_GAUGE.labels(route="all", bastion="", field=field).set(float(value))
+    for role, route in (snapshot.get("routes") or {}).items():
+        bastion = str(route.get("bastion", ""))
+        for field, value in route.items():
+            if isinstance(value, (int, float)):
+                DB_ROUTE_GAUGE.labels(route=role, bastion=bastion, field=field).set(float(value))
+
+
+def RenderMetrics() -> tuple[bytes, str]:
+    if not METRICS_ENABLED:
+        # Server-Timing still works; only the Prometheus exposition is missing.
+        return b"# prometheus_client is not installed\n", CONTENT_TYPE_LATEST
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # app.server workers: merge every live worker's samples.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
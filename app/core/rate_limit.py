@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+import logging
+import math
+import threading
+import time
+from typing import Any, Iterator
+
+from app.config.config import GetSettings
+from app.core.metrics import CountEvent, CountThrottled
+
+
+logger = logging.getLogger(__name__)
+
+REASON_RATE = "rate"
+REASON_IN_FLIGHT = "in_flight"
+
+
+class RateLimited(Exception):
+    def __init__(self, reason: str, retry_after_sec: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_sec = retry_after_sec
+
+
+@dataclass(frozen=True)
+class RouteLimit:
+    rate_per_sec: float
+    burst: float
+    max_in_flight: int
+
+
+def ParseRouteLimits(specs: list[str]) -> dict[str, RouteLimit]:
+    """``["generate=0.5:10:2"]`` -> ``{"generate": RouteLimit(0.5, 10, 2)}``."""
+    limits: dict[str, RouteLimit] = {}
+    for spec in specs:
+        route, _, values = spec.partition("=")
+        parts = values.split(":")
+        try:
+            rate, burst, in_flight = (float(part) for part in parts + ["0"] * (3 - len(parts)))
+        except ValueError:
+            logger.warning("잘못된 요청 한도 설정 무시 spec=%s", spec)
+            continue
+        limits[route.strip()] = RouteLimit(
+            rate_per_sec=max(0.0, rate),
+            burst=max(1.0, burst),
+            max_in_flight=max(0, int(in_flight)),
+        )
+    return limits
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "in_flight")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated = now
+        self.in_flight = 0
+
+
+class UserRateLimiter:
+    """Token bucket plus in-flight quota per (route, user).
+
+    A request takes one token and one in-flight slot for its whole duration;
+    either running out refuses it immediately with a ``Retry-After`` hint.
+    Buckets live in an LRU capped at ``max_keys``. A bucket idle for
+    ``idle_sec`` has refilled completely, so dropping it loses nothing; the
+    sweep runs inline with acquisitions, at most every ``idle_sec / 4``.
+    """
+
+    def __init__(self, limits: dict[str, RouteLimit], max_keys: int, idle_sec: float) -> None:
+        self._limits = limits
+        self._max_keys = max(1, max_keys)
+        self._idle_sec = max(1.0, idle_sec)
+        self._lock = threading.Lock()
+        self._buckets: OrderedDict[tuple[str, int], _Bucket] = OrderedDict()
+        self._last_sweep = time.monotonic()
+        self._in_flight = 0
+        self._allowed = 0
+        self._throttled: dict[str, int] = {REASON_RATE: 0, REASON_IN_FLIGHT: 0}
+        self._expired = 0
+        self._evicted = 0
+
+    @contextmanager
+    def Acquire(self, route: str, user_id: int) -> Iterator[None]:
+        limit = self._limits.get(route)
+        if limit is None:
+            yield
+            return
+        key = (route, user_id)
+        self._Take(key, limit)
+        try:
+            yield
+        finally:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is not None and bucket.in_flight > 0:
+                    bucket.in_flight -= 1
+                    self._in_flight -= 1
+
+    def _Take(self, key: tuple[str, int], limit: RouteLimit) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep >= self._idle_sec / 4:
+                self._Sweep(now)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(limit.burst, now)
+                self._Evict()
+            else:
+                self._buckets.move_to_end(key)
+                if limit.rate_per_sec > 0:
+                    bucket.tokens = min(
+                        limit.burst, bucket.tokens + (now - bucket.updated) * limit.rate_per_sec
+                    )
+                bucket.updated = now
+            if limit.max_in_flight and bucket.in_flight >= limit.max_in_flight:
+                raise self._Refuse(key[0], REASON_IN_FLIGHT, 1)
+            if limit.rate_per_sec > 0:
+                if bucket.tokens < 1.0:
+                    retry_after = math.ceil((1.0 - bucket.tokens) / limit.rate_per_sec)
+                    raise self._Refuse(key[0], REASON_RATE, retry_after)
+                bucket.tokens -= 1.0
+            bucket.in_flight += 1
+            self._in_flight += 1
+            self._allowed += 1
+
+    def _Refuse(self, route: str, reason: str, retry_after_sec: int) -> RateLimited:
+        self._throttled[reason] += 1
+        CountThrottled(route, reason)
+        return RateLimited(reason, max(1, retry_after_sec))
+
+    def _Sweep(self, now: float) -> None:
+        self._last_sweep = now
+        # Least recently used first; stop at the first bucket touched recently.
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket.updated < self._idle_sec:
+                break
+            if bucket.in_flight:
+                # A request running longer than idle_sec; check it again next sweep.
+                bucket.updated = now
+                self._buckets.move_to_end(key)
+                continue
+            del self._buckets[key]
+            self._expired += 1
+
+    def _Evict(self) -> None:
+        # Never the newest entry (the caller's own); skip buckets still in use.
+        scanned = 0
+        while len(self._buckets) > self._max_keys and scanned < len(self._buckets) - 1:
+            key, bucket = self._buckets.popitem(last=False)
+            scanned += 1
+            if bucket.in_flight:
+                self._buckets[key] = bucket
+                continue
+            self._evicted += 1
+            CountEvent("rate_limit_evicted")
+
+    def Snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "routes": {
+                    route: {
+                        "rate_per_sec": limit.rate_per_sec,
+                        "burst": limit.burst,
+                        "max_in_flight": limit.max_in_flight,
+                    }
+                    for route, limit in self._limits.items()
+                },
+                "tracked": len(self._buckets),
+                "in_flight": self._in_flight,
+                "allowed": self._allowed,
+                "throttled": dict(self._throttled),
+                "expired": self._expired,
+                "evicted": self._evicted,
+            }
+
+
+@lru_cache(maxsize=1)
+def GetUserRateLimiter() -> UserRateLimiter:
+    settings = GetSettings()
+    limits = ParseRouteLimits(settings.rate_limit_routes) if settings.rate_limit_enabled else {}
+    return UserRateLimiter(limits, settings.rate_limit_max_users, settings.rate_limit_idle_sec)
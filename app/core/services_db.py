@@ -1,11 +1,21 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
+from contextlib import closing, contextmanager
 from dataclasses import dataclass
-import os
+from functools import lru_cache
+import re
 from typing import Any, Iterator, Optional
 
 from app.config.config import GetSettings
+from app.core.db_lifecycle import (
+    BastionHost,
+    DbConnectionManager,
+    ParseBastionHosts,
+    StartTunnel,
+    ValidateBastionConfig,
+)
+from app.core.deadline import CheckDeadline, GetCurrentDeadline, RemainingTimeout
+from app.core.metrics import ObserveStage
 
 
 @dataclass(frozen=True)
@@ -51,13 +61,13 @@ def GetMysqlConfig() -> OracleDBConfig:
         password=settings.oracle_password,
         service=settings.oracle_service,
         dsn=settings.oracle_dsn,
-        users_table=settings.users_table,
-        rentals_table=settings.rentals_table,
-        payments_table=settings.payments_table,
-        bikes_table=settings.bikes_table,
-        files_table=settings.files_table,
-        notices_table=settings.notices_table,
-        inquiries_table=settings.inquiries_table,
+        users_table=settings.users_table or "users",
+        rentals_table=settings.rentals_table or "rentals",
+        payments_table=settings.payments_table or "payments",
+        bikes_table=settings.bikes_table or "bikes",
+        files_table=settings.files_table or "files",
+        notices_table=settings.notices_table or "notices",
+        inquiries_table=settings.inquiries_table or "inquiries",
         chat_table=settings.chat_table,
         bastion_host=settings.bastion_host,
         bastion_port=settings.bastion_port,
@@ -81,67 +91,68 @@ def _ValidateMysqlConfig(config: OracleDBConfig) -> None:
         raise RuntimeError(f"Oracle settings are missing: {', '.join(missing)}")
 
 
+def _CallTimeoutMs() -> int:
+    timeout_sec = RemainingTimeout("db_call", GetSettings().db_call_timeout_sec)
+    return max(1, int(timeout_sec * 1000))
+
+
+@lru_cache(maxsize=256)
+def _ColumnNames(names: tuple[str, ...]) -> tuple[str, ...]:
+    return tuple(name.lower() for name in names)
+
+
+def _CursorColumns(cursor: Any) -> tuple[str, ...]:
+    description = cursor.description
+    if not description:
+        return ()
+    return _ColumnNames(tuple(col[0] for col in description))
+
+
 def _ToDictRow(cursor: Any, row: Any) -> dict[str, Any]:
     if row is None:
         return {}
     if isinstance(row, dict):
         return row
-    if cursor.description:
-        columns = [col[0].lower() for col in cursor.description]
-        return dict(zip(columns, row))
-    return {}
+    columns = _CursorColumns(cursor)
+    return dict(zip(columns, row)) if columns else {}
 
 
 def _ToDictRows(cursor: Any, rows: Any) -> list[dict[str, Any]]:
     if not rows:
         return []
-    if isinstance(rows, list) and rows and isinstance(rows[0], dict):
+    if isinstance(rows[0], dict):
         return list(rows)
-    if cursor.description:
-        columns = [col[0].lower() for col in cursor.description]
-        return [dict(zip(columns, row)) for row in rows]
-    return []
+    columns = _CursorColumns(cursor)
+    if not columns:
+        return []
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _TuneFetch(cursor: Any, expected_rows: Optional[int]) -> None:
+    # Size the fetch buffers to the query shape so a bounded result comes
+    # back in a single round trip (the extra prefetched row lets oracledb
+    # see end-of-fetch without another call).
+    if not expected_rows or expected_rows < 1:
+        return
+    if hasattr(cursor, "prefetchrows"):
+        cursor.prefetchrows = expected_rows + 1
+    if hasattr(cursor, "arraysize"):
+        cursor.arraysize = expected_rows
 
 
 @contextmanager
-def MysqlConnection() -> Iterator[Any]:
+def _OracleConnection() -> Iterator[Any]:
     config = GetMysqlConfig()
     _ValidateMysqlConfig(config)
+    CheckDeadline("db_connect")
 
     tunnel: Optional[Any] = None
     host = config.host
     port = config.port
 
-    if config.bastion_host or config.bastion_user or config.bastion_key_path:
-        if not (config.bastion_host and config.bastion_user and config.bastion_key_path):
-            raise RuntimeError(
-                "Bastion settings are incomplete: BASTION_HOST/BASTION_USER/BASTION_KEY_PATH are required"
-            )
-        if not os.path.exists(config.bastion_key_path):
-            raise RuntimeError(
-                f"BASTION_KEY_PATH does not exist: {config.bastion_key_path}"
-            )
-        if not os.path.isfile(config.bastion_key_path):
-            raise RuntimeError(
-                f"BASTION_KEY_PATH is not a file: {config.bastion_key_path}"
-            )
-        if not os.access(config.bastion_key_path, os.R_OK):
-            raise RuntimeError(
-                f"BASTION_KEY_PATH is not readable: {config.bastion_key_path}"
-            )
-        try:
-            from sshtunnel import SSHTunnelForwarder  # type: ignore
-        except Exception as exc:  # pragma: no cover - optional dependency
-            raise RuntimeError("sshtunnel is required for bastion access") from exc
-
-        tunnel = SSHTunnelForwarder(
-            (config.bastion_host, config.bastion_port),
-            ssh_username=config.bastion_user,
-            ssh_pkey=config.bastion_key_path,
-            remote_bind_address=(config.host, config.port),
-            local_bind_address=("127.0.0.1", 0),
-        )
-        tunnel.start()
+    bastions = _BastionHosts(config)
+    if ValidateBastionConfig(config, bastions):
+        tunnel = StartTunnel(config, bastions[0])
         host = "127.0.0.1"
         port = int(tunnel.local_bind_port)
 
@@ -152,11 +163,17 @@ def MysqlConnection() -> Iterator[Any]:
     dsn = config.dsn
     if tunnel is not None or not dsn:
         dsn = oracledb.makedsn(host, port, service_name=config.service)
-    connection = oracledb.connect(
-        user=config.user,
-        password=config.password,
-        dsn=dsn,
-    )
+    with ObserveStage("db_connect"):
+        connection = oracledb.connect(
+            user=config.user,
+            password=config.password,
+            dsn=dsn,
+            tcp_connect_timeout=RemainingTimeout(
+                "db_connect", GetSettings().db_call_timeout_sec
+            ),
+        )
+    # Round trips on this connection may only use the remaining request budget.
+    connection.call_timeout = _CallTimeoutMs()
     try:
         yield connection
     finally:
@@ -165,6 +182,280 @@ def MysqlConnection() -> Iterator[Any]:
             tunnel.stop()
 
 
+class SqlDialect:
+    """Oracle SQL fragments; embedded engines override what differs."""
+
+    name = "oracle"
+    ping_query = "SELECT 1 FROM dual"
+
+    def Nvl(self, expr: str, default: str) -> str:
+        return f"NVL({expr}, {default})"
+
+    def MonthOf(self, expr: str) -> str:
+        return f"TO_CHAR({expr}, 'YYYY-MM')"
+
+    def HourOf(self, expr: str) -> str:
+        return f"EXTRACT(HOUR FROM {expr})"
+
+    def MinutesBetween(self, end: str, start: str) -> str:
+        interval = f"({end} - {start})"
+        return (
+            f"(EXTRACT(DAY FROM {interval}) * 24 * 60) + "
+            f"(EXTRACT(HOUR FROM {interval}) * 60) + "
+            f"(EXTRACT(MINUTE FROM {interval})) + "
+            f"(EXTRACT(SECOND FROM {interval}) / 60)"
+        )
+
+    def Limit(self, count: str) -> str:
+        return f"FETCH FIRST {count} ROWS ONLY"
+
+
+class SqliteDialect(SqlDialect):
+    name = "sqlite"
+    ping_query = "SELECT 1"
+
+    def Nvl(self, expr: str, default: str) -> str:
+        return f"COALESCE({expr}, {default})"
+
+    def MonthOf(self, expr: str) -> str:
+        return f"strftime('%Y-%m', {expr})"
+
+    def HourOf(self, expr: str) -> str:
+        return f"CAST(strftime('%H', {expr}) AS INTEGER)"
+
+    def MinutesBetween(self, end: str, start: str) -> str:
+        return f"((julianday({end}) - julianday({start})) * 1440)"
+
+    def Limit(self, count: str) -> str:
+        return f"LIMIT {count}"
+
+
+class DuckDbDialect(SqliteDialect):
+    name = "duckdb"
+
+    def MonthOf(self, expr: str) -> str:
+        return f"strftime(CAST({expr} AS TIMESTAMP), '%Y-%m')"
+
+    def HourOf(self, expr: str) -> str:
+        return f"EXTRACT(HOUR FROM CAST({expr} AS TIMESTAMP))"
+
+    def MinutesBetween(self, end: str, start: str) -> str:
+        return (
+            f"(date_diff('second', CAST({start} AS TIMESTAMP), "
+            f"CAST({end} AS TIMESTAMP)) / 60.0)"
+        )
+
+
+class DbBackend:
+    dialect: SqlDialect = SqlDialect()
+
+    @contextmanager
+    def Connect(self) -> Iterator[Any]:
+        raise NotImplementedError
+
+
+class OracleBackend(DbBackend):
+    dialect = SqlDialect()
+
+    @contextmanager
+    def Connect(self) -> Iterator[Any]:
+        if not GetSettings().db_pool_enabled:
+            with _OracleConnection() as connection:
+                yield connection
+            return
+        with GetDbConnectionManager().Connection() as connection:
+            # Round trips on this session may only use the remaining request budget.
+            connection.call_timeout = _CallTimeoutMs()
+            yield connection
+
+
+def _BastionHosts(config: OracleDBConfig) -> list[BastionHost]:
+    return ParseBastionHosts(
+        GetSettings().bastion_hosts, config.bastion_host, config.bastion_port
+    )
+
+
+@lru_cache(maxsize=1)
+def GetDbConnectionManager() -> DbConnectionManager:
+    settings = GetSettings()
+    config = GetMysqlConfig()
+    _ValidateMysqlConfig(config)
+    bastions = _BastionHosts(config)
+    ValidateBastionConfig(config, bastions)
+    return DbConnectionManager(
+        config,
+        bastions,
+        pool_min=settings.db_pool_min,
+        pool_max=settings.db_pool_max,
+        acquire_timeout_sec=settings.db_pool_acquire_timeout_sec,
+        connect_timeout_sec=settings.db_call_timeout_sec,
+        health_interval_sec=settings.db_health_interval_sec,
+        rotate_after_failures=settings.db_rotate_after_failures,
+        standby=settings.db_tunnel_standby,
+        tunnel_keepalive_sec=settings.db_tunnel_keepalive_sec,
+    )
+
+
+class _CursorConnection:
+    """Gives DB-API connections without cursor context managers the Oracle shape."""
+
+    def __init__(self, connection: Any, cursor_factory: Any = None) -> None:
+        self._connection = connection
+        self._cursor_factory = cursor_factory
+
+    def cursor(self) -> Any:
+        if self._cursor_factory is not None:
+            return closing(self._cursor_factory(self._connection))
+        return closing(self._connection.cursor())
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+
+class SqliteBackend(DbBackend):
+    dialect = SqliteDialect()
+
+    def __init__(self, path: str, read_only: bool = False) -> None:
+        self._path = path
+        self._read_only = read_only
+
+    @contextmanager
+    def Connect(self) -> Iterator[Any]:
+        import sqlite3
+
+        CheckDeadline("db_connect")
+        if self._read_only:
+            connection = sqlite3.connect(
+                f"file:{self._path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            connection = sqlite3.connect(self._path, check_same_thread=False)
+        deadline = GetCurrentDeadline()
+        if deadline is not None:
+            # Abort long statements once the request budget is spent.
+            connection.set_progress_handler(lambda: int(deadline.Remaining() <= 0), 10000)
+        try:
+            yield _CursorConnection(connection)
+            connection.commit()
+        finally:
+            connection.close()
+
+
+_NAMED_BIND_PATTERN = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+class _DuckDbCursor:
+    def __init__(self, connection: Any) -> None:
+        self._cursor = connection.cursor()
+
+    def execute(self, query: str, params: Optional[dict[str, Any]] = None) -> Any:
+        names = set(_NAMED_BIND_PATTERN.findall(query))
+        converted = _NAMED_BIND_PATTERN.sub(r"$\1", query)
+        bound = {key: value for key, value in (params or {}).items() if key in names}
+        return self._cursor.execute(converted, bound)
+
+    def executemany(self, query: str, rows: list[dict[str, Any]]) -> Any:
+        converted = _NAMED_BIND_PATTERN.sub(r"$\1", query)
+        return self._cursor.executemany(converted, rows)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+
+class DuckDbBackend(DbBackend):
+    dialect = DuckDbDialect()
+
+    def __init__(self, path: str, read_only: bool = False) -> None:
+        self._path = path
+        self._read_only = read_only
+
+    @contextmanager
+    def Connect(self) -> Iterator[Any]:
+        try:
+            import duckdb  # type: ignore
+        except Exception as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("duckdb is required for DB_BACKEND=duckdb") from exc
+        CheckDeadline("db_connect")
+        connection = duckdb.connect(self._path, read_only=self._read_only)
+        try:
+            yield _CursorConnection(connection, _DuckDbCursor)
+        finally:
+            connection.close()
+
+
+DB_ROLE_PRIMARY = "primary"
+DB_ROLE_ANALYTICS = "analytics"
+
+
+def _CreateBackend(kind: str, path: str, read_only: bool) -> DbBackend:
+    kind = (kind or "oracle").strip().lower()
+    if kind == "oracle":
+        return OracleBackend()
+    if kind == "sqlite":
+        return SqliteBackend(path, read_only=read_only)
+    if kind == "duckdb":
+        return DuckDbBackend(path, read_only=read_only)
+    raise RuntimeError(f"Unsupported DB_BACKEND: {kind}")
+
+
+@lru_cache(maxsize=None)
+def GetDbBackend(role: str = DB_ROLE_PRIMARY) -> DbBackend:
+    settings = GetSettings()
+    if role == DB_ROLE_ANALYTICS and settings.db_analytics_backend:
+        return _CreateBackend(
+            settings.db_analytics_backend,
+            settings.db_analytics_path or settings.db_path,
+            read_only=True,
+        )
+    return _CreateBackend(settings.db_backend, settings.db_path, read_only=False)
+
+
+def GetDialect(role: str = DB_ROLE_PRIMARY) -> SqlDialect:
+    return GetDbBackend(role).dialect
+
+
+@contextmanager
+def MysqlConnection(role: str = DB_ROLE_PRIMARY) -> Iterator[Any]:
+    with GetDbBackend(role).Connect() as connection:
+        yield connection
+
+
+def OracleInUse() -> bool:
+    return any(
+        isinstance(GetDbBackend(role), OracleBackend)
+        for role in (DB_ROLE_PRIMARY, DB_ROLE_ANALYTICS)
+    )
+
+
+def OraclePoolInUse() -> bool:
+    return GetSettings().db_pool_enabled and OracleInUse()
+
+
+def BuiltDbConnectionManager() -> Optional[DbConnectionManager]:
+    """The pool manager if something already built it; never validates config."""
+    if not OraclePoolInUse() or GetDbConnectionManager.cache_info().currsize == 0:
+        return None
+    return GetDbConnectionManager()
+
+
+def DbPoolSnapshot() -> Optional[dict[str, Any]]:
+    """Pool state for /health and /metrics, which must not fail on the DB's account."""
+    try:
+        manager = BuiltDbConnectionManager()
+        return manager.Snapshot() if manager is not None else None
+    except Exception as exc:
+        return {"status": "error", "error": f"{exc.__class__.__name__}: {exc}"}
+
+
+def PingDb(role: str = DB_ROLE_PRIMARY) -> None:
+    """One trivial round trip, which opens the tunnel/pool or DB file on first use."""
+    backend = GetDbBackend(role)
+    with backend.Connect() as connection:
+        with connection.cursor() as cursor:
+            ExecuteQuery(cursor, "ping", backend.dialect.ping_query, {}, expected_rows=1)
+            cursor.fetchall()
+
+
 def FetchOneDict(cursor: Any) -> dict[str, Any]:
     row = cursor.fetchone()
     return _ToDictRow(cursor, row)
@@ -174,3 +465,51 @@ def FetchAllDicts(cursor: Any) -> list[dict[str, Any]]:
     rows = cursor.fetchall()
     return _ToDictRows(cursor, rows)
 
+
+def FetchRows(cursor: Any) -> dict[str, Any]:
+    """Compact result: column names once plus the driver's row tuples as-is."""
+    rows = cursor.fetchall()
+    return {"columns": list(_CursorColumns(cursor)), "rows": rows or []}
+
+
+def ExecuteQuery(
+    cursor: Any,
+    statement: str,
+    query: str,
+    params: dict[str, Any],
+    expected_rows: Optional[int] = None,
+) -> None:
+    _TuneFetch(cursor, expected_rows)
+    with ObserveStage("sql", statement):
+        cursor.execute(query, params)
+
+
+# Oracle caps an IN list at 1000 expressions; pad chunks to a few fixed sizes
+# so the statement cache sees a handful of texts instead of one per length.
+_IN_LIST_SIZES = (8, 32, 128, 500)
+
+
+def ChunkInValues(values: list[Any]) -> Iterator[list[Any]]:
+    unique = list(dict.fromkeys(values))
+    step = _IN_LIST_SIZES[-1]
+    for start in range(0, len(unique), step):
+        yield unique[start:start + step]
+
+
+def InClause(column: str, values: list[Any], prefix: str = "in") -> tuple[str, dict[str, Any]]:
+    if not values:
+        raise ValueError("InClause requires at least one value")
+    size = next((size for size in _IN_LIST_SIZES if size >= len(values)), len(values))
+    padded = list(values) + [values[-1]] * (size - len(values))
+    names = [f"{prefix}{index}" for index in range(size)]
+    placeholders = ", ".join(f":{name}" for name in names)
+    return f"{column} IN ({placeholders})", dict(zip(names, padded))
+
+
+def ExecuteMany(
+    cursor: Any, statement: str, query: str, rows: list[dict[str, Any]]
+) -> None:
+    if not rows:
+        return
+    with ObserveStage("sql", statement):
+        cursor.executemany(query, rows)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import contextvars
+from functools import lru_cache
+import logging
+import re
+import threading
+from typing import Any, Callable, Optional
+
+from app.config.config import GetSettings
+from app.core.metrics import CountEvent, ObserveStage
+
+
+logger = logging.getLogger(__name__)
+
+ToolExecutor = Callable[[dict[str, Any], int], dict[str, Any]]
+
+OUTCOME_HIT = "hit"
+OUTCOME_WASTED = "wasted"
+OUTCOME_FAILED = "failed"
+
+_SpeculationKey = tuple[str, str, Optional[str]]
+
+
+def _KeyFor(tool_name: str, args: dict[str, Any], user_id: int) -> _SpeculationKey:
+    match = re.search(r"(\d+)", str(args.get("user_id") or ""))
+    return (tool_name, match.group(1) if match else str(user_id), args.get("period") or None)
+
+
+class SpeculativeToolCall:
+    """A tool call started on the inferred intent while the first LLM call runs.
+
+    ``Claim`` hands the result over when the model asks for the same
+    (tool, user, period); otherwise ``Finish`` counts it as wasted. A wasted
+    call still runs to completion so the executor can cache its result.
+    """
+
+    def __init__(
+        self,
+        tool_name: str,
+        args: dict[str, Any],
+        user_id: int,
+        future: Future,
+        stats: "SpeculationStats",
+    ) -> None:
+        self.tool_name = tool_name
+        self._key = _KeyFor(tool_name, args, user_id)
+        self._future = future
+        self._stats = stats
+        self.outcome: Optional[str] = None
+
+    def Claim(
+        self, tool_name: str, args: dict[str, Any], user_id: int
+    ) -> Optional[dict[str, Any]]:
+        """Return the speculative result if it answers this call, else None."""
+        if self.outcome is not None or _KeyFor(tool_name, args, user_id) != self._key:
+            return None
+        try:
+            result = self._future.result()
+        except Exception as exc:
+            # The caller runs the tool itself and surfaces the error normally.
+            logger.info("추측 도구 실행 실패 name=%s error=%s", tool_name, exc)
+            self._Settle(OUTCOME_FAILED)
+            return None
+        self._Settle(OUTCOME_HIT)
+        return result
+
+    def Finish(self) -> None:
+        if self.outcome is None:
+            self._Settle(OUTCOME_WASTED)
+
+    def _Settle(self, outcome: str) -> None:
+        self.outcome = outcome
+        self._stats.Record(outcome)
+        CountEvent(f"speculation_{outcome}")
+
+
+class SpeculationStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = {
+            "started": 0,
+            "skipped": 0,
+            OUTCOME_HIT: 0,
+            OUTCOME_WASTED: 0,
+            OUTCOME_FAILED: 0,
+        }
+
+    def Record(self, outcome: str) -> None:
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def Snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        settled = counts[OUTCOME_HIT] + counts[OUTCOME_WASTED] + counts[OUTCOME_FAILED]
+        counts["hit_rate"] = round(counts[OUTCOME_HIT] / settled, 4) if settled else 0.0
+        counts["waste_rate"] = round(counts[OUTCOME_WASTED] / settled, 4) if settled else 0.0
+        return counts
+
+
+class ToolSpeculator:
+    """Runs speculative tool calls on a small bounded pool.
+
+    At most ``max_in_flight`` calls run at once; when the pool is busy the
+    turn simply does not speculate, so a burst never queues DB work behind
+    guesses.
+    """
+
+    def __init__(self, max_in_flight: int) -> None:
+        self._max_in_flight = max(1, max_in_flight)
+        self._slots = threading.BoundedSemaphore(self._max_in_flight)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_in_flight, thread_name_prefix="speculate"
+        )
+        self.stats = SpeculationStats()
+
+    def Start(
+        self,
+        tool_executor: ToolExecutor,
+        tool_call: dict[str, Any],
+        args: dict[str, Any],
+        user_id: int,
+    ) -> Optional[SpeculativeToolCall]:
+        tool_name = (tool_call.get("function") or {}).get("name") or ""
+        if not self._slots.acquire(blocking=False):
+            self.stats.Record("skipped")
+            CountEvent("speculation_skipped")
+            return None
+        # The copied context carries the request deadline and Server-Timing collector.
+        context = contextvars.copy_context()
+        try:
+            future = self._executor.submit(
+                context.run, self._Run, tool_executor, tool_call, tool_name, user_id
+            )
+        except RuntimeError:
+            self._slots.release()
+            return None
+        self.stats.Record("started")
+        CountEvent("speculation_started")
+        return SpeculativeToolCall(tool_name, args, user_id, future, self.stats)
+
+    def _Run(
+        self, tool_executor: ToolExecutor, tool_call: dict[str, Any], tool_name: str, user_id: int
+    ) -> dict[str, Any]:
+        try:
+            with ObserveStage("speculative_tool", tool_name):
+                return tool_executor(tool_call, user_id)
+        finally:
+            self._slots.release()
+
+    def Snapshot(self) -> dict[str, Any]:
+        snapshot = self.stats.Snapshot()
+        snapshot["max_in_flight"] = self._max_in_flight
+        return snapshot
+
+
+@lru_cache(maxsize=1)
+def GetToolSpeculator() -> ToolSpeculator:
+    return ToolSpeculator(GetSettings().llm_speculative_max_in_flight)
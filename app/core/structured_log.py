@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import atexit
+import copy
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Iterator, Optional
+import zlib
+
+from app.core.json_codec import EncodeJson
+from app.core.metrics import CountEvent
+
+
+# Loggers whose records are kept for only ``log_sample_rate`` of requests.
+SAMPLED_LOGGER_SUFFIX = ".calls"
+
+_request_id: ContextVar[str] = ContextVar("request_id", default="")
+
+_RECORD_FIELDS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def CurrentRequestId() -> str:
+    return _request_id.get()
+
+
+@contextmanager
+def BindRequestId(request_id: str) -> Iterator[None]:
+    token = _request_id.set(request_id)
+    try:
+        yield
+    finally:
+        _request_id.reset(token)
+
+
+def TruncateForLog(value: Any, limit: int) -> str:
+    """``value`` as text, cut to ``limit`` characters with the dropped length noted."""
+    text = value if isinstance(value, str) else str(value)
+    if limit <= 0 or len(text) <= limit:
+        return text
+    return f"{text[:limit]}...(+{len(text) - limit} chars)"
+
+
+class _RequestContextFilter(logging.Filter):
+    """Stamps the request id and drops unsampled per-call lines on the caller's thread."""
+
+    def __init__(self, sample_rate: float) -> None:
+        super().__init__()
+        self._threshold = int(max(0.0, min(1.0, sample_rate)) * 10000)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = _request_id.get()
+        record.request_id = request_id
+        if not record.name.endswith(SAMPLED_LOGGER_SUFFIX) or record.levelno > logging.INFO:
+            return True
+        # Keyed on the request id so a sampled request keeps all of its lines.
+        bucket = zlib.crc32(request_id.encode()) if request_id else random.getrandbits(32)
+        if bucket % 10000 < self._threshold:
+            return True
+        _stats["sampled_out"] += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``extra=`` fields are kept as top-level keys."""
+
+    def __init__(self, max_message_chars: int) -> None:
+        super().__init__()
+        self._max_message_chars = max_message_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": TruncateForLog(record.getMessage(), self._max_message_chars),
+        }
+        request_id = getattr(record, "request_id", "")
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key != "request_id":
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return EncodeJson(entry).decode("utf-8")
+
+
+class _TextFormatter(logging.Formatter):
+    def __init__(self, max_message_chars: int) -> None:
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] - %(message)s")
+        self._max_message_chars = max_message_chars
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = TruncateForLog(record.message, self._max_message_chars)
+        return super().formatMessage(record)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the request thread: a full queue drops the record and counts it."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (they may change after we return) but leave the
+        # layout, truncation and traceback rendering to the output formatter.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _stats["dropped"] += 1
+            CountEvent("log_dropped")
+
+
+_stats: dict[str, int] = {"dropped": 0, "sampled_out": 0}
+_state_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue: Optional[queue.Queue] = None
+
+
+def BuildFormatter(settings: Any) -> logging.Formatter:
+    if settings.log_format == "json":
+        return JsonFormatter(settings.log_max_message_chars)
+    return _TextFormatter(settings.log_max_message_chars)
+
+
+def StartLogging(settings: Any, stream: Any = None) -> None:
+    """Route the root logger through a bounded queue drained by one writer thread.
+
+    Request threads only format the record and enqueue it; the listener
+    thread does the stream I/O, so a slow stdout or log collector can no
+    longer stall requests. Idempotent: later calls keep the first setup.
+    """
+    global _listener, _queue
+    with _state_lock:
+        if _listener is not None:
+            return
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(BuildFormatter(settings))
+        _queue = queue.Queue(maxsize=max(1, settings.log_queue_size))
+        handler = _DroppingQueueHandler(_queue)
+        handler.addFilter(_RequestContextFilter(settings.log_sample_rate))
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(settings.log_level.upper())
+        _listener = logging.handlers.QueueListener(_queue, output, respect_handler_level=True)
+        _listener.start()
+    atexit.register(StopLogging)
+
+
+def StopLogging(timeout_sec: float = 5.0) -> None:
+    """Flush what is queued and stop the writer thread."""
+    global _listener
+    with _state_lock:
+        listener, _listener = _listener, None
+    if listener is None:
+        return
+    deadline = time.monotonic() + timeout_sec
+    while listener.queue.qsize() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        listener.stop()
+    except queue.Full:
+        # Still backed up after the timeout; the daemon writer dies with the process.
+        pass
+
+
+def LoggingSnapshot() -> dict[str, Any]:
+    return {
+        "queued": _queue.qsize() if _queue is not None else 0,
+        "dropped": _stats["dropped"],
+        "sampled_out": _stats["sampled_out"],
+    }
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+import hashlib
+import hmac
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Iterator, Optional
+import uuid
+
+from app.config.config import GetSettings
+from app.core.audit_log import JsonlSink
+from app.core.json_codec import DecodeJson
+from app.core.metrics import GetRequestTimings
+from app.core.structured_log import CurrentRequestId
+from app.core.write_behind import BatchWriter
+
+
+logger = logging.getLogger(__name__)
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE_RE = re.compile(r"\b01[016789][-\s]?\d{3,4}[-\s]?\d{4}\b")
+_LONG_NUMBER_RE = re.compile(r"\d{6,}")
+
+_current: ContextVar[Optional["TurnRecording"]] = ContextVar("traffic_recording", default=None)
+
+
+def MaskText(text: str) -> str:
+    """Masks e-mail addresses, phone numbers and long digit runs (card, account, ids).
+
+    Best effort only: names, addresses, short ids and anything else the user
+    typed are kept as written.
+    """
+    text = _EMAIL_RE.sub("<email>", text)
+    text = _PHONE_RE.sub("<phone>", text)
+    return _LONG_NUMBER_RE.sub("<num>", text)
+
+
+def _MaskArgs(args: Any) -> dict[str, Any]:
+    if not isinstance(args, dict):
+        return {}
+    return {
+        key: MaskText(value) if isinstance(value, str) else value
+        for key, value in args.items()
+        if key != "user_id"
+    }
+
+
+def _ToolCalls(message: dict[str, Any]) -> list[dict[str, Any]]:
+    calls: list[dict[str, Any]] = []
+    for call in message.get("tool_calls") or []:
+        function = call.get("function") or {}
+        arguments = function.get("arguments")
+        if isinstance(arguments, str):
+            try:
+                arguments = DecodeJson(arguments)
+            except ValueError:
+                arguments = {}
+        calls.append({"name": function.get("name"), "args": _MaskArgs(arguments)})
+    return calls
+
+
+class TurnRecording:
+    """The LLM calls and tool executions of one recorded turn, in order."""
+
+    def __init__(self, user: str, session: Optional[str], message: str) -> None:
+        self.turn_id = uuid.uuid4().hex
+        self.user = user
+        self.session = session
+        self.message = message
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events: list[dict[str, Any]] = []
+
+    def _Add(self, event: dict[str, Any], elapsed_sec: float) -> None:
+        event["offset_ms"] = round((time.perf_counter() - self._started - elapsed_sec) * 1000, 1)
+        event["elapsed_ms"] = round(elapsed_sec * 1000, 1)
+        with self._lock:
+            self._events.append(event)
+
+    def AddLlmCall(
+        self,
+        payload: dict[str, Any],
+        elapsed_sec: float,
+        status: int,
+        body: Optional[bytes],
+        error: Optional[str] = None,
+    ) -> None:
+        messages = payload.get("messages") or []
+        request = {
+            "model": payload.get("model"),
+            "messages": len(messages),
+            "roles": [item.get("role") for item in messages],
+            "chars": sum(len(str(item.get("content") or "")) for item in messages),
+            "max_tokens": payload.get("max_tokens"),
+            "tools": [
+                (tool.get("function") or {}).get("name") for tool in payload.get("tools") or []
+            ],
+            "stream": bool(payload.get("stream")),
+            "guided": "response_format" in payload or "guided_json" in payload,
+        }
+        response: dict[str, Any] = {"status": status}
+        if error is not None:
+            response["error"] = error
+        elif body and 200 <= status < 300:
+            try:
+                data = DecodeJson(body)
+            except ValueError:
+                data = {}
+            choice = (data.get("choices") or [{}])[0]
+            message = choice.get("message") or {}
+            response.update(
+                finish_reason=choice.get("finish_reason"),
+                content_chars=len(message.get("content") or ""),
+                tool_calls=_ToolCalls(message),
+                usage=data.get("usage"),
+            )
+        self._Add({"type": "llm", "request": request, "response": response}, elapsed_sec)
+
+    def AddTool(
+        self,
+        name: str,
+        args: dict[str, Any],
+        elapsed_sec: float,
+        result_bytes: int,
+        error: Optional[str] = None,
+    ) -> None:
+        self._Add(
+            {
+                "type": "tool",
+                "name": name,
+                "args": _MaskArgs(args),
+                "result_bytes": result_bytes,
+                "error": error,
+            },
+            elapsed_sec,
+        )
+
+    def ToEntry(self, status: str) -> dict[str, Any]:
+        timings = GetRequestTimings()
+        with self._lock:
+            events = sorted(self._events, key=lambda event: event["offset_ms"])
+        return {
+            "ts": self.started_at,
+            "turn_id": self.turn_id,
+            "request_id": CurrentRequestId() or None,
+            "user": self.user,
+            "session": self.session,
+            "message": self.message,
+            "status": status,
+            "elapsed_ms": round((time.perf_counter() - self._started) * 1000, 1),
+            "stages": {
+                metric: round(ms, 1) for metric, ms in timings.DurationsMs().items()
+            }
+            if timings is not None
+            else {},
+            "events": events,
+        }
+
+
+def CurrentRecording() -> Optional[TurnRecording]:
+    return _current.get()
+
+
+class TrafficRecorder:
+    """Samples turns into pseudonymized JSONL for ``bench/replay.py``.
+
+    User and session ids become keyed hashes and LLM payloads are reduced
+    to their shape (message count and roles, sizes, tools offered, tool
+    calls made, usage). The user's message is kept because the replay
+    re-sends it; ``MaskText`` removes only e-mail addresses, phone numbers
+    and long digit runs, so the files still hold personal data and must be
+    handled like the audit log. Writing is off the request thread; a full
+    queue drops the turn like the audit log does.
+    """
+
+    def __init__(
+        self, writer: Optional[BatchWriter], sample_rate: float, salt: bytes
+    ) -> None:
+        self._writer = writer
+        self._sample_rate = sample_rate
+        self._salt = salt
+
+    @property
+    def enabled(self) -> bool:
+        return self._writer is not None and self._sample_rate > 0
+
+    def _Pseudonym(self, prefix: str, value: Any) -> str:
+        digest = hmac.new(self._salt, str(value).encode("utf-8"), hashlib.sha256)
+        return f"{prefix}_{digest.hexdigest()[:16]}"
+
+    @contextmanager
+    def Turn(
+        self, user_id: int, session_id: Optional[str], content: str
+    ) -> Iterator[Optional[TurnRecording]]:
+        if not self.enabled or random.random() >= self._sample_rate:
+            yield None
+            return
+        recording = TurnRecording(
+            self._Pseudonym("u", user_id),
+            self._Pseudonym("s", session_id) if session_id else None,
+            MaskText(content),
+        )
+        token = _current.set(recording)
+        status = "ok"
+        try:
+            yield recording
+        except Exception as exc:
+            status = f"error:{exc.__class__.__name__}"
+            raise
+        finally:
+            _current.reset(token)
+            self._writer.Submit(recording.ToEntry(status))
+
+    def Stop(self) -> None:
+        if self._writer is not None:
+            self._writer.Stop()
+
+    def Snapshot(self) -> dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        return {"enabled": True, "sample_rate": self._sample_rate, **self._writer.Snapshot()}
+
+
+@lru_cache(maxsize=1)
+def GetTrafficRecorder() -> TrafficRecorder:
+    settings = GetSettings()
+    # Without a configured salt, pseudonyms are stable only within this process.
+    salt = settings.traffic_record_salt.encode("utf-8") or os.urandom(16)
+    if settings.traffic_record_rate <= 0:
+        return TrafficRecorder(None, 0.0, salt)
+    logger.warning(
+        "트래픽 기록 활성화 rate=%s dir=%s: 메시지 원문은 일부만 마스킹되어 저장됩니다",
+        settings.traffic_record_rate,
+        settings.traffic_record_dir,
+    )
+    sink = JsonlSink(
+        # One file per process: app.server workers must not interleave rotations.
+        os.path.join(settings.traffic_record_dir, f"traffic-{os.getpid()}.jsonl"),
+        max_bytes=settings.traffic_record_max_bytes,
+        backups=settings.audit_jsonl_backups,
+    )
+    writer = BatchWriter(
+        "traffic_record",
+        sink,
+        max_queue=settings.audit_queue_size,
+        batch_size=settings.audit_batch_size,
+        flush_interval_sec=settings.audit_flush_interval_sec,
+    )
+    return TrafficRecorder(writer, min(1.0, settings.traffic_record_rate), salt)
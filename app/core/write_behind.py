@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from app.core.metrics import CountEvent, RecordStage
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BatchWriter(Generic[T]):
+    """Bounded queue drained by a daemon thread that hands batches to a sink.
+
+    ``Submit`` never blocks: when the queue is full the item is dropped and
+    counted, so request threads only pay for a ``put_nowait``. The worker
+    flushes when ``batch_size`` items are pending or ``flush_interval_sec``
+    has passed since the first pending item, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sink: Callable[[list[T]], None],
+        max_queue: int = 10000,
+        batch_size: int = 100,
+        flush_interval_sec: float = 1.0,
+    ) -> None:
+        self._name = name
+        self._sink = sink
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_queue))
+        self._batch_size = max(1, batch_size)
+        self._flush_interval_sec = max(0.01, flush_interval_sec)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._flush_requests: "queue.Queue[threading.Event]" = queue.Queue()
+        self._submitted = 0
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+        self._batches = 0
+
+    def Start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._Run, name=f"write-behind-{self._name}", daemon=True
+            )
+            self._thread.start()
+
+    def Submit(self, item: T) -> bool:
+        if self._thread is None:
+            self.Start()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            CountEvent(f"{self._name}_dropped")
+            return False
+        with self._lock:
+            self._submitted += 1
+        return True
+
+    def Flush(self, timeout_sec: float = 5.0) -> bool:
+        """Block until everything submitted so far has reached the sink."""
+        if self._thread is None or not self._thread.is_alive():
+            self._Drain()
+            return True
+        done = threading.Event()
+        self._flush_requests.put(done)
+        return done.wait(timeout_sec)
+
+    def Stop(self, timeout_sec: float = 5.0) -> None:
+        thread = self._thread
+        if thread is None:
+            self._Drain()
+            return
+        self._stopping.set()
+        thread.join(timeout_sec)
+        with self._lock:
+            self._thread = None
+        # Anything left after the join (slow sink) is written inline.
+        self._Drain()
+
+    def Snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self._name,
+                "queued": self._queue.qsize(),
+                "submitted": self._submitted,
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "batches": self._batches,
+                "running": self._thread is not None and self._thread.is_alive(),
+            }
+
+    def _Run(self) -> None:
+        pending: list[T] = []
+        first_pending_at = 0.0
+        while True:
+            if pending:
+                wait_sec = max(0.0, first_pending_at + self._flush_interval_sec - time.monotonic())
+            else:
+                wait_sec = self._flush_interval_sec
+            try:
+                # Short polls so Flush/Stop requests are noticed promptly.
+                item = self._queue.get(timeout=min(wait_sec, 0.1))
+            except queue.Empty:
+                pass
+            else:
+                if not pending:
+                    first_pending_at = time.monotonic()
+                pending.append(item)
+                pending.extend(self._TakeQueued(self._batch_size - len(pending)))
+            waiters = self._TakeFlushRequests()
+            stopping = self._stopping.is_set()
+            due = bool(pending) and (
+                time.monotonic() - first_pending_at >= self._flush_interval_sec
+            )
+            if waiters or stopping:
+                pending.extend(self._TakeQueued())
+            if pending and (len(pending) >= self._batch_size or due or waiters or stopping):
+                for start in range(0, len(pending), self._batch_size):
+                    self._Write(pending[start:start + self._batch_size])
+                pending = []
+            for waiter in waiters:
+                waiter.set()
+            if stopping and self._queue.empty():
+                return
+
+    def _TakeQueued(self, limit: Optional[int] = None) -> list[T]:
+        items: list[T] = []
+        while limit is None or len(items) < limit:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _TakeFlushRequests(self) -> list[threading.Event]:
+        waiters: list[threading.Event] = []
+        while True:
+            try:
+                waiters.append(self._flush_requests.get_nowait())
+            except queue.Empty:
+                return waiters
+
+    def _Drain(self) -> None:
+        items = self._TakeQueued()
+        for start in range(0, len(items), self._batch_size):
+            self._Write(items[start:start + self._batch_size])
+
+    def _Write(self, batch: list[T]) -> None:
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            self._sink(batch)
+        except Exception:
+            logger.exception("write-behind 배치 기록 실패 name=%s size=%s", self._name, len(batch))
+            with self._lock:
+                self._failed += len(batch)
+            CountEvent(f"{self._name}_write_failed")
+            return
+        finally:
+            RecordStage("write_behind", time.perf_counter() - started, self._name)
+        with self._lock:
+            self._written += len(batch)
+            self._batches += 1
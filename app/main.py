@@ -1,8 +1,74 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+import time
+from typing import AsyncIterator
+import uuid
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1 import router as api_router
 from app.config.config import ConfigureLogging, GetSettings
+from app.core.admission import GetAdmissionController
+from app.core.audit_log import GetAuditLog
+from app.core.chat_sessions import GetChatSessionStore
+from app.core.llm_service import GetLlmService
+from app.core.metrics import (
+    BindRequestTimings,
+    RecordStage,
+    RenderMetrics,
+    RequestTimings,
+    UpdateAdmissionGauges,
+    UpdateBreakerGauges,
+    UpdateDbGauges,
+    UpdateEndpointGauges,
+)
+from app.core.rate_limit import GetUserRateLimiter
+from app.core.services_db import BuiltDbConnectionManager, DbPoolSnapshot
+from app.core.speculation import GetToolSpeculator
+from app.core.structured_log import BindRequestId, LoggingSnapshot, StopLogging
+from app.core.traffic_record import GetTrafficRecorder
+from app.sandbox.micro_batch import MicroBatchSnapshot
+from app.services.prefetch import GetPrefetchWorker
+from app.services.tool_cache import GetToolResultCache
+from app.services.warmup import GetReadiness
+
+
+API_PREFIX = "/api"
+
+
+def _RouteLabel(request: Request) -> str:
+    """Route template for metric labels; raw paths would add a series per unknown URL."""
+    route = request.scope.get("route")
+    path = getattr(route, "path", None)
+    if not path:
+        return "unmatched"
+    # Routes added by include_router carry the prefix; newer FastAPI releases put the
+    # router's original (unprefixed) route in the scope instead, so add it when missing.
+    return path if path.startswith(f"{API_PREFIX}/") else f"{API_PREFIX}{path}"
+
+
+@asynccontextmanager
+async def Lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = GetSettings()
+    if settings.warmup_enabled:
+        # Uvicorn accepts connections only after this returns, so warm-up is
+        # capped by the budget; anything slower keeps going and shows on /ready.
+        await asyncio.to_thread(GetReadiness().Run, settings.warmup_budget_sec)
+    if settings.prefetch_enabled:
+        GetPrefetchWorker().Start()
+    try:
+        yield
+    finally:
+        GetReadiness().Stop()
+        GetPrefetchWorker().Stop()
+        GetChatSessionStore().Stop()
+        GetAuditLog().Stop()
+        GetTrafficRecorder().Stop()
+        db_manager = BuiltDbConnectionManager()
+        if db_manager is not None:
+            db_manager.Stop()
+        StopLogging()
 
 
 def CreateApp() -> FastAPI:
@@ -12,6 +78,7 @@ def CreateApp() -> FastAPI:
     app = FastAPI(
         title=settings.app_name,
         version=settings.app_version,
+        lifespan=Lifespan,
     )
 
     app.add_middleware(
@@ -22,15 +89,65 @@ def CreateApp() -> FastAPI:
         allow_headers=["*"],
     )
 
-    app.include_router(api_router, prefix="/api")
+    @app.middleware("http")
+    async def ServerTiming(request: Request, call_next):
+        timings = RequestTimings()
+        started = time.perf_counter()
+        request_id = request.headers.get(settings.request_id_header, "")[:64] or uuid.uuid4().hex
+        with BindRequestTimings(timings), BindRequestId(request_id):
+            response = await call_next(request)
+        elapsed = time.perf_counter() - started
+        if request.url.path.startswith(f"{API_PREFIX}/"):
+            RecordStage("request", elapsed, _RouteLabel(request))
+        timings.Add("total", "", elapsed)
+        response.headers["Server-Timing"] = timings.Header()
+        response.headers[settings.request_id_header] = request_id
+        return response
+
+    app.include_router(api_router, prefix=API_PREFIX)
+
+    @app.get("/ready")
+    def Ready(response: Response) -> dict:
+        if not settings.warmup_enabled:
+            return {"ready": True, "components": {}}
+        ready, components = GetReadiness().Check()
+        if not ready:
+            response.status_code = 503
+        return {"ready": ready, "components": components}
 
     @app.get("/health")
     def Health() -> dict:
         return {
             "status": "ok",
             "model_id": settings.model_id,
+            "llm_endpoints": GetLlmService().EndpointSnapshot(),
+            "llm_breaker": GetLlmService().BreakerSnapshot(),
+            "admission": GetAdmissionController().Snapshot(),
+            "rate_limit": GetUserRateLimiter().Snapshot(),
+            "chat_sessions": GetChatSessionStore().Snapshot(),
+            "audit": GetAuditLog().Snapshot(),
+            "traffic_record": GetTrafficRecorder().Snapshot(),
+            "tool_cache": GetToolResultCache().Snapshot(),
+            "prefetch": GetPrefetchWorker().Snapshot(),
+            "speculation": GetToolSpeculator().Snapshot(),
+            "micro_batch": MicroBatchSnapshot(),
+            "db": DbPoolSnapshot(),
+            "logging": LoggingSnapshot(),
         }
 
+    @app.get("/metrics")
+    def Metrics() -> Response:
+        UpdateAdmissionGauges(GetAdmissionController().Snapshot())
+        UpdateEndpointGauges(GetLlmService().EndpointSnapshot())
+        breaker = GetLlmService().BreakerSnapshot()
+        if breaker is not None:
+            UpdateBreakerGauges(breaker)
+        db = DbPoolSnapshot()
+        if db is not None and "error" not in db:
+            UpdateDbGauges(db)
+        body, content_type = RenderMetrics()
+        return Response(content=body, media_type=content_type)
+
     return app
 
 
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Optional
+
+from app.config.config import GetSettings
+from app.core.deadline import DeadlineExceeded, RemainingTimeout
+from app.core.metrics import CountEvent
+
+
+# (user_ids, period) -> {user_id: result}; users missing from the dict get None.
+BulkFetch = Callable[[list[str], str], dict[str, Any]]
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.user_ids: set[str] = set()
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results: dict[str, Any] = {}
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-user lookups into one grouped query.
+
+    The first caller for a period opens a batch and becomes its leader: it
+    waits up to ``window_sec`` (or until ``max_batch`` users joined), runs
+    ``fetch`` once for everyone and hands each caller its own row. There is
+    no background thread, and a leader with no other lookup in flight runs at
+    once, so an idle server never pays the window.
+    """
+
+    def __init__(self, name: str, fetch: BulkFetch, window_sec: float, max_batch: int) -> None:
+        self.name = name
+        self._fetch = fetch
+        self._window_sec = max(0.0, window_sec)
+        self._max_batch = max(1, max_batch)
+        self._lock = threading.Lock()
+        self._open: dict[str, _Batch] = {}
+        self._batches = 0
+        self._callers = 0
+        self._in_flight = 0
+        self._max_seen = 0
+
+    def Fetch(self, user_id: Any, period: str) -> Any:
+        key = str(user_id)
+        with self._lock:
+            self._callers += 1
+            self._in_flight += 1
+            # Alone means nobody is likely to join within the window.
+            wait = self._in_flight > 1
+            batch = self._open.get(period)
+            leader = batch is None
+            if batch is None:
+                batch = self._open[period] = _Batch()
+            batch.user_ids.add(key)
+            if len(batch.user_ids) >= self._max_batch:
+                # Closed to newcomers; the next caller opens a fresh batch.
+                del self._open[period]
+                batch.full.set()
+        try:
+            return self._Await(batch, key, period, leader, wait)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _Await(self, batch: _Batch, key: str, period: str, leader: bool, wait: bool) -> Any:
+        if leader:
+            self._RunBatch(batch, period, wait)
+        else:
+            CountEvent("micro_batch_coalesced")
+            timeout = RemainingTimeout(f"batch:{self.name}", self._FollowerTimeout())
+            if not batch.done.wait(timeout):
+                CountEvent("micro_batch_follower_timeout")
+                return self._fetch([key], period).get(key)
+        if batch.error is not None:
+            if not leader and isinstance(batch.error, DeadlineExceeded):
+                # The leader ran out of its own budget; ours may still have room.
+                return self._fetch([key], period).get(key)
+            raise batch.error
+        return batch.results.get(key)
+
+    def _RunBatch(self, batch: _Batch, period: str, wait: bool) -> None:
+        if wait and self._window_sec:
+            batch.full.wait(self._window_sec)
+        with self._lock:
+            if self._open.get(period) is batch:
+                del self._open[period]
+            user_ids = sorted(batch.user_ids)
+            self._batches += 1
+            self._max_seen = max(self._max_seen, len(user_ids))
+        CountEvent("micro_batch_query")
+        try:
+            batch.results = self._fetch(user_ids, period)
+        except BaseException as exc:
+            batch.error = exc
+        finally:
+            batch.done.set()
+
+    def _FollowerTimeout(self) -> float:
+        return self._window_sec + GetSettings().db_call_timeout_sec
+
+    def Snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "callers": self._callers,
+                "avg_batch": round(self._callers / self._batches, 2) if self._batches else 0.0,
+                "max_batch": self._max_seen,
+            }
+
+
+_batchers: dict[str, MicroBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def BatchedFetch(name: str, fetch: BulkFetch, user_id: Any, period: str) -> Any:
+    """``fetch([user_id], period)[user_id]``, coalesced with concurrent callers of ``name``."""
+    settings = GetSettings()
+    if settings.db_micro_batch_window_ms <= 0 or name not in settings.db_micro_batch_queries:
+        return fetch([str(user_id)], period).get(str(user_id))
+    batcher = _batchers.get(name)
+    if batcher is None:
+        with _batchers_lock:
+            batcher = _batchers.get(name)
+            if batcher is None:
+                batcher = _batchers[name] = MicroBatcher(
+                    name,
+                    fetch,
+                    settings.db_micro_batch_window_ms / 1000,
+                    settings.db_micro_batch_max_users,
+                )
+    return batcher.Fetch(user_id, period)
+
+
+def MicroBatchSnapshot() -> dict[str, Any]:
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+    return {batcher.name: batcher.Snapshot() for batcher in batchers}
@@ -1,21 +1,33 @@
 from app.sandbox.queries.bikes import GetAvailableBikesFromDb
-from app.sandbox.queries.payments import GetPaymentsFromDb
-from app.sandbox.queries.rentals import GetRentalsFromDb
+from app.sandbox.queries.history import GetHistoryDigestFromDb
+from app.sandbox.queries.payments import GetPaymentsFromDb, GetPaymentsPageFromDb
+from app.sandbox.queries.rentals import GetRentalsFromDb, GetRentalsPageFromDb
 from app.sandbox.queries.summaries import (
     GetPricingSummaryFromDb,
+    GetPricingSummaryForUsers,
     GetTotalPaymentFromDb,
+    GetTotalPaymentsForUsers,
     GetUsageSummaryFromDb,
+    GetUsageSummaryForUsers,
     GetTotalUsageFromDb,
+    GetTotalUsageForUsers,
 )
 from app.sandbox.queries.users import GetUserProfileFromDb
 
 __all__ = [
     "GetAvailableBikesFromDb",
+    "GetHistoryDigestFromDb",
     "GetPaymentsFromDb",
+    "GetPaymentsPageFromDb",
     "GetRentalsFromDb",
+    "GetRentalsPageFromDb",
     "GetPricingSummaryFromDb",
+    "GetPricingSummaryForUsers",
     "GetTotalPaymentFromDb",
+    "GetTotalPaymentsForUsers",
     "GetUsageSummaryFromDb",
+    "GetUsageSummaryForUsers",
     "GetTotalUsageFromDb",
+    "GetTotalUsageForUsers",
     "GetUserProfileFromDb",
 ]
@@ -1,10 +1,18 @@
 from typing import Any
 
-from app.core.services_db import FetchAllDicts, GetMysqlConfig, MysqlConnection
+from app.core.services_db import (
+    ExecuteQuery,
+    FetchAllDicts,
+    FetchRows,
+    GetDialect,
+    GetMysqlConfig,
+    MysqlConnection,
+)
 
 
-def GetAvailableBikesFromDb(limit: int = 10) -> list[dict[str, Any]]:
+def GetAvailableBikesFromDb(limit: int = 10, compact: bool = False) -> Any:
     config = GetMysqlConfig()
+    dialect = GetDialect()
     query = (
         "SELECT "
         "bike_id, "
@@ -17,9 +25,11 @@ def GetAvailableBikesFromDb(limit: int = 10) -> list[dict[str, Any]]:
         f"FROM {config.bikes_table} "
         "WHERE status = 'AVAILABLE' "
         "ORDER BY updated_at DESC "
-        "FETCH FIRST :limit ROWS ONLY"
+        f"{dialect.Limit(':limit')}"
     )
     with MysqlConnection() as connection:
         with connection.cursor() as cursor:
-            cursor.execute(query, {"limit": limit})
-            return FetchAllDicts(cursor)
+            ExecuteQuery(
+                cursor, "available_bikes", query, {"limit": limit}, expected_rows=limit
+            )
+            return FetchRows(cursor) if compact else FetchAllDicts(cursor)
@@ -0,0 +1,133 @@
+from typing import Any, Optional
+
+from app.core.services_db import (
+    DB_ROLE_ANALYTICS,
+    ExecuteQuery,
+    FetchAllDicts,
+    FetchOneDict,
+    GetDialect,
+    GetMysqlConfig,
+    MysqlConnection,
+)
+from app.sandbox.sub_query.date import _ResolvePeriodFromText
+
+
+# (label, lower bound inclusive, upper bound exclusive); None means unbounded.
+_DISTANCE_BUCKETS_KM = (
+    ("lt_1km", None, 1),
+    ("1_3km", 1, 3),
+    ("3_5km", 3, 5),
+    ("5_10km", 5, 10),
+    ("gte_10km", 10, None),
+)
+_DURATION_BUCKETS_MIN = (
+    ("lt_10min", None, 10),
+    ("10_30min", 10, 30),
+    ("30_60min", 30, 60),
+    ("gte_60min", 60, None),
+)
+_TOP_BIKES = 3
+
+
+def _BucketColumns(expr: str, buckets: tuple, prefix: str) -> list[str]:
+    columns: list[str] = []
+    for label, lower, upper in buckets:
+        bounds = []
+        if lower is not None:
+            bounds.append(f"{expr} >= {lower}")
+        if upper is not None:
+            bounds.append(f"{expr} < {upper}")
+        columns.append(
+            f"SUM(CASE WHEN {' AND '.join(bounds)} THEN 1 ELSE 0 END) AS {prefix}_{label}"
+        )
+    return columns
+
+
+def _PopBuckets(row: dict[str, Any], buckets: tuple, prefix: str) -> dict[str, int]:
+    return {
+        label: int(row.pop(f"{prefix}_{label}", 0) or 0) for label, _, _ in buckets
+    }
+
+
+def GetHistoryDigestFromDb(user_id: str, period: Optional[str] = None) -> dict[str, Any]:
+    """Aggregate rental/payment statistics over the whole history or one month.
+
+    Everything is computed in the DB, so the result size does not grow with
+    the number of rides.
+    """
+    config = GetMysqlConfig()
+    dialect = GetDialect(DB_ROLE_ANALYTICS)
+    resolved_period = _ResolvePeriodFromText(period, user_id) if period else None
+    params: dict[str, Any] = {"user_id": user_id}
+    period_filter = ""
+    if resolved_period:
+        period_filter = f"AND {dialect.MonthOf('created_at')} = :period "
+        params["period"] = resolved_period
+
+    minutes = dialect.MinutesBetween(
+        dialect.Nvl("end_time", "created_at"),
+        dialect.Nvl("start_time", "created_at"),
+    )
+    distance = dialect.Nvl("total_distance", "0")
+    rentals_query = (
+        "SELECT "
+        "COUNT(rental_id) AS total_rides, "
+        f"{dialect.Nvl('ROUND(SUM(total_distance), 2)', '0')} AS total_distance_km, "
+        f"{dialect.Nvl('ROUND(AVG(total_distance), 2)', '0')} AS avg_distance_km, "
+        f"{dialect.Nvl(f'ROUND(SUM({minutes}))', '0')} AS total_minutes, "
+        f"{dialect.Nvl(f'ROUND(AVG({minutes}), 1)', '0')} AS avg_minutes, "
+        f"MIN({dialect.Nvl('start_time', 'created_at')}) AS first_ride_at, "
+        f"MAX({dialect.Nvl('start_time', 'created_at')}) AS last_ride_at, "
+        + ", ".join(
+            _BucketColumns(distance, _DISTANCE_BUCKETS_KM, "distance")
+            + _BucketColumns(minutes, _DURATION_BUCKETS_MIN, "duration")
+        )
+        + f" FROM {config.rentals_table} "
+        "WHERE user_id = :user_id "
+        f"{period_filter}"
+    )
+    top_bikes_query = (
+        "SELECT bike_id, COUNT(*) AS rides "
+        f"FROM {config.rentals_table} "
+        "WHERE user_id = :user_id "
+        f"{period_filter}"
+        "GROUP BY bike_id "
+        "ORDER BY COUNT(*) DESC, bike_id "
+        f"{dialect.Limit(str(_TOP_BIKES))}"
+    )
+    card_amount = "SUM(CASE WHEN payment_method = 'CARD' THEN amount ELSE 0 END)"
+    point_amount = "SUM(CASE WHEN payment_method = 'POINT' THEN amount ELSE 0 END)"
+    payments_query = (
+        "SELECT "
+        "COUNT(payment_id) AS total_payments, "
+        f"{dialect.Nvl('SUM(amount)', '0')} AS total_amount, "
+        f"{dialect.Nvl(card_amount, '0')} AS card_amount, "
+        f"{dialect.Nvl(point_amount, '0')} AS point_amount, "
+        "MIN(created_at) AS first_payment_at, "
+        "MAX(created_at) AS last_payment_at "
+        f"FROM {config.payments_table} "
+        "WHERE user_id = :user_id "
+        "AND payment_status = 'DONE' "
+        f"{period_filter}"
+    )
+    with MysqlConnection(DB_ROLE_ANALYTICS) as connection:
+        with connection.cursor() as cursor:
+            ExecuteQuery(cursor, "history_digest_rentals", rentals_query, params, expected_rows=1)
+            rentals = FetchOneDict(cursor) or {}
+            ExecuteQuery(
+                cursor, "history_digest_bikes", top_bikes_query, params, expected_rows=_TOP_BIKES
+            )
+            top_bikes = FetchAllDicts(cursor)
+            ExecuteQuery(
+                cursor, "history_digest_payments", payments_query, params, expected_rows=1
+            )
+            payments = FetchOneDict(cursor) or {}
+    rentals["distance_distribution"] = _PopBuckets(rentals, _DISTANCE_BUCKETS_KM, "distance")
+    rentals["duration_distribution"] = _PopBuckets(rentals, _DURATION_BUCKETS_MIN, "duration")
+    rentals["top_bikes"] = top_bikes
+    return {
+        "user_id": user_id,
+        "period": resolved_period or "all",
+        "rentals": rentals,
+        "payments": payments,
+    }
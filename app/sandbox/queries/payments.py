@@ -1,10 +1,33 @@
 from typing import Any, Optional
 
-from app.core.services_db import FetchAllDicts, GetMysqlConfig, MysqlConnection
+from app.core.services_db import (
+    ExecuteQuery,
+    FetchRows,
+    GetDialect,
+    GetMysqlConfig,
+    MysqlConnection,
+)
 
 
-def GetPaymentsFromDb(user_id: Optional[str] = None, limit: int = 50) -> list[dict[str, Any]]:
+def GetPaymentsFromDb(
+    user_id: Optional[str] = None, limit: int = 50, compact: bool = False
+) -> Any:
+    return GetPaymentsPageFromDb(user_id=user_id, limit=limit, compact=compact)[0]
+
+
+def GetPaymentsPageFromDb(
+    user_id: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[int] = None,
+    compact: bool = False,
+) -> tuple[Any, Optional[int]]:
+    """Newest-first page of payments strictly older than ``cursor`` (payment_id).
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    One extra row is fetched to tell whether another page exists.
+    """
     config = GetMysqlConfig()
+    dialect = GetDialect()
     query = (
         "SELECT "
         "r.payment_id, "
@@ -20,12 +43,28 @@ def GetPaymentsFromDb(user_id: Optional[str] = None, limit: int = 50) -> list[di
         f"FROM {config.payments_table} r "
         f"LEFT JOIN {config.users_table} u ON r.user_id = u.user_id "
     )
-    params: dict[str, Any] = {"limit": limit}
+    params: dict[str, Any] = {"limit": limit + 1}
+    conditions: list[str] = []
     if user_id:
-        query += "WHERE r.user_id = :user_id "
+        conditions.append("r.user_id = :user_id")
         params["user_id"] = user_id
-    query += "ORDER BY r.payment_id DESC FETCH FIRST :limit ROWS ONLY"
+    if cursor is not None:
+        conditions.append("r.payment_id < :cursor")
+        params["cursor"] = cursor
+    if conditions:
+        query += f"WHERE {' AND '.join(conditions)} "
+    query += f"ORDER BY r.payment_id DESC {dialect.Limit(':limit')}"
     with MysqlConnection() as connection:
-        with connection.cursor() as cursor:
-            cursor.execute(query, params)
-            return FetchAllDicts(cursor)
+        with connection.cursor() as db_cursor:
+            ExecuteQuery(db_cursor, "payments", query, params, expected_rows=limit + 1)
+            page = FetchRows(db_cursor)
+    rows = page["rows"]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        # payment_id is the first selected column.
+        next_cursor = rows[-1][0]
+    if compact:
+        return {"columns": page["columns"], "rows": rows}, next_cursor
+    columns = page["columns"]
+    return [dict(zip(columns, row)) for row in rows], next_cursor
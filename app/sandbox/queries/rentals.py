@@ -1,10 +1,33 @@
 from typing import Any, Optional
 
-from app.core.services_db import FetchAllDicts, GetMysqlConfig, MysqlConnection
+from app.core.services_db import (
+    ExecuteQuery,
+    FetchRows,
+    GetDialect,
+    GetMysqlConfig,
+    MysqlConnection,
+)
 
 
-def GetRentalsFromDb(user_id: Optional[str] = None, limit: int = 50) -> list[dict[str, Any]]:
+def GetRentalsFromDb(
+    user_id: Optional[str] = None, limit: int = 50, compact: bool = False
+) -> Any:
+    return GetRentalsPageFromDb(user_id=user_id, limit=limit, compact=compact)[0]
+
+
+def GetRentalsPageFromDb(
+    user_id: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[int] = None,
+    compact: bool = False,
+) -> tuple[Any, Optional[int]]:
+    """Newest-first page of rentals strictly older than ``cursor`` (rental_id).
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    One extra row is fetched to tell whether another page exists.
+    """
     config = GetMysqlConfig()
+    dialect = GetDialect()
     query = (
         "SELECT "
         "r.rental_id, "
@@ -18,12 +41,28 @@ def GetRentalsFromDb(user_id: Optional[str] = None, limit: int = 50) -> list[dic
         f"FROM {config.rentals_table} r "
         f"LEFT JOIN {config.users_table} u ON r.user_id = u.user_id "
     )
-    params: dict[str, Any] = {"limit": limit}
+    params: dict[str, Any] = {"limit": limit + 1}
+    conditions: list[str] = []
     if user_id:
-        query += "WHERE r.user_id = :user_id "
+        conditions.append("r.user_id = :user_id")
         params["user_id"] = user_id
-    query += "ORDER BY r.rental_id DESC FETCH FIRST :limit ROWS ONLY"
+    if cursor is not None:
+        conditions.append("r.rental_id < :cursor")
+        params["cursor"] = cursor
+    if conditions:
+        query += f"WHERE {' AND '.join(conditions)} "
+    query += f"ORDER BY r.rental_id DESC {dialect.Limit(':limit')}"
     with MysqlConnection() as connection:
-        with connection.cursor() as cursor:
-            cursor.execute(query, params)
-            return FetchAllDicts(cursor)
+        with connection.cursor() as db_cursor:
+            ExecuteQuery(db_cursor, "rentals", query, params, expected_rows=limit + 1)
+            page = FetchRows(db_cursor)
+    rows = page["rows"]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        # rental_id is the first selected column.
+        next_cursor = rows[-1][0]
+    if compact:
+        return {"columns": page["columns"], "rows": rows}, next_cursor
+    columns = page["columns"]
+    return [dict(zip(columns, row)) for row in rows], next_cursor
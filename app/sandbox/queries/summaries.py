@@ -1,155 +1,277 @@
-from typing import Any, Optional
+from typing import Any, Callable, Iterator, Optional
 
-from app.core.services_db import FetchOneDict, GetMysqlConfig, MysqlConnection
+from app.core.services_db import (
+    DB_ROLE_ANALYTICS,
+    ChunkInValues,
+    ExecuteQuery,
+    FetchAllDicts,
+    GetDialect,
+    GetMysqlConfig,
+    InClause,
+    MysqlConnection,
+)
+from app.sandbox.micro_batch import BatchedFetch
 from app.sandbox.sub_query.date import _ResolvePeriodFromText
 from app.sandbox.sub_query.getLastUser import GetLatestPeriodForUser
 
 
 def GetPricingSummaryFromDb(user_id: str, period: Optional[str]) -> dict[str, Any]:
-    config = GetMysqlConfig()
     resolved_period = period or GetLatestPeriodForUser(user_id)
     if not resolved_period:
         return {}
-    query = (
-        "SELECT "
-        ":user_id AS user_id, "
-        ":period AS period, "
-        "'KRW' AS currency, "
-        "NVL(SUM(p.amount), 0) AS total_amount, "
-        "0 AS discounts, "
-        "COUNT(r.rental_id) AS rides, "
-        "CASE "
-        "WHEN COUNT(r.rental_id) = 0 THEN 0 "
-        "ELSE ROUND(NVL(SUM(p.amount), 0) / COUNT(r.rental_id)) "
-        "END AS avg_price "
-        f"FROM {config.payments_table} p "
-        f"LEFT JOIN {config.rentals_table} r "
-        "ON p.user_id = r.user_id "
-        "AND TO_CHAR(NVL(r.start_time, r.created_at), 'YYYY-MM') = :period "
-        "WHERE p.user_id = :user_id "
-        "AND p.payment_status = 'DONE' "
-        "AND TO_CHAR(p.created_at, 'YYYY-MM') = :period"
-    )
-    with MysqlConnection() as connection:
-        with connection.cursor() as cursor:
-            cursor.execute(query, {"user_id": user_id, "period": resolved_period})
-            return FetchOneDict(cursor)
+    return BatchedFetch("pricing_summary", GetPricingSummaryForUsers, user_id, resolved_period)
 
 
 def GetUsageSummaryFromDb(user_id: str, period: Optional[str]) -> dict[str, Any]:
-    config = GetMysqlConfig()
     resolved_period = period or GetLatestPeriodForUser(user_id)
     if not resolved_period:
         return {}
-    summary_query = (
-        "SELECT "
-        ":user_id AS user_id, "
-        ":period AS period, "
-        "COUNT(r.rental_id) AS total_rides, "
-        "NVL(ROUND(SUM(r.total_distance), 2), 0) AS total_distance_km, "
-        "NVL(SUM("
-        "(EXTRACT(DAY FROM (NVL(r.end_time, r.created_at) - NVL(r.start_time, r.created_at))) * 24 * 60) + "
-        "(EXTRACT(HOUR FROM (NVL(r.end_time, r.created_at) - NVL(r.start_time, r.created_at))) * 60) + "
-        "(EXTRACT(MINUTE FROM (NVL(r.end_time, r.created_at) - NVL(r.start_time, r.created_at)))) + "
-        "(EXTRACT(SECOND FROM (NVL(r.end_time, r.created_at) - NVL(r.start_time, r.created_at))) / 60)"
-        "), 0) AS total_minutes, "
-        "NULL AS favorite_zone "
-        f"FROM {config.rentals_table} r "
-        "WHERE r.user_id = :user_id "
-        "AND TO_CHAR(r.created_at, 'YYYY-MM') = :period"
-    )
-    peak_query = (
-        "SELECT EXTRACT(HOUR FROM r.start_time) AS hour_bucket "
-        f"FROM {config.rentals_table} r "
-        "WHERE r.user_id = :user_id "
-        "AND TO_CHAR(r.created_at, 'YYYY-MM') = :period "
-        "GROUP BY hour_bucket "
-        "ORDER BY COUNT(*) DESC "
-        "FETCH FIRST 2 ROWS ONLY"
-    )
-    with MysqlConnection() as connection:
-        with connection.cursor() as cursor:
-            cursor.execute(summary_query, {"user_id": user_id, "period": resolved_period})
-            summary = FetchOneDict(cursor)
-
-            cursor.execute(peak_query, {"user_id": user_id, "period": resolved_period})
-            peak_rows = cursor.fetchall()
-            peak_hours = [
-                f"{int(row['hour_bucket']):02d}:00-{int(row['hour_bucket']):02d}:59"
-                for row in peak_rows
-                if row.get("hour_bucket") is not None
-            ]
-            summary["peak_hours"] = peak_hours
-            return summary
+    return BatchedFetch("usage_summary", GetUsageSummaryForUsers, user_id, resolved_period)
+
 
 def GetTotalPaymentFromDb(user_id: str, period: Optional[str] = None) -> dict[str, Any]:
-    config = GetMysqlConfig()
     resolved_period = _ResolvePeriodFromText(period, user_id)
     if not resolved_period:
         return {}
-    query = (
-        "SELECT "
-        ":user_id AS user_id, "
-        ":period AS period, "
-        "'KRW' AS currency, "
-        "NVL(SUM(CASE WHEN payment_method = 'CARD' THEN amount ELSE 0 END), 0) "
-        "AS card_amount, "
-        "NVL(SUM(CASE WHEN payment_method = 'POINT' THEN amount ELSE 0 END), 0) "
-        "AS point_amount, "
-        "NVL(SUM(CASE WHEN payment_method IN ('CARD', 'POINT') THEN amount ELSE 0 END), 0) "
-        "AS total_amount "
-        f"FROM {config.payments_table} "
-        "WHERE user_id = :user_id "
-        "AND payment_status = 'DONE' "
-        "AND TO_CHAR(created_at, 'YYYY-MM') = :period"
-    )
-    with MysqlConnection() as connection:
-        with connection.cursor() as cursor:
-            cursor.execute(query, {"user_id": user_id, "period": resolved_period})
-            return FetchOneDict(cursor)
+    return BatchedFetch("total_payments", GetTotalPaymentsForUsers, user_id, resolved_period)
 
 
 def GetTotalUsageFromDb(user_id: str, period: Optional[str] = None) -> dict[str, Any]:
+    resolved_period = _ResolvePeriodFromText(period, user_id)
+    if not resolved_period:
+        return {}
+    return BatchedFetch("total_usage", GetTotalUsageForUsers, user_id, resolved_period)
+
+
+def _RunGroupedByUser(
+    cursor: Any,
+    statement: str,
+    column: str,
+    build_query: Callable[[str], str],
+    keys: list[str],
+    period: str,
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Run ``build_query(user_in)`` once per IN chunk; yield ``(user_id, row)``."""
+    for chunk in ChunkInValues(keys):
+        user_in, params = InClause(column, chunk, "u")
+        params["period"] = period
+        ExecuteQuery(cursor, statement, build_query(user_in), params, expected_rows=len(chunk))
+        for row in FetchAllDicts(cursor):
+            yield str(row.pop("user_id")), row
+
+
+def GetPricingSummaryForUsers(user_ids: list[str], period: str) -> dict[str, dict[str, Any]]:
+    """Pricing summary of every user for one resolved period, keyed by user id."""
     config = GetMysqlConfig()
-    reserved_period = _ResolvePeriodFromText(period, user_id)
+    dialect = GetDialect(DB_ROLE_ANALYTICS)
+    keys = [str(user_id) for user_id in user_ids]
+    results = {
+        key: {
+            "user_id": key,
+            "period": period,
+            "currency": "KRW",
+            "total_amount": 0,
+            "discounts": 0,
+            "rides": 0,
+            "avg_price": 0,
+        }
+        for key in keys
+    }
+    total_amount = dialect.Nvl("SUM(p.amount)", "0")
 
-    if not reserved_period:
-        return {}
+    def BuildQuery(user_in: str) -> str:
+        return (
+            "SELECT "
+            "p.user_id AS user_id, "
+            f"{total_amount} AS total_amount, "
+            "COUNT(r.rental_id) AS rides, "
+            "CASE "
+            "WHEN COUNT(r.rental_id) = 0 THEN 0 "
+            f"ELSE ROUND({total_amount} / COUNT(r.rental_id)) "
+            "END AS avg_price "
+            f"FROM {config.payments_table} p "
+            f"LEFT JOIN {config.rentals_table} r "
+            "ON p.user_id = r.user_id "
+            f"AND {dialect.MonthOf(dialect.Nvl('r.start_time', 'r.created_at'))} = :period "
+            f"WHERE {user_in} "
+            "AND p.payment_status = 'DONE' "
+            f"AND {dialect.MonthOf('p.created_at')} = :period "
+            "GROUP BY p.user_id"
+        )
 
-    rentals_query = (
-        "SELECT "
-        "COUNT(rental_id) AS total_rentals, "
-        "NVL(SUM("
-        "(EXTRACT(DAY FROM (NVL(end_time, created_at) - NVL(start_time, created_at))) * 24 * 60) + "
-        "(EXTRACT(HOUR FROM (NVL(end_time, created_at) - NVL(start_time, created_at))) * 60) + "
-        "(EXTRACT(MINUTE FROM (NVL(end_time, created_at) - NVL(start_time, created_at)))) + "
-        "(EXTRACT(SECOND FROM (NVL(end_time, created_at) - NVL(start_time, created_at))) / 60)"
-        "), 0) AS total_minutes "
-        f"FROM {config.rentals_table} "
-        "WHERE user_id = :user_id "
-        "AND TO_CHAR(created_at, 'YYYY-MM') = :period"
+    with MysqlConnection(DB_ROLE_ANALYTICS) as connection:
+        with connection.cursor() as cursor:
+            for key, row in _RunGroupedByUser(
+                cursor, "pricing_summary", "p.user_id", BuildQuery, keys, period
+            ):
+                if key in results:
+                    results[key].update(row)
+    return results
+
+
+def GetUsageSummaryForUsers(user_ids: list[str], period: str) -> dict[str, dict[str, Any]]:
+    """Usage summary (with top-2 peak hours) of every user for one period."""
+    config = GetMysqlConfig()
+    dialect = GetDialect(DB_ROLE_ANALYTICS)
+    keys = [str(user_id) for user_id in user_ids]
+    results = {
+        key: {
+            "user_id": key,
+            "period": period,
+            "total_rides": 0,
+            "total_distance_km": 0,
+            "total_minutes": 0,
+            "favorite_zone": None,
+        }
+        for key in keys
+    }
+    minutes = dialect.MinutesBetween(
+        dialect.Nvl("r.end_time", "r.created_at"),
+        dialect.Nvl("r.start_time", "r.created_at"),
     )
-    payments_query = (
-        "SELECT "
-        "COUNT(amount) AS total_payments, "
-        "NVL(SUM(amount), 0) AS total_amount "
-        f"FROM {config.payments_table} "
-        "WHERE user_id = :user_id "
-        "AND payment_status = 'DONE' "
-        "AND TO_CHAR(created_at, 'YYYY-MM') = :period"
+    hour_bucket = dialect.HourOf("r.start_time")
+
+    def BuildSummaryQuery(user_in: str) -> str:
+        return (
+            "SELECT "
+            "r.user_id AS user_id, "
+            "COUNT(r.rental_id) AS total_rides, "
+            f"{dialect.Nvl('ROUND(SUM(r.total_distance), 2)', '0')} AS total_distance_km, "
+            f"{dialect.Nvl(f'SUM({minutes})', '0')} AS total_minutes "
+            f"FROM {config.rentals_table} r "
+            f"WHERE {user_in} "
+            f"AND {dialect.MonthOf('r.created_at')} = :period "
+            "GROUP BY r.user_id"
+        )
+
+    def BuildPeakQuery(user_in: str) -> str:
+        return (
+            f"SELECT r.user_id AS user_id, {hour_bucket} AS hour_bucket, COUNT(*) AS rides "
+            f"FROM {config.rentals_table} r "
+            f"WHERE {user_in} "
+            f"AND {dialect.MonthOf('r.created_at')} = :period "
+            f"GROUP BY r.user_id, {hour_bucket}"
+        )
+
+    buckets: dict[str, list[tuple[int, Any]]] = {key: [] for key in keys}
+    with MysqlConnection(DB_ROLE_ANALYTICS) as connection:
+        with connection.cursor() as cursor:
+            for key, row in _RunGroupedByUser(
+                cursor, "usage_summary", "r.user_id", BuildSummaryQuery, keys, period
+            ):
+                if key in results:
+                    results[key].update(row)
+            for key, row in _RunGroupedByUser(
+                cursor, "usage_peak_hours", "r.user_id", BuildPeakQuery, keys, period
+            ):
+                if key in buckets:
+                    buckets[key].append((int(row.get("rides") or 0), row.get("hour_bucket")))
+    for key, hours in buckets.items():
+        hours.sort(key=lambda item: item[0], reverse=True)
+        results[key]["peak_hours"] = [
+            f"{int(hour):02d}:00-{int(hour):02d}:59"
+            for _, hour in hours[:2]
+            if hour is not None
+        ]
+    return results
+
+
+def GetTotalPaymentsForUsers(user_ids: list[str], period: str) -> dict[str, dict[str, Any]]:
+    """Card/point payment totals of every user for one resolved period."""
+    config = GetMysqlConfig()
+    dialect = GetDialect(DB_ROLE_ANALYTICS)
+    card_amount = "SUM(CASE WHEN payment_method = 'CARD' THEN amount ELSE 0 END)"
+    point_amount = "SUM(CASE WHEN payment_method = 'POINT' THEN amount ELSE 0 END)"
+    total_amount = "SUM(CASE WHEN payment_method IN ('CARD', 'POINT') THEN amount ELSE 0 END)"
+    keys = [str(user_id) for user_id in user_ids]
+    results = {
+        key: {
+            "user_id": key,
+            "period": period,
+            "currency": "KRW",
+            "card_amount": 0,
+            "point_amount": 0,
+            "total_amount": 0,
+        }
+        for key in keys
+    }
+
+    def BuildQuery(user_in: str) -> str:
+        return (
+            "SELECT user_id, "
+            f"{dialect.Nvl(card_amount, '0')} AS card_amount, "
+            f"{dialect.Nvl(point_amount, '0')} AS point_amount, "
+            f"{dialect.Nvl(total_amount, '0')} AS total_amount "
+            f"FROM {config.payments_table} "
+            f"WHERE {user_in} "
+            "AND payment_status = 'DONE' "
+            f"AND {dialect.MonthOf('created_at')} = :period "
+            "GROUP BY user_id"
+        )
+
+    with MysqlConnection(DB_ROLE_ANALYTICS) as connection:
+        with connection.cursor() as cursor:
+            for key, row in _RunGroupedByUser(
+                cursor, "total_payments", "user_id", BuildQuery, keys, period
+            ):
+                if key in results:
+                    results[key].update(row)
+    return results
+
+
+def GetTotalUsageForUsers(user_ids: list[str], period: str) -> dict[str, dict[str, Any]]:
+    """Rental and payment totals of every user for one resolved period."""
+    config = GetMysqlConfig()
+    dialect = GetDialect(DB_ROLE_ANALYTICS)
+    minutes = dialect.MinutesBetween(
+        dialect.Nvl("end_time", "created_at"),
+        dialect.Nvl("start_time", "created_at"),
     )
-    with MysqlConnection() as connection:
+    keys = [str(user_id) for user_id in user_ids]
+    results = {
+        key: {
+            "user_id": key,
+            "period": period,
+            "total_rentals": 0,
+            "total_minutes": 0,
+            "total_amount": 0,
+            "total_payments": 0,
+        }
+        for key in keys
+    }
+
+    def BuildRentalsQuery(user_in: str) -> str:
+        return (
+            "SELECT user_id, "
+            "COUNT(rental_id) AS total_rentals, "
+            f"{dialect.Nvl(f'SUM({minutes})', '0')} AS total_minutes "
+            f"FROM {config.rentals_table} "
+            f"WHERE {user_in} "
+            f"AND {dialect.MonthOf('created_at')} = :period "
+            "GROUP BY user_id"
+        )
+
+    def BuildPaymentsQuery(user_in: str) -> str:
+        return (
+            "SELECT user_id, "
+            "COUNT(amount) AS total_payments, "
+            f"{dialect.Nvl('SUM(amount)', '0')} AS total_amount "
+            f"FROM {config.payments_table} "
+            f"WHERE {user_in} "
+            "AND payment_status = 'DONE' "
+            f"AND {dialect.MonthOf('created_at')} = :period "
+            "GROUP BY user_id"
+        )
+
+    with MysqlConnection(DB_ROLE_ANALYTICS) as connection:
         with connection.cursor() as cursor:
-            params = {"user_id": user_id, "period": reserved_period}
-            cursor.execute(rentals_query, params)
-            rentals_summary = FetchOneDict(cursor) or {}
-            cursor.execute(payments_query, params)
-            payments_summary = FetchOneDict(cursor) or {}
-            return {
-                "user_id": user_id,
-                "period": reserved_period,
-                "total_rentals": rentals_summary.get("total_rentals", 0),
-                "total_minutes": rentals_summary.get("total_minutes", 0),
-                "total_amount": payments_summary.get("total_amount", 0),
-                "total_payments": payments_summary.get("total_payments", 0),
-            }
\ No newline at end of file
+            for statement, build_query in (
+                ("total_usage_rentals", BuildRentalsQuery),
+                ("total_usage_payments", BuildPaymentsQuery),
+            ):
+                for key, row in _RunGroupedByUser(
+                    cursor, statement, "user_id", build_query, keys, period
+                ):
+                    if key in results:
+                        results[key].update(row)
+    return results
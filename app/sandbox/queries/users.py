@@ -1,10 +1,17 @@
 from typing import Any
 
-from app.core.services_db import FetchOneDict, GetMysqlConfig, MysqlConnection
+from app.core.services_db import (
+    ExecuteQuery,
+    FetchOneDict,
+    GetDialect,
+    GetMysqlConfig,
+    MysqlConnection,
+)
 
 
 def GetUserProfileFromDb(user_id: str) -> dict[str, Any]:
     config = GetMysqlConfig()
+    dialect = GetDialect()
     query = (
         "SELECT "
         "user_id, "
@@ -18,9 +25,11 @@ def GetUserProfileFromDb(user_id: str) -> dict[str, Any]:
         "updated_at "
         f"FROM {config.users_table} "
         "WHERE user_id = :user_id "
-        "FETCH FIRST 1 ROWS ONLY"
+        f"{dialect.Limit('1')}"
     )
     with MysqlConnection() as connection:
         with connection.cursor() as cursor:
-            cursor.execute(query, {"user_id": user_id})
+            ExecuteQuery(
+                cursor, "user_profile", query, {"user_id": user_id}, expected_rows=1
+            )
             return FetchOneDict(cursor)
@@ -6,9 +6,12 @@ from typing import Any, Optional
 
 from app.sandbox.queries import (
     GetAvailableBikesFromDb,
+    GetHistoryDigestFromDb,
     GetPaymentsFromDb,
+    GetPaymentsPageFromDb,
     GetPricingSummaryFromDb,
     GetRentalsFromDb,
+    GetRentalsPageFromDb,
     GetTotalPaymentFromDb,
     GetUsageSummaryFromDb,
     GetUserProfileFromDb,
@@ -22,14 +25,43 @@ def _NormalizeUserId(user_id: Any) -> str:
 
 @dataclass
 class Sandbox:
-    def GetAvailableBikes(self, limit: int = 20) -> list[dict[str, Any]]:
-        return GetAvailableBikesFromDb(limit=limit)
+    def GetAvailableBikes(self, limit: int = 20, compact: bool = False) -> Any:
+        return GetAvailableBikesFromDb(limit=limit, compact=compact)
 
-    def GetPayments(self, user_id: Any, limit: int = 20) -> list[dict[str, Any]]:
-        return GetPaymentsFromDb(user_id=_NormalizeUserId(user_id), limit=limit)
+    def GetPayments(self, user_id: Any, limit: int = 20, compact: bool = False) -> Any:
+        return GetPaymentsFromDb(
+            user_id=_NormalizeUserId(user_id), limit=limit, compact=compact
+        )
 
-    def GetRentals(self, user_id: Any, limit: int = 20) -> list[dict[str, Any]]:
-        return GetRentalsFromDb(user_id=_NormalizeUserId(user_id), limit=limit)
+    def GetRentals(self, user_id: Any, limit: int = 20, compact: bool = False) -> Any:
+        return GetRentalsFromDb(
+            user_id=_NormalizeUserId(user_id), limit=limit, compact=compact
+        )
+
+    def GetPaymentsPage(
+        self,
+        user_id: Any,
+        limit: int = 20,
+        cursor: Optional[int] = None,
+        compact: bool = False,
+    ) -> tuple[Any, Optional[int]]:
+        return GetPaymentsPageFromDb(
+            user_id=_NormalizeUserId(user_id), limit=limit, cursor=cursor, compact=compact
+        )
+
+    def GetRentalsPage(
+        self,
+        user_id: Any,
+        limit: int = 20,
+        cursor: Optional[int] = None,
+        compact: bool = False,
+    ) -> tuple[Any, Optional[int]]:
+        return GetRentalsPageFromDb(
+            user_id=_NormalizeUserId(user_id), limit=limit, cursor=cursor, compact=compact
+        )
+
+    def GetHistoryDigest(self, user_id: Any, period: Optional[str] = None) -> dict[str, Any]:
+        return GetHistoryDigestFromDb(_NormalizeUserId(user_id), period)
 
     def GetUserProfile(self, user_id: Any) -> dict[str, Any]:
         return GetUserProfileFromDb(user_id=_NormalizeUserId(user_id))
@@ -11,6 +11,10 @@ def _ResolvePeriodFromText(period_text: Optional[str], user_id: str) -> Optional
     if text.lower() in {"this_month", "이번달", "이번 달"}:
         now = datetime.utcnow()
         return f"{now.year:04d}-{now.month:02d}"
+    if text.lower() in {"last_month", "지난달", "지난 달", "저번달", "저번 달"}:
+        now = datetime.utcnow()
+        year, month = (now.year, now.month - 1) if now.month > 1 else (now.year - 1, 12)
+        return f"{year:04d}-{month:02d}"
     year_match = re.search(r"(\d{4})", text)
     month_match = re.search(r"(\d{1,2})\s*월", text)
     if year_match or month_match:
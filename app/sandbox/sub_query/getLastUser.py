@@ -1,25 +1,79 @@
 from typing import Optional
-from app.core.services_db import GetMysqlConfig
-from app.core.services_db import MysqlConnection
+from app.core.services_db import DB_ROLE_ANALYTICS, GetDialect, GetMysqlConfig
+from app.core.services_db import (
+    ChunkInValues,
+    ExecuteQuery,
+    FetchAllDicts,
+    InClause,
+    MysqlConnection,
+)
+from app.sandbox.micro_batch import BatchedFetch
 
 def GetLatestPeriodForUser(user_id: str) -> Optional[str]:
+    return BatchedFetch(
+        "latest_period", lambda user_ids, _: GetLatestPeriodsForUsers(user_ids), user_id, ""
+    )
+
+
+def GetLatestPeriodsForUsers(user_ids: list[str]) -> dict[str, str]:
+    """Latest active month per user, one grouped query per IN chunk."""
+    config = GetMysqlConfig()
+    dialect = GetDialect(DB_ROLE_ANALYTICS)
+    periods: dict[str, str] = {}
+    with MysqlConnection(DB_ROLE_ANALYTICS) as connection:
+        with connection.cursor() as cursor:
+            for chunk in ChunkInValues([str(user_id) for user_id in user_ids]):
+                payments_in, params = InClause("p.user_id", chunk, "u")
+                rentals_in, _ = InClause("r.user_id", chunk, "u")
+                query = (
+                    "SELECT user_id, MAX(period) AS period "
+                    "FROM ("
+                    f"SELECT p.user_id AS user_id, {dialect.MonthOf('p.created_at')} AS period "
+                    f"FROM {config.payments_table} p "
+                    f"WHERE {payments_in} "
+                    "UNION ALL "
+                    "SELECT r.user_id AS user_id, "
+                    f"{dialect.MonthOf(dialect.Nvl('r.start_time', 'r.created_at'))} AS period "
+                    f"FROM {config.rentals_table} r "
+                    f"WHERE {rentals_in}"
+                    ") t "
+                    "GROUP BY user_id"
+                )
+                ExecuteQuery(
+                    cursor, "latest_period_bulk", query, params, expected_rows=len(chunk)
+                )
+                for row in FetchAllDicts(cursor):
+                    if row.get("period"):
+                        periods[str(row["user_id"])] = row["period"]
+    return periods
+
+
+def GetRecentlyActiveUserIds(since_period: str, limit: int) -> list[str]:
+    """Users with payments or rentals in ``since_period`` (YYYY-MM) or later, most recent first."""
     config = GetMysqlConfig()
+    dialect = GetDialect(DB_ROLE_ANALYTICS)
     query = (
-        "SELECT MAX(period) AS period "
+        "SELECT user_id, MAX(period) AS period "
         "FROM ("
-        f"SELECT TO_CHAR(p.created_at, 'YYYY-MM') AS period "
-        f"FROM {config.payments_table} p "
-        "WHERE p.user_id = :user_id "
+        f"SELECT user_id, {dialect.MonthOf('created_at')} AS period "
+        f"FROM {config.payments_table} "
+        f"WHERE {dialect.MonthOf('created_at')} >= :since_period "
         "UNION ALL "
-        f"SELECT TO_CHAR(NVL(r.start_time, r.created_at), 'YYYY-MM') AS period "
-        f"FROM {config.rentals_table} r "
-        "WHERE r.user_id = :user_id"
-        ") t"
+        f"SELECT user_id, {dialect.MonthOf('created_at')} AS period "
+        f"FROM {config.rentals_table} "
+        f"WHERE {dialect.MonthOf('created_at')} >= :since_period"
+        ") t "
+        "GROUP BY user_id "
+        "ORDER BY MAX(period) DESC, user_id "
+        f"{dialect.Limit(':limit')}"
     )
-    with MysqlConnection() as connection:
+    with MysqlConnection(DB_ROLE_ANALYTICS) as connection:
         with connection.cursor() as cursor:
-            cursor.execute(query, {"user_id": user_id})
-            row = cursor.fetchone()
-            if not row:
-                return None
-            return row.get("period")
\ No newline at end of file
+            ExecuteQuery(
+                cursor,
+                "active_users",
+                query,
+                {"since_period": since_period, "limit": limit},
+                expected_rows=limit,
+            )
+            return [str(row["user_id"]) for row in FetchAllDicts(cursor)]
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from typing import Literal
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
 
+SESSION_ID_PATTERN = r"^[A-Za-z0-9_.:-]{1,64}$"
+# Names the checkpoint file, so no dots or separators.
+BATCH_ID_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+
+
 class LlmMessage(BaseModel):
     role: Literal["system", "user", "assistant"] = Field(
         ...,
@@ -30,6 +35,12 @@ class AssistantRequest(BaseModel):
         ...,
         description="단일 메시지",
     )
+    session_id: Optional[str] = Field(
+        None,
+        pattern=SESSION_ID_PATTERN,
+        examples=["8f14e45f-ceea-467f-a0e6-6d0f1b2c3d4e"],
+        description="대화 세션 ID (없으면 이전 대화 없이 단발성으로 처리)",
+    )
 
     class Config:
         str_strip_whitespace = True
@@ -38,3 +49,38 @@ class AssistantRequest(BaseModel):
 class AssistantResponse(BaseModel):
     text: str
     model: str
+    session_id: Optional[str] = None
+    # True when the LLM was unavailable and the text is a cached/templated fallback.
+    degraded: bool = False
+
+
+class BatchGenerateItem(BaseModel):
+    id: Optional[str] = Field(
+        None,
+        max_length=128,
+        examples=["user-1-2025-01"],
+        description="항목 ID (없으면 요청 내 순번, 재개 시 동일해야 함)",
+    )
+    user_id: int = Field(..., gt=0, examples=[1], description="대상 사용자 ID")
+    content: str = Field(..., min_length=1, examples=["이번달 총 사용 내역 알려줘"])
+
+    class Config:
+        str_strip_whitespace = True
+
+
+class BatchGenerateRequest(BaseModel):
+    batch_id: Optional[str] = Field(
+        None,
+        pattern=BATCH_ID_PATTERN,
+        examples=["usage-digest-2025-01"],
+        description="배치 ID (같은 ID로 재요청하면 체크포인트부터 재개)",
+    )
+    items: list[BatchGenerateItem] = Field(..., min_length=1)
+
+
+class PrefetchLoginRequest(BaseModel):
+    user_id: int = Field(..., gt=0, examples=[1], description="방금 로그인한 사용자 ID")
+
+
+class PrefetchLoginResponse(BaseModel):
+    queued: bool
@@ -0,0 +1,204 @@
+"""Production entry point: ``python -m app.server --workers 4 --port 8000``.
+
+A small supervisor binds the listening socket once and spawns ``--workers``
+uvicorn processes that share it, restarting any that die. Before spawning
+it splits the process-wide budgets in ``SERVER_DB_CONNECTIONS`` and
+``SERVER_LLM_CONCURRENCY`` across workers (``DB_POOL_MAX``,
+``LLM_MAX_CONCURRENCY``, ``LLM_HTTP_POOL_SIZE`` in each worker's
+environment), starts one shared tool result cache on a unix socket
+(``SERVER_SHARED_CACHE``) and puts Prometheus in multiprocess mode so
+``/metrics`` on any worker reports all of them.
+
+Only the standard library is imported at module level: workers are spawned
+fresh and must read their settings after the supervisor adjusted the
+environment.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+from typing import Any, Optional
+
+
+logger = logging.getLogger("app.server")
+
+_SUPERVISE_INTERVAL_SEC = 1.0
+_STOP_TIMEOUT_SEC = 30.0
+
+
+def WorkerEnv(
+    settings: Any, workers: int, shared_cache_socket: str = "", shared_cache_authkey: str = ""
+) -> dict[str, str]:
+    """Environment overrides that give each of ``workers`` its share of the budgets."""
+    env: dict[str, str] = {}
+    if settings.server_db_connections > 0:
+        per_worker = max(1, settings.server_db_connections // workers)
+        env["DB_POOL_MAX"] = str(per_worker)
+        env["DB_POOL_MIN"] = str(min(settings.db_pool_min, per_worker))
+    llm_concurrency = settings.llm_max_concurrency
+    if settings.server_llm_concurrency > 0:
+        llm_concurrency = max(1, settings.server_llm_concurrency // workers)
+        env["LLM_MAX_CONCURRENCY"] = str(llm_concurrency)
+        env["LLM_MAX_QUEUE"] = str(max(1, math.ceil(settings.llm_max_queue / workers)))
+    if settings.llm_http_pool_size <= 0:
+        # Admitted calls plus health checks and the odd /models lookup.
+        env["LLM_HTTP_POOL_SIZE"] = str(llm_concurrency + 2)
+    if shared_cache_socket:
+        env["TOOL_CACHE_SOCKET"] = shared_cache_socket
+        env["TOOL_CACHE_AUTHKEY"] = shared_cache_authkey
+    return env
+
+
+def _RunWorker(
+    index: int,
+    sockets: list[Any],
+    env: dict[str, str],
+    log_level: str,
+) -> None:
+    os.environ.update(env)
+    os.environ["SERVER_WORKER_INDEX"] = str(index)
+    import uvicorn
+
+    config = uvicorn.Config(
+        "app.main:CreateApp",
+        factory=True,
+        log_level=log_level,
+        lifespan="on",
+    )
+    uvicorn.Server(config).run(sockets=sockets)
+
+
+class Supervisor:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        env: dict[str, str],
+        log_level: str,
+        multiproc_dir: Optional[str],
+    ) -> None:
+        import uvicorn
+
+        self._workers = workers
+        self._env = env
+        self._log_level = log_level
+        self._multiproc_dir = multiproc_dir
+        self._context = multiprocessing.get_context("spawn")
+        self._socket = uvicorn.Config("app.main:CreateApp", host=host, port=port).bind_socket()
+        self._processes: dict[int, Any] = {}
+        self._stop = threading.Event()
+
+    def _Spawn(self, index: int) -> None:
+        env = dict(self._env)
+        if index > 0 and env.get("TOOL_CACHE_SOCKET"):
+            # The cache is shared, so one worker's sweep warms it for everybody.
+            env["PREFETCH_ENABLED"] = "0"
+        process = self._context.Process(
+            target=_RunWorker,
+            args=(index, [self._socket], env, self._log_level),
+            name=f"worker-{index}",
+        )
+        process.start()
+        self._processes[index] = process
+        logger.info("워커 시작 index=%s pid=%s", index, process.pid)
+
+    def _MarkDead(self, pid: Optional[int]) -> None:
+        if self._multiproc_dir and pid is not None:
+            try:
+                from prometheus_client import multiprocess
+            except ImportError:  # pragma: no cover - optional metrics backend
+                return
+            multiprocess.mark_process_dead(pid)
+
+    def Run(self) -> None:
+        signal.signal(signal.SIGTERM, lambda *_: self._stop.set())
+        signal.signal(signal.SIGINT, lambda *_: self._stop.set())
+        for index in range(self._workers):
+            self._Spawn(index)
+        while not self._stop.wait(_SUPERVISE_INTERVAL_SEC):
+            for index, process in list(self._processes.items()):
+                if process.is_alive():
+                    continue
+                logger.warning(
+                    "워커 종료 감지 index=%s pid=%s exitcode=%s", index, process.pid, process.exitcode
+                )
+                self._MarkDead(process.pid)
+                self._Spawn(index)
+        self.Shutdown()
+
+    def Shutdown(self) -> None:
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes.values():
+            process.join(_STOP_TIMEOUT_SEC)
+            if process.is_alive():
+                process.kill()
+                process.join()
+            self._MarkDead(process.pid)
+        self._socket.close()
+
+
+def _Main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-forked uvicorn server for app.main")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=0, help="0 = SERVER_WORKERS or CPU count")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    # Set before anything imports prometheus_client: it picks its value store at import.
+    runtime_dir = tempfile.mkdtemp(prefix="llm-app-")
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not multiproc_dir:
+        multiproc_dir = os.path.join(runtime_dir, "metrics")
+        os.makedirs(multiproc_dir)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = multiproc_dir
+
+    from app.config.config import ConfigureLogging, GetSettings
+
+    settings = GetSettings()
+    ConfigureLogging(settings)
+    workers = max(1, args.workers or settings.server_workers or os.cpu_count() or 1)
+
+    manager = None
+    shared_cache_socket = ""
+    shared_cache_authkey = ""
+    if settings.server_shared_cache and workers > 1 and not settings.tool_cache_socket:
+        from app.services.tool_cache import StartSharedCacheServer
+
+        # runtime_dir is 0700; workers inherit the per-run key through their environment.
+        shared_cache_socket = os.path.join(runtime_dir, "tool-cache.sock")
+        shared_cache_authkey = os.urandom(32).hex()
+        manager = StartSharedCacheServer(
+            shared_cache_socket,
+            bytes.fromhex(shared_cache_authkey),
+            settings.tool_cache_size,
+            settings.tool_cache_ttl_sec,
+        )
+    env = WorkerEnv(settings, workers, shared_cache_socket, shared_cache_authkey)
+    logger.info(
+        "서버 시작 workers=%s overrides=%s",
+        workers,
+        {key: value for key, value in env.items() if key != "TOOL_CACHE_AUTHKEY"},
+    )
+    try:
+        Supervisor(args.host, args.port, workers, env, args.log_level, multiproc_dir).Run()
+    finally:
+        if manager is not None:
+            manager.shutdown()
+        shutil.rmtree(runtime_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_Main())
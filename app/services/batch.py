@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+import hashlib
+import logging
+import os
+import time
+from typing import Any, Iterator, Optional
+
+from app.config.config import GetSettings
+from app.core.admission import PRIORITY_BATCH, AdmissionRejected
+from app.core.circuit_breaker import BreakerOpen
+from app.core.deadline import BindDeadline, Deadline
+from app.core.json_codec import DecodeJson, EncodeJson
+from app.core.llm_service import (
+    ExtractPeriodFromMessage,
+    InferToolFromUserMessage,
+    LLMService,
+)
+from app.core.metrics import CountEvent
+from app.sandbox.sub_query.getLastUser import GetLatestPeriodsForUsers
+from app.schemas import LlmMessage
+from app.services.prefetch import BULK_FETCHERS, PrefetchGroups, WarmToolCache
+from app.services.tool_executor import ExecuteToolCall
+
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+_MAX_ADMISSION_RETRIES = 3
+_MAX_RETRY_SLEEP_SEC = 10.0
+
+
+class CheckpointMismatch(Exception):
+    """The checkpoint holds answers for a different item list under the same ids."""
+
+    def __init__(self, item_id: str) -> None:
+        super().__init__(f"checkpoint item {item_id} does not match the request")
+        self.item_id = item_id
+
+
+@dataclass
+class BatchItem:
+    item_id: str
+    user_id: int
+    content: str
+
+    def PromptHash(self) -> str:
+        return hashlib.sha256(self.content.encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass
+class BatchResult:
+    item_id: str
+    user_id: int
+    status: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    latency_ms: float = 0.0
+    resumed: bool = False
+
+    def ToDict(self) -> dict[str, Any]:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+def PrefetchToolResults(items: list[BatchItem]) -> dict[str, int]:
+    """Warm the tool result cache for every item whose intent has a bulk fetcher.
+
+    Items are grouped by (tool, period); items without an explicit period are
+    resolved to each user's latest month with one grouped query, then cached
+    under both that month and ``None`` so either tool call shape hits.
+    """
+    keywords = GetSettings().tool_keywords_map
+    wanted: dict[tuple[str, Optional[str]], set[str]] = defaultdict(set)
+    for item in items:
+        tool_name = InferToolFromUserMessage(item.content, keywords)
+        if tool_name in BULK_FETCHERS:
+            period = ExtractPeriodFromMessage(item.content)
+            wanted[(tool_name, period)].add(str(item.user_id))
+    if not wanted:
+        return {"users": 0, "cached": 0}
+
+    latest_users = sorted(
+        {user for (_, period), users in wanted.items() if period is None for user in users}
+    )
+    latest = GetLatestPeriodsForUsers(latest_users) if latest_users else {}
+
+    groups: PrefetchGroups = defaultdict(dict)
+    for (tool_name, period), users in wanted.items():
+        for user in users:
+            resolved = period or latest.get(user)
+            if not resolved:
+                continue
+            group = groups[(tool_name, resolved)]
+            group[user] = group.get(user, False) or period is None
+
+    cached = WarmToolCache(groups, source="batch")
+    return {"users": len({user for users in wanted.values() for user in users}), "cached": cached}
+
+
+class BatchRunner:
+    """Runs many independent prompts through ``GenerateAssistantReply``.
+
+    At most ``concurrency`` items are in flight, all at ``PRIORITY_BATCH`` so
+    interactive traffic is admitted first. Successful results are appended
+    to a JSONL checkpoint with the prompt's hash; rerunning the same items
+    with the same checkpoint skips them.
+    """
+
+    def __init__(
+        self,
+        service: LLMService,
+        concurrency: Optional[int] = None,
+        checkpoint_path: Optional[str] = None,
+        item_deadline_sec: Optional[float] = None,
+    ) -> None:
+        settings = GetSettings()
+        self._service = service
+        self._concurrency = max(
+            1, concurrency or settings.batch_concurrency or settings.llm_max_concurrency
+        )
+        self._checkpoint_path = checkpoint_path
+        self._item_deadline_sec = item_deadline_sec or settings.request_deadline_sec
+
+    def Run(self, items: list[BatchItem]) -> Iterator[BatchResult]:
+        """Yield resumed results first, then new results in completion order.
+
+        Raises ``CheckpointMismatch`` before any work when a checkpointed
+        item id now names a different user or prompt.
+        """
+        done = self._LoadCheckpoint()
+        resumed: list[BatchResult] = []
+        pending: list[BatchItem] = []
+        for item in items:
+            previous = done.get(item.item_id)
+            if previous is None:
+                pending.append(item)
+                continue
+            result, prompt_hash = previous
+            if result.user_id != item.user_id or prompt_hash != item.PromptHash():
+                CountEvent("batch_checkpoint_mismatch")
+                raise CheckpointMismatch(item.item_id)
+            resumed.append(result)
+        return self._Iterate(resumed, pending)
+
+    def _Iterate(
+        self, resumed: list[BatchResult], pending: list[BatchItem]
+    ) -> Iterator[BatchResult]:
+        yield from resumed
+        if not pending:
+            return
+        try:
+            stats = PrefetchToolResults(pending)
+            logger.info("배치 선조회 완료 items=%s stats=%s", len(pending), stats)
+        except Exception as exc:
+            # Prefetch only warms the cache; each item still queries on a miss.
+            logger.warning("배치 선조회 실패 error=%s", exc)
+            CountEvent("batch_prefetch_failed")
+
+        prompt_hashes = {item.item_id: item.PromptHash() for item in pending}
+        checkpoint = self._OpenCheckpoint()
+        executor = ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="batch")
+        try:
+            futures = [executor.submit(self._RunItem, item) for item in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                CountEvent(f"batch_item_{result.status}")
+                if checkpoint is not None and result.status == STATUS_OK:
+                    record = {**result.ToDict(), "prompt_sha": prompt_hashes[result.item_id]}
+                    checkpoint.write(EncodeJson(record) + b"\n")
+                    checkpoint.flush()
+                yield result
+        finally:
+            # A closed generator (client went away) cancels what has not started.
+            executor.shutdown(wait=False, cancel_futures=True)
+            if checkpoint is not None:
+                checkpoint.close()
+
+    def _RunItem(self, item: BatchItem) -> BatchResult:
+        started = time.perf_counter()
+        message = LlmMessage(role="user", user_id=item.user_id, content=item.content)
+        error = ""
+        for attempt in range(_MAX_ADMISSION_RETRIES + 1):
+            try:
+                with BindDeadline(Deadline.After(self._item_deadline_sec)):
+                    text = self._service.GenerateAssistantReply(
+                        message, ExecuteToolCall, priority=PRIORITY_BATCH
+                    )
+            except AdmissionRejected as exc:
+                error = f"AdmissionRejected: {exc.reason}"
+                if attempt < _MAX_ADMISSION_RETRIES:
+                    time.sleep(min(exc.retry_after_sec, _MAX_RETRY_SLEEP_SEC))
+                continue
+            except BreakerOpen as exc:
+                # Batch answers are stored, so wait for the LLM instead of degrading.
+                error = "BreakerOpen"
+                if attempt < _MAX_ADMISSION_RETRIES:
+                    time.sleep(min(exc.retry_after_sec, _MAX_RETRY_SLEEP_SEC))
+                continue
+            except Exception as exc:
+                logger.warning("배치 항목 실패 item_id=%s error=%s", item.item_id, exc)
+                error = f"{exc.__class__.__name__}: {exc}"
+                break
+            return BatchResult(
+                item.item_id,
+                item.user_id,
+                STATUS_OK,
+                text=text,
+                latency_ms=round((time.perf_counter() - started) * 1000, 1),
+            )
+        return BatchResult(
+            item.item_id,
+            item.user_id,
+            STATUS_ERROR,
+            error=error,
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+
+    def _LoadCheckpoint(self) -> dict[str, tuple[BatchResult, Optional[str]]]:
+        if not self._checkpoint_path or not os.path.exists(self._checkpoint_path):
+            return {}
+        done: dict[str, tuple[BatchResult, Optional[str]]] = {}
+        with open(self._checkpoint_path, "rb") as handle:
+            for line in handle:
+                try:
+                    record = DecodeJson(line)
+                except ValueError:
+                    # A torn last line from an interrupted run; that item reruns.
+                    continue
+                if record.get("status") != STATUS_OK:
+                    continue
+                result = BatchResult(
+                    str(record["item_id"]),
+                    int(record["user_id"]),
+                    STATUS_OK,
+                    text=record.get("text"),
+                    latency_ms=float(record.get("latency_ms") or 0.0),
+                    resumed=True,
+                )
+                done[result.item_id] = (result, record.get("prompt_sha"))
+        return done
+
+    def _OpenCheckpoint(self) -> Optional[Any]:
+        if not self._checkpoint_path:
+            return None
+        directory = os.path.dirname(self._checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handle = open(self._checkpoint_path, "ab+")
+        if handle.tell() > 0:
+            handle.seek(-1, os.SEEK_END)
+            if handle.read(1) != b"\n":
+                handle.write(b"\n")
+        return handle
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from app.config.config import GetSettings
+from app.core.metrics import CountEvent, ObserveStage
+from app.sandbox.queries import (
+    GetPricingSummaryForUsers,
+    GetTotalPaymentsForUsers,
+    GetTotalUsageForUsers,
+    GetUsageSummaryForUsers,
+)
+from app.sandbox.sub_query.getLastUser import (
+    GetLatestPeriodsForUsers,
+    GetRecentlyActiveUserIds,
+)
+from app.services.tool_cache import GetToolResultCache
+
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_SOURCE = "prefetch"
+
+# Tools whose per-user result can be fetched for many users in one grouped query.
+BULK_FETCHERS: dict[str, Callable[[list[str], str], dict[str, dict[str, Any]]]] = {
+    "get_pricing_summary": GetPricingSummaryForUsers,
+    "get_usage_summary": GetUsageSummaryForUsers,
+    "get_total_payments": GetTotalPaymentsForUsers,
+    "get_total_usage": GetTotalUsageForUsers,
+}
+
+# (tool, period) -> {user_id: also cache as the user's "latest period" answer}
+PrefetchGroups = dict[tuple[str, str], dict[str, bool]]
+
+_PRIORITY_LOGIN = 0
+_PRIORITY_SWEEP = 1
+_POLL_SEC = 1.0
+
+
+def WarmToolCache(
+    groups: PrefetchGroups, ttl_sec: Optional[float] = None, source: str = ""
+) -> int:
+    """Run one bulk fetch per (tool, period) group and fill the tool result cache.
+
+    ``ttl_sec`` applies to closed months only. The current month and the
+    "latest period" answers can change with the next rental or payment, so
+    they keep the cache's interactive TTL. Returns the number of
+    (tool, user, period) results cached.
+    """
+    cache = GetToolResultCache()
+    current_month = RecentMonths(1)[0]
+    cached = 0
+    for (tool_name, period), users in groups.items():
+        if not users:
+            continue
+        with ObserveStage("prefetch", tool_name):
+            results = BULK_FETCHERS[tool_name](sorted(users), period)
+        period_ttl = ttl_sec if period < current_month else None
+        for user, as_latest in users.items():
+            data = results.get(user)
+            if not data:
+                continue
+            cache.Put(tool_name, user, data, period, ttl_sec=period_ttl, source=source)
+            if as_latest:
+                cache.Put(tool_name, user, data, None, source=source)
+            cached += 1
+    return cached
+
+
+def RecentMonths(count: int, now: Optional[datetime] = None) -> list[str]:
+    """``count`` YYYY-MM periods ending with the current month, newest first."""
+    now = now or datetime.utcnow()
+    year, month = now.year, now.month
+    months: list[str] = []
+    for _ in range(max(1, count)):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months
+
+
+class PrefetchWorker:
+    """Background warmer of the tool result cache for likely-next users.
+
+    A single daemon thread works through a priority queue: login hooks go
+    ahead of sweep chunks, and every chunk is followed by ``pause_sec`` of
+    idle so the analytics DB sees a trickle rather than a burst. A sweep of
+    recently active users runs at startup, when the month rolls over and,
+    optionally, every ``interval_sec``.
+    """
+
+    def __init__(
+        self,
+        tools: list[str],
+        active_months: int,
+        max_users: int,
+        chunk_size: int,
+        pause_sec: float,
+        ttl_sec: float,
+        interval_sec: float,
+        max_queue: int,
+    ) -> None:
+        self._tools = [tool for tool in tools if tool in BULK_FETCHERS]
+        self._active_months = max(1, active_months)
+        self._max_users = max(1, max_users)
+        self._chunk_size = max(1, chunk_size)
+        self._pause_sec = max(0.0, pause_sec)
+        self._ttl_sec = ttl_sec
+        self._interval_sec = max(0.0, interval_sec)
+        self._queue: "queue.PriorityQueue[tuple[int, int, list[str]]]" = queue.PriorityQueue(
+            maxsize=max(1, max_queue)
+        )
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sweep_month: Optional[str] = None
+        self._last_sweep_at = 0.0
+        self._sweeps = 0
+        self._login_requests = 0
+        self._users_warmed = 0
+        self._entries_cached = 0
+        self._db_seconds = 0.0
+        self._failures = 0
+        self._dropped = 0
+
+    def Start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._Run, name="prefetch", daemon=True)
+            self._thread.start()
+
+    def Stop(self, timeout_sec: float = 5.0) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopping.set()
+        thread.join(timeout_sec)
+        with self._lock:
+            self._thread = None
+
+    def RequestUsers(self, user_ids: list[Any]) -> bool:
+        """Queue users for warming ahead of any sweep (e.g. right after login)."""
+        with self._lock:
+            self._login_requests += 1
+        return self._Enqueue(_PRIORITY_LOGIN, [str(user_id) for user_id in user_ids])
+
+    def Sweep(self) -> int:
+        """Queue every recently active user in chunks; returns the user count."""
+        months = RecentMonths(self._active_months)
+        user_ids = GetRecentlyActiveUserIds(months[-1], self._max_users)
+        for start in range(0, len(user_ids), self._chunk_size):
+            if not self._Enqueue(_PRIORITY_SWEEP, user_ids[start:start + self._chunk_size]):
+                break
+        with self._lock:
+            self._sweeps += 1
+            self._sweep_month = months[0]
+            self._last_sweep_at = time.time()
+        logger.info("선조회 스윕 예약 users=%s since=%s", len(user_ids), months[-1])
+        return len(user_ids)
+
+    def WarmUsers(self, user_ids: list[str]) -> int:
+        """Cache current/previous month and latest-period results for ``user_ids``."""
+        if not user_ids or not self._tools:
+            return 0
+        started = time.perf_counter()
+        months = RecentMonths(2)
+        with ObserveStage("prefetch", "latest_period"):
+            latest = GetLatestPeriodsForUsers(user_ids)
+        groups: PrefetchGroups = defaultdict(dict)
+        for user in user_ids:
+            latest_period = latest.get(user)
+            if not latest_period:
+                # No activity at all: the tools answer {} and there is nothing to warm.
+                continue
+            for tool_name in self._tools:
+                for period in {*months, latest_period}:
+                    groups[(tool_name, period)][user] = period == latest_period
+        cached = WarmToolCache(groups, ttl_sec=self._ttl_sec, source=PREFETCH_SOURCE)
+        with self._lock:
+            self._users_warmed += len(latest)
+            self._entries_cached += cached
+            self._db_seconds += time.perf_counter() - started
+        return cached
+
+    def Snapshot(self) -> dict[str, Any]:
+        cache = GetToolResultCache().Snapshot()
+        hits = cache["hits_by_source"].get(PREFETCH_SOURCE, 0)
+        puts = cache["puts_by_source"].get(PREFETCH_SOURCE, 0)
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "queued": self._queue.qsize(),
+                "sweeps": self._sweeps,
+                "sweep_month": self._sweep_month,
+                "last_sweep_at": self._last_sweep_at or None,
+                "login_requests": self._login_requests,
+                "users_warmed": self._users_warmed,
+                "entries_cached": self._entries_cached,
+                "db_seconds": round(self._db_seconds, 3),
+                "failures": self._failures,
+                "dropped": self._dropped,
+                "hits": hits,
+                # Share of prefetched entries that were later served from the cache.
+                "hit_rate": round(hits / puts, 4) if puts else 0.0,
+            }
+
+    def _Enqueue(self, priority: int, user_ids: list[str]) -> bool:
+        if not user_ids:
+            return True
+        try:
+            self._queue.put_nowait((priority, next(self._seq), user_ids))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            CountEvent("prefetch_dropped")
+            return False
+        return True
+
+    def _SweepDue(self) -> bool:
+        if self._sweep_month != RecentMonths(1)[0]:
+            return True
+        return bool(self._interval_sec) and (
+            time.time() - self._last_sweep_at >= self._interval_sec
+        )
+
+    def _Run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if self._SweepDue():
+                    self.Sweep()
+            except Exception as exc:
+                logger.warning("선조회 스윕 실패 error=%s", exc)
+                CountEvent("prefetch_failed")
+                with self._lock:
+                    self._failures += 1
+                    # Retry at the next interval rather than on every poll.
+                    self._sweep_month = RecentMonths(1)[0]
+                    self._last_sweep_at = time.time()
+            try:
+                _, _, user_ids = self._queue.get(timeout=_POLL_SEC)
+            except queue.Empty:
+                continue
+            try:
+                self.WarmUsers(user_ids)
+            except Exception as exc:
+                logger.warning("선조회 실패 users=%s error=%s", len(user_ids), exc)
+                CountEvent("prefetch_failed")
+                with self._lock:
+                    self._failures += 1
+            if self._pause_sec:
+                self._stopping.wait(self._pause_sec)
+
+
+@lru_cache(maxsize=1)
+def GetPrefetchWorker() -> PrefetchWorker:
+    settings = GetSettings()
+    return PrefetchWorker(
+        tools=settings.prefetch_tools,
+        active_months=settings.prefetch_active_months,
+        max_users=settings.prefetch_max_users,
+        chunk_size=settings.prefetch_chunk_size,
+        pause_sec=settings.prefetch_pause_sec,
+        ttl_sec=settings.prefetch_ttl_sec,
+        interval_sec=settings.prefetch_interval_sec,
+        max_queue=settings.prefetch_queue_size,
+    )
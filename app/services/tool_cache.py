@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from functools import lru_cache
+import logging
+from multiprocessing.context import BaseContext
+from multiprocessing.managers import BaseManager
+import os
+import threading
+import time
+from typing import Any, Optional, Union
+
+from app.config.config import GetSettings
+from app.core.metrics import CountEvent
+
+
+# Per-user read-only tools whose result depends only on (user, period).
+CACHEABLE_TOOLS = frozenset(
+    {
+        "get_user_profile",
+        "get_pricing_summary",
+        "get_usage_summary",
+        "get_total_payments",
+        "get_total_usage",
+        "get_history_digest",
+    }
+)
+
+_CacheKey = tuple[str, str, Optional[str]]
+
+logger = logging.getLogger(__name__)
+
+
+class ToolResultCache:
+    """Process-wide TTL/LRU cache of tool ``data`` keyed by (tool, user, period).
+
+    ``period=None`` stands for "latest period", which is what the tools
+    resolve to when the caller did not name one. ``source`` tags who filled
+    an entry (e.g. ``"prefetch"``) so hits can be attributed to it.
+    """
+
+    def __init__(self, max_entries: int, ttl_sec: float) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[_CacheKey, tuple[float, Any, str]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._puts = 0
+        self._source_hits: dict[str, int] = {}
+        self._source_puts: dict[str, int] = {}
+
+    @staticmethod
+    def _Key(tool_name: str, user_id: Any, period: Optional[str]) -> _CacheKey:
+        return (tool_name, str(user_id), period or None)
+
+    def Get(self, tool_name: str, user_id: Any, period: Optional[str] = None) -> Optional[Any]:
+        key = self._Key(tool_name, user_id, period)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            source = entry[2]
+            if source:
+                self._source_hits[source] = self._source_hits.get(source, 0) + 1
+        if source:
+            CountEvent(f"tool_cache_hit_{source}")
+        return entry[1]
+
+    def Put(
+        self,
+        tool_name: str,
+        user_id: Any,
+        data: Any,
+        period: Optional[str] = None,
+        ttl_sec: Optional[float] = None,
+        source: str = "",
+    ) -> None:
+        if tool_name not in CACHEABLE_TOOLS or not data:
+            return
+        key = self._Key(tool_name, user_id, period)
+        expires_at = time.monotonic() + (self._ttl_sec if ttl_sec is None else ttl_sec)
+        with self._lock:
+            self._entries[key] = (expires_at, data, source)
+            self._entries.move_to_end(key)
+            self._puts += 1
+            if source:
+                self._source_puts[source] = self._source_puts.get(source, 0) + 1
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def Invalidate(self, user_id: Any) -> None:
+        user_key = str(user_id)
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == user_key]:
+                del self._entries[key]
+
+    def Snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "puts": self._puts,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "hits_by_source": dict(self._source_hits),
+                "puts_by_source": dict(self._source_puts),
+            }
+
+
+class _SharedCacheManager(BaseManager):
+    pass
+
+
+# Only ever set inside the manager's server process, by its initializer, so the
+# cache exists there whatever the start method (fork, spawn or forkserver).
+_shared_cache: Optional[ToolResultCache] = None
+
+
+def _InitSharedCache(max_entries: int, ttl_sec: float) -> None:
+    global _shared_cache
+    _shared_cache = ToolResultCache(max_entries, ttl_sec)
+
+
+def _SharedCache() -> Optional[ToolResultCache]:
+    return _shared_cache
+
+
+_SharedCacheManager.register("ToolResultCache", callable=_SharedCache)
+
+
+def StartSharedCacheServer(
+    address: str,
+    authkey: bytes,
+    max_entries: int,
+    ttl_sec: float,
+    ctx: Optional[BaseContext] = None,
+) -> BaseManager:
+    """Serve one ``ToolResultCache`` on a unix socket for every worker process.
+
+    The manager speaks pickle, so ``address`` must be a socket path in a
+    directory only this user can enter and ``authkey`` a fresh random key.
+    Must run in the supervisor before workers start; the returned manager
+    owns the server process and is shut down by the caller. ``ctx`` picks the
+    multiprocessing start method, the platform default when omitted.
+    """
+    # A str address is an AF_UNIX path; never a TCP listener.
+    manager = _SharedCacheManager(address=address, authkey=authkey, ctx=ctx)
+    manager.start(initializer=_InitSharedCache, initargs=(max_entries, ttl_sec))
+    os.chmod(address, 0o600)
+    return manager
+
+
+class SharedToolResultCache:
+    """Worker-side client of the supervisor's cache; failures degrade to misses."""
+
+    def __init__(self, address: str, authkey: bytes) -> None:
+        self._address = address
+        self._authkey = authkey
+        self._local = threading.local()
+
+    def _Proxy(self) -> Any:
+        # Proxies are not shareable across threads; keep one per thread.
+        proxy = getattr(self._local, "proxy", None)
+        if proxy is None:
+            manager = _SharedCacheManager(address=self._address, authkey=self._authkey)
+            manager.connect()
+            proxy = self._local.proxy = manager.ToolResultCache()
+        return proxy
+
+    def _Call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return getattr(self._Proxy(), method)(*args, **kwargs)
+        except Exception as exc:
+            self._local.proxy = None
+            logger.warning("공유 캐시 호출 실패 method=%s error=%s", method, exc)
+            CountEvent("tool_cache_shared_error")
+            return None
+
+    def Get(self, tool_name: str, user_id: Any, period: Optional[str] = None) -> Optional[Any]:
+        return self._Call("Get", tool_name, user_id, period)
+
+    def Put(
+        self,
+        tool_name: str,
+        user_id: Any,
+        data: Any,
+        period: Optional[str] = None,
+        ttl_sec: Optional[float] = None,
+        source: str = "",
+    ) -> None:
+        if tool_name not in CACHEABLE_TOOLS or not data:
+            return
+        self._Call("Put", tool_name, user_id, data, period, ttl_sec, source)
+
+    def Invalidate(self, user_id: Any) -> None:
+        self._Call("Invalidate", user_id)
+
+    def Snapshot(self) -> dict[str, Any]:
+        snapshot = self._Call("Snapshot") or {"hits_by_source": {}, "puts_by_source": {}}
+        snapshot["shared"] = self._address
+        return snapshot
+
+
+@lru_cache(maxsize=1)
+def GetToolResultCache() -> Union[ToolResultCache, SharedToolResultCache]:
+    settings = GetSettings()
+    if settings.tool_cache_socket:
+        if settings.tool_cache_authkey:
+            return SharedToolResultCache(
+                settings.tool_cache_socket, bytes.fromhex(settings.tool_cache_authkey)
+            )
+        logger.warning("공유 캐시 인증 키 없음: 프로세스별 캐시 사용")
+    return ToolResultCache(settings.tool_cache_size, settings.tool_cache_ttl_sec)
@@ -2,9 +2,18 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Any
+import time
+from typing import Any, Optional
 
+from app.config.config import GetSettings
+from app.core.deadline import CheckDeadline
+from app.core.json_codec import EncodeJson
+from app.core.llm_service import TOOL_LIMIT_MAX
+from app.core.metrics import CountEvent
+from app.core.traffic_record import CurrentRecording
 from app.sandbox import GetSandbox
+from app.sandbox.sub_query.date import _ResolvePeriodFromText
+from app.services.tool_cache import CACHEABLE_TOOLS, GetToolResultCache
 
 
 def _ParseToolArgs(raw_args: Any) -> dict[str, Any]:
@@ -18,12 +27,20 @@ def _ParseToolArgs(raw_args: Any) -> dict[str, Any]:
         return {}
 
 
-def _NormalizeLimit(value: Any, default: int = 20) -> int:
+def _NormalizeLimit(value: Any, tool_name: str, default: int = 20) -> int:
+    maximum = TOOL_LIMIT_MAX[tool_name]
     try:
         parsed = int(value)
     except (TypeError, ValueError):
-        return default
-    return max(1, min(10, parsed))
+        parsed = default
+    return max(1, min(maximum, parsed))
+
+
+def _NormalizeCursor(value: Any) -> Optional[int]:
+    if value in (None, ""):
+        return None
+    match = re.search(r"(\d+)", str(value))
+    return int(match.group(1)) if match else None
 
 
 def _NormalizeUserId(value: Any, fallback: str) -> str:
@@ -36,6 +53,10 @@ def _NormalizeUserId(value: Any, fallback: str) -> str:
     return fallback
 
 
+def _CompactRows() -> bool:
+    return GetSettings().tool_rows_format == "compact"
+
+
 def ExecuteToolCall(tool_call: dict[str, Any], user_id: int) -> dict[str, Any]:
     function = tool_call.get("function") or {}
     tool_name = function.get("name") or ""
@@ -44,22 +65,76 @@ def ExecuteToolCall(tool_call: dict[str, Any], user_id: int) -> dict[str, Any]:
 
 
 def ExecuteTool(tool_name: str, args: dict[str, Any], user_id: int) -> dict[str, Any]:
-    sandbox = GetSandbox()
+    recording = CurrentRecording()
+    if recording is None:
+        return _ExecuteTool(tool_name, args, user_id)
+    started = time.perf_counter()
+    try:
+        result = _ExecuteTool(tool_name, args, user_id)
+    except Exception as exc:
+        recording.AddTool(
+            tool_name, args, time.perf_counter() - started, 0, exc.__class__.__name__
+        )
+        raise
+    recording.AddTool(tool_name, args, time.perf_counter() - started, len(EncodeJson(result)))
+    return result
+
+
+def _ExecuteTool(tool_name: str, args: dict[str, Any], user_id: int) -> dict[str, Any]:
+    CheckDeadline(f"tool:{tool_name}")
     resolved_user_id = _NormalizeUserId(args.get("user_id"), str(user_id))
+    if tool_name not in CACHEABLE_TOOLS:
+        return _RunTool(tool_name, args, resolved_user_id)
+    cache = GetToolResultCache()
+    period = args.get("period") or None
+    if period is not None:
+        # "이번달" / "this month" key the same entry as the YYYY-MM prefetch stores.
+        period = _ResolvePeriodFromText(str(period), resolved_user_id)
+        args = {**args, "period": period}
+    cached = cache.Get(tool_name, resolved_user_id, period)
+    if cached is not None:
+        CountEvent("tool_cache_hit")
+        return {"tool": tool_name, "data": cached}
+    CountEvent("tool_cache_miss")
+    result = _RunTool(tool_name, args, resolved_user_id)
+    data = result.get("data")
+    cache.Put(tool_name, resolved_user_id, data, period)
+    if period is None and isinstance(data, dict) and data.get("period"):
+        # "Latest period" answers are also valid for the period they resolved to.
+        cache.Put(tool_name, resolved_user_id, data, str(data["period"]))
+    return result
+
+
+def _RunTool(tool_name: str, args: dict[str, Any], resolved_user_id: str) -> dict[str, Any]:
+    sandbox = GetSandbox()
     if tool_name == "get_available_bikes":
-        limit = _NormalizeLimit(args.get("limit"), default=20)
-        return {"tool": tool_name, "data": sandbox.GetAvailableBikes(limit=limit)}
-    if tool_name == "get_payments":
-        limit = _NormalizeLimit(args.get("limit"), default=20)
+        limit = _NormalizeLimit(args.get("limit"), tool_name)
         return {
             "tool": tool_name,
-            "data": sandbox.GetPayments(user_id=resolved_user_id, limit=limit),
+            "data": sandbox.GetAvailableBikes(limit=limit, compact=_CompactRows()),
         }
+    if tool_name == "get_payments":
+        data, next_cursor = sandbox.GetPaymentsPage(
+            user_id=resolved_user_id,
+            limit=_NormalizeLimit(args.get("limit"), tool_name),
+            cursor=_NormalizeCursor(args.get("cursor")),
+            compact=_CompactRows(),
+        )
+        return {"tool": tool_name, "data": data, "next_cursor": next_cursor}
     if tool_name == "get_rentals":
-        limit = _NormalizeLimit(args.get("limit"), default=20)
+        data, next_cursor = sandbox.GetRentalsPage(
+            user_id=resolved_user_id,
+            limit=_NormalizeLimit(args.get("limit"), tool_name),
+            cursor=_NormalizeCursor(args.get("cursor")),
+            compact=_CompactRows(),
+        )
+        return {"tool": tool_name, "data": data, "next_cursor": next_cursor}
+    if tool_name == "get_history_digest":
         return {
             "tool": tool_name,
-            "data": sandbox.GetRentals(user_id=resolved_user_id, limit=limit),
+            "data": sandbox.GetHistoryDigest(
+                user_id=resolved_user_id, period=args.get("period")
+            ),
         }
     if tool_name == "get_user_profile":
         return {"tool": tool_name, "data": sandbox.GetUserProfile(user_id=resolved_user_id)}
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import lru_cache
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from app.config.config import GetSettings, Settings
+from app.core.deadline import BindDeadline, Deadline
+from app.core.llm_service import GetLlmService
+from app.core.metrics import CountEvent, RecordStage
+from app.core.services_db import (
+    DB_ROLE_ANALYTICS,
+    DB_ROLE_PRIMARY,
+    GetDbConnectionManager,
+    OracleInUse,
+    OraclePoolInUse,
+    PingDb,
+)
+
+
+logger = logging.getLogger(__name__)
+
+STATE_PENDING = "pending"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+@dataclass
+class _Component:
+    name: str
+    warm: Callable[[], Any]
+    state: str = STATE_PENDING
+    detail: Any = None
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+    attempts: int = 0
+    running: bool = False
+    last_attempt_at: float = 0.0
+
+
+def _ImportDrivers(settings: Settings) -> list[str]:
+    modules = ["oracledb"]
+    if settings.bastion_host or settings.bastion_hosts:
+        modules.append("sshtunnel")
+    for module in modules:
+        importlib.import_module(module)
+    return modules
+
+
+def _WarmDb(role: str) -> dict[str, Any]:
+    PingDb(role)
+    if not OraclePoolInUse():
+        return {}
+    manager = GetDbConnectionManager()
+    # Also opens the standby route when one is configured; its failure is not fatal.
+    manager.Warm()
+    return {route: state["bastion"] for route, state in manager.Snapshot()["routes"].items()}
+
+
+class Readiness:
+    """Warms expensive resources at startup and reports whether the pod can serve.
+
+    ``Run`` warms every component concurrently and returns after
+    ``budget_sec`` even if some are still going; those finish in the
+    background. Components that failed are retried (at most every
+    ``retry_interval_sec``) whenever readiness is checked, so a pod whose DB
+    or LLM was briefly unreachable becomes ready without a restart.
+    """
+
+    def __init__(self, components: list[_Component], retry_interval_sec: float) -> None:
+        self._components = {component.name: component for component in components}
+        self._retry_interval_sec = retry_interval_sec
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(components)), thread_name_prefix="warmup"
+        )
+        self._started_at: Optional[float] = None
+
+    def Run(self, budget_sec: float) -> bool:
+        self._started_at = time.monotonic()
+        futures = [
+            future
+            for future in (self._Submit(component, budget_sec) for component in self._Components())
+            if future is not None
+        ]
+        done, not_done = wait(futures, timeout=budget_sec)
+        ready = self.IsReady()
+        RecordStage("warmup", time.monotonic() - self._started_at)
+        logger.info(
+            "웜업 완료 ready=%s done=%s pending=%s", ready, len(done), len(not_done)
+        )
+        return ready
+
+    def IsReady(self) -> bool:
+        with self._lock:
+            return all(component.state == STATE_READY for component in self._components.values())
+
+    def Check(self) -> tuple[bool, dict[str, Any]]:
+        """Current readiness plus per-component state; kicks off due retries."""
+        now = time.monotonic()
+        for component in self._Components():
+            with self._lock:
+                due = (
+                    component.state == STATE_FAILED
+                    and not component.running
+                    and now - component.last_attempt_at >= self._retry_interval_sec
+                )
+            if due:
+                self._Submit(component, GetSettings().warmup_budget_sec)
+        with self._lock:
+            components = {
+                component.name: {
+                    "state": component.state,
+                    "elapsed_ms": component.elapsed_ms,
+                    "attempts": component.attempts,
+                    "detail": component.detail,
+                    "error": component.error,
+                }
+                for component in self._components.values()
+            }
+            ready = all(component["state"] == STATE_READY for component in components.values())
+        return ready, components
+
+    def _Components(self) -> list[_Component]:
+        with self._lock:
+            return list(self._components.values())
+
+    def _Submit(self, component: _Component, budget_sec: float) -> Optional[Any]:
+        with self._lock:
+            if component.running:
+                return None
+            component.running = True
+            component.attempts += 1
+            component.last_attempt_at = time.monotonic()
+        try:
+            return self._executor.submit(self._Warm, component, budget_sec)
+        except RuntimeError:
+            with self._lock:
+                component.running = False
+            return None
+
+    def _Warm(self, component: _Component, budget_sec: float) -> None:
+        started = time.perf_counter()
+        state, detail, error = STATE_READY, None, None
+        try:
+            # The budget bounds every connect/read timeout the component derives.
+            with BindDeadline(Deadline.After(budget_sec)):
+                detail = component.warm()
+        except Exception as exc:
+            state, error = STATE_FAILED, f"{exc.__class__.__name__}: {exc}"
+            logger.warning("웜업 실패 component=%s error=%s", component.name, exc)
+            CountEvent(f"warmup_failed_{component.name}")
+        elapsed = time.perf_counter() - started
+        RecordStage("warmup", elapsed, component.name)
+        with self._lock:
+            component.state = state
+            component.detail = detail
+            component.error = error
+            component.elapsed_ms = round(elapsed * 1000, 1)
+            component.running = False
+
+    def Stop(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def BuildComponents(settings: Settings) -> list[_Component]:
+    components = [
+        _Component("llm", lambda: GetLlmService().Warm()),
+        _Component("db", lambda: _WarmDb(DB_ROLE_PRIMARY)),
+    ]
+    if settings.db_analytics_backend:
+        components.append(_Component("db_analytics", lambda: _WarmDb(DB_ROLE_ANALYTICS)))
+    if OracleInUse():
+        # Driver imports are slow; do them next to, not inside, the first logon.
+        components.append(_Component("drivers", lambda: _ImportDrivers(settings)))
+    return components
+
+
+@lru_cache(maxsize=1)
+def GetReadiness() -> Readiness:
+    settings = GetSettings()
+    return Readiness(BuildComponents(settings), settings.warmup_retry_interval_sec)
@@ -0,0 +1 @@
+"""Offline load-test and benchmark suite (stub vLLM, local DB, load driver)."""
@@ -0,0 +1,165 @@
+"""Per-request logging overhead on the request thread.
+
+Each simulated request emits the log lines one ``/api/generate`` turn
+produces (two LLM calls, one tool call, one 400 retry with the backend's
+error body) from ``--threads`` threads, and the time spent inside the
+logging calls is recorded per request. The sink can be slowed down per
+write (``--sink-latency-ms``) to model a blocked stdout or log collector.
+
+* ``off``: logging disabled, the floor
+* ``sync``: the previous setup, ``basicConfig``-style stream handler on the
+  request thread, every per-call line and the full error body
+* ``queue``: ``StartLogging`` (bounded queue, JSON records, request ids,
+  sampled per-call lines, truncated bodies)
+
+Prints a JSON report with per-request microseconds.
+"""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+import json
+import logging
+import statistics
+import threading
+import time
+from typing import Any, Optional
+import uuid
+
+from app.config.config import GetSettings
+from app.core.structured_log import (
+    SAMPLED_LOGGER_SUFFIX,
+    BindRequestId,
+    LoggingSnapshot,
+    StartLogging,
+    StopLogging,
+    TruncateForLog,
+)
+
+
+_LOGGER = logging.getLogger("app.core.llm_service")
+_CALL_LOGGER = logging.getLogger("app.core.llm_service" + SAMPLED_LOGGER_SUFFIX)
+_TOOLS = ["get_pricing_summary", "get_usage_summary", "get_total_payments", "get_rentals"]
+_ERROR_BODY = json.dumps(
+    {
+        "object": "error",
+        "message": "This model's maximum context length is 4096 tokens. " * 40,
+        "type": "BadRequestError",
+        "code": 400,
+    }
+)
+
+
+class _SlowSink:
+    """Write target that takes ``latency_sec`` per write, like a backed-up pipe."""
+
+    def __init__(self, latency_sec: float) -> None:
+        self._latency_sec = latency_sec
+        self._lock = threading.Lock()
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            if self._latency_sec:
+                time.sleep(self._latency_sec)
+            self.writes += 1
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def _LegacyRequest() -> None:
+    for messages in (2, 4):
+        _LOGGER.info(
+            "LLM 요청 시작 url=%s model=%s messages=%s tools=%s",
+            "http://llm:8000/v1/chat/completions", "stub-model", messages, _TOOLS,
+        )
+        _LOGGER.info("LLM 토큰 계산 input_est=%s max_tokens=%s", 1231, 2833)
+    _LOGGER.warning("요청 400 응답 body=%s", _ERROR_BODY)
+    _LOGGER.info("도구 호출 실행 name=%s id=%s", "get_pricing_summary", "call_0")
+
+
+def _CurrentRequest(max_body_chars: int) -> None:
+    for messages in (2, 4):
+        if _CALL_LOGGER.isEnabledFor(logging.INFO):
+            _CALL_LOGGER.info(
+                "LLM 요청 시작 url=%s model=%s messages=%s tools=%s input_est=%s max_tokens=%s",
+                "http://llm:8000/v1/chat/completions", "stub-model", messages, _TOOLS, 1231, 2833,
+            )
+    _LOGGER.warning("요청 400 응답 body=%s", TruncateForLog(_ERROR_BODY, max_body_chars))
+    _CALL_LOGGER.info("도구 호출 실행 name=%s id=%s", "get_pricing_summary", "call_0")
+
+
+def _Configure(mode: str, sink: _SlowSink, settings: Any) -> None:
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    if mode == "queue":
+        StartLogging(settings, stream=sink)
+        return
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s - %(message)s"))
+    root.addHandler(handler)
+    root.setLevel(logging.CRITICAL if mode == "off" else logging.INFO)
+
+
+def RunMode(mode: str, requests_count: int, threads: int, sink_latency_sec: float) -> dict[str, Any]:
+    settings = replace(GetSettings(), log_format="json")
+    sink = _SlowSink(sink_latency_sec)
+    _Configure(mode, sink, settings)
+
+    def Request(_: int) -> float:
+        with BindRequestId(uuid.uuid4().hex):
+            started = time.perf_counter()
+            if mode == "queue":
+                _CurrentRequest(settings.log_max_body_chars)
+            else:
+                _LegacyRequest()
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        samples = sorted(executor.map(Request, range(requests_count)))
+    elapsed = time.perf_counter() - started
+    report: dict[str, Any] = {
+        "mode": mode,
+        "per_request_us": {
+            "p50": round(samples[len(samples) // 2] * 1e6, 1),
+            "p95": round(samples[int(len(samples) * 0.95)] * 1e6, 1),
+            "mean": round(statistics.fmean(samples) * 1e6, 1),
+            "max": round(samples[-1] * 1e6, 1),
+        },
+        "wall_sec": round(elapsed, 3),
+    }
+    if mode == "queue":
+        report["logging"] = LoggingSnapshot()
+        StopLogging(timeout_sec=0)
+    report["sink_writes"] = sink.writes
+    return report
+
+
+def _Main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Logging overhead per request")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--sink-latency-ms", type=float, default=0.2)
+    parser.add_argument("--modes", default="off,sync,queue")
+    args = parser.parse_args(argv)
+    results = [
+        RunMode(mode.strip(), args.requests, args.threads, args.sink_latency_ms / 1000)
+        for mode in args.modes.split(",")
+        if mode.strip()
+    ]
+    report = {
+        "requests": args.requests,
+        "threads": args.threads,
+        "sink_latency_ms": args.sink_latency_ms,
+        "results": results,
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    _Main()
@@ -0,0 +1,129 @@
+"""Micro-benchmark for row materialization and JSON encoding of tool results.
+
+Builds a 100-row rental result (the shape returned by ``get_rentals``) and
+times each pipeline from driver rows to the JSON text placed in the tool
+message:
+
+* ``legacy``: per-call column list, dict per row, ``json.dumps(indent=2, default=str)``
+* ``records``: ``FetchAllDicts`` (cached column names) + ``EncodeJson``
+* ``compact``: ``FetchRows`` (columns once, row tuples as-is) + ``EncodeJson``
+
+Prints a JSON report with per-iteration microseconds and payload sizes.
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta
+from decimal import Decimal
+import json
+import timeit
+from typing import Any, Callable, Optional
+
+from app.core.json_codec import ENCODER_NAME, EncodeJson
+from app.core.services_db import FetchAllDicts, FetchRows
+
+
+RENTAL_COLUMNS = (
+    "RENTAL_ID",
+    "USER_ID",
+    "USERNAME",
+    "BIKE_ID",
+    "START_TIME",
+    "END_TIME",
+    "TOTAL_DISTANCE",
+    "CREATED_AT",
+)
+
+
+class _FakeCursor:
+    """Just enough of a DB-API cursor to replay a fixed result set."""
+
+    def __init__(self, rows: list[tuple]) -> None:
+        self.description = [(name, None, None, None, None, None, None) for name in RENTAL_COLUMNS]
+        self._rows = rows
+
+    def fetchall(self) -> list[tuple]:
+        return self._rows
+
+
+def BuildRentalRows(count: int = 100) -> list[tuple]:
+    base = datetime(2025, 1, 1, 8, 0, 0)
+    rows: list[tuple] = []
+    for index in range(count):
+        start = base + timedelta(hours=index * 7)
+        end = start + timedelta(minutes=12 + index % 40)
+        rows.append(
+            (
+                10_000 - index,
+                42,
+                "사용자42",
+                1000 + index % 50,
+                start,
+                end,
+                Decimal(f"{1 + index % 9}.{index % 100:02d}"),
+                start,
+            )
+        )
+    return rows
+
+
+def _LegacyPipeline(cursor: _FakeCursor) -> str:
+    rows = cursor.fetchall()
+    columns = [col[0].lower() for col in cursor.description]
+    data = [dict(zip(columns, row)) for row in rows]
+    return json.dumps(
+        {"tool": "get_rentals", "data": data}, ensure_ascii=False, indent=2, default=str
+    )
+
+
+def _RecordsPipeline(cursor: _FakeCursor) -> str:
+    data = FetchAllDicts(cursor)
+    return EncodeJson({"tool": "get_rentals", "data": data}).decode("utf-8")
+
+
+def _CompactPipeline(cursor: _FakeCursor) -> str:
+    data = FetchRows(cursor)
+    return EncodeJson({"tool": "get_rentals", "data": data}).decode("utf-8")
+
+
+PIPELINES: dict[str, Callable[[_FakeCursor], str]] = {
+    "legacy": _LegacyPipeline,
+    "records": _RecordsPipeline,
+    "compact": _CompactPipeline,
+}
+
+
+def RunBenchmark(rows: int = 100, iterations: int = 2000, repeat: int = 5) -> dict[str, Any]:
+    cursor = _FakeCursor(BuildRentalRows(rows))
+    results: dict[str, Any] = {}
+    for name, pipeline in PIPELINES.items():
+        timings = timeit.repeat(lambda: pipeline(cursor), number=iterations, repeat=repeat)
+        text = pipeline(cursor)
+        results[name] = {
+            "us_per_call": round(min(timings) / iterations * 1_000_000, 2),
+            "bytes": len(text.encode("utf-8")),
+        }
+    legacy_us = results["legacy"]["us_per_call"]
+    for name, result in results.items():
+        result["speedup"] = round(legacy_us / result["us_per_call"], 2) if result["us_per_call"] else None
+    return {
+        "encoder": ENCODER_NAME,
+        "rows": rows,
+        "iterations": iterations,
+        "repeat": repeat,
+        "pipelines": results,
+    }
+
+
+def _Main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Row materialization / JSON encoding benchmark")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    report = RunBenchmark(args.rows, args.iterations, args.repeat)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    _Main()
@@ -0,0 +1,162 @@
+"""Compare native tool calling with guided-decoding tool selection.
+
+Starts an in-process ``stub_llm`` and runs the same tool-worthy prompts
+through ``LLMService.GenerateAssistantReply`` once per selection mode.
+Tools are answered by a canned executor, so no database is needed. The
+stub's ``--tool-miss-rate`` models a model that sometimes ignores the tools
+and writes a full free-text answer first. That is the wasted generation
+guided mode is meant to remove.
+
+Prints a JSON report per mode: tool-selection and end-to-end latency
+percentiles, the share of turns whose first call produced a usable tool
+call, and how many fell back to content parsing or a forced call.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import replace
+import json
+import os
+import time
+from typing import Any, Optional
+
+# Keep benchmark turns out of the audit log; must be set before app settings load.
+os.environ.setdefault("AUDIT_SINK", "off")
+
+from prometheus_client import REGISTRY  # noqa: E402
+
+from app.config.config import GetSettings  # noqa: E402
+from app.core.llm_service import (  # noqa: E402
+    TOOL_SELECTION_GUIDED,
+    TOOL_SELECTION_NATIVE,
+    LLMService,
+)
+from app.core.metrics import BindRequestTimings, RequestTimings  # noqa: E402
+from app.schemas import LlmMessage  # noqa: E402
+from bench.load_driver import WORKLOAD  # noqa: E402
+from bench.stub_llm import (  # noqa: E402
+    _DEFAULT_KEYWORDS_PATH,
+    StubConfig,
+    StartStubServer,
+    _LoadKeywords,
+)
+
+
+_EVENTS = (
+    "guided_tool_call",
+    "guided_tool_parse_failed",
+    "guided_unsupported_400",
+    "content_tool_call",
+    "forced_tool_call",
+)
+
+
+def _Percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return round(ordered[index], 1)
+
+
+def _EventCount(event: str) -> float:
+    return REGISTRY.get_sample_value("llm_app_events_total", {"event": event}) or 0.0
+
+
+def _CannedTool(tool_call: dict[str, Any], user_id: int) -> dict[str, Any]:
+    name = (tool_call.get("function") or {}).get("name")
+    return {"tool": name, "data": {"user_id": str(user_id), "total_amount": 12000}}
+
+
+def _ToolPrompts(keywords: dict[str, list[str]]) -> list[str]:
+    prompts: list[str] = []
+    for _, prompt in WORKLOAD:
+        if any(keyword in prompt for words in keywords.values() for keyword in words):
+            prompts.append(prompt)
+    return prompts
+
+
+def RunMode(base_url: str, mode: str, prompts: list[str], requests_count: int) -> dict[str, Any]:
+    settings = replace(
+        GetSettings(),
+        llm_base_url=base_url,
+        llm_base_urls=[],
+        model_id="stub-model",
+        llm_tool_selection_mode=mode,
+    )
+    service = LLMService(settings)
+    before = {event: _EventCount(event) for event in _EVENTS}
+    selection_ms: list[float] = []
+    total_ms: list[float] = []
+    errors = 0
+    for index in range(requests_count):
+        message = LlmMessage(role="user", user_id=1, content=prompts[index % len(prompts)])
+        timings = RequestTimings()
+        started = time.perf_counter()
+        try:
+            with BindRequestTimings(timings):
+                service.GenerateAssistantReply(message, _CannedTool)
+        except Exception:
+            errors += 1
+            continue
+        total_ms.append((time.perf_counter() - started) * 1000)
+        for (stage, _), seconds in timings.Entries().items():
+            if stage == "tool_selection":
+                selection_ms.append(seconds * 1000)
+    events = {event: int(_EventCount(event) - before[event]) for event in _EVENTS}
+    first_pass = requests_count - errors - events["content_tool_call"] - events["forced_tool_call"]
+    return {
+        "requests": requests_count,
+        "errors": errors,
+        "first_pass_rate": round(first_pass / requests_count, 4) if requests_count else 0.0,
+        "events": events,
+        "tool_selection_ms": {
+            "p50": _Percentile(selection_ms, 50),
+            "p95": _Percentile(selection_ms, 95),
+        },
+        "total_ms": {"p50": _Percentile(total_ms, 50), "p95": _Percentile(total_ms, 95)},
+    }
+
+
+def _Main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Native vs guided tool selection benchmark")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--per-token-ms", type=float, default=2.0)
+    parser.add_argument("--completion-tokens", type=int, default=256)
+    parser.add_argument("--tool-miss-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    keywords = _LoadKeywords(_DEFAULT_KEYWORDS_PATH)
+    stub = StartStubServer(
+        StubConfig(
+            latency_ms=args.latency_ms,
+            jitter_ms=0.0,
+            per_token_ms=args.per_token_ms,
+            completion_tokens=args.completion_tokens,
+            tool_miss_rate=args.tool_miss_rate,
+            seed=args.seed,
+            keywords=keywords,
+        )
+    )
+    base_url = f"http://127.0.0.1:{stub.server_address[1]}"
+    prompts = _ToolPrompts(keywords)
+    report = {
+        "stub": {
+            "latency_ms": args.latency_ms,
+            "per_token_ms": args.per_token_ms,
+            "completion_tokens": args.completion_tokens,
+            "tool_miss_rate": args.tool_miss_rate,
+        },
+        "modes": {
+            mode: RunMode(base_url, mode, prompts, args.requests)
+            for mode in (TOOL_SELECTION_NATIVE, TOOL_SELECTION_GUIDED)
+        },
+    }
+    stub.shutdown()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    _Main()
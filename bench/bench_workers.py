@@ -0,0 +1,188 @@
+"""Throughput scaling of ``app.server`` from 1 to N worker processes.
+
+For each worker count the benchmark starts ``python -m app.server`` against
+an in-process ``stub_llm`` and a seeded SQLite database, waits for
+``/ready``, drives it with ``load_driver`` and stops it again. The stub
+latency is kept low so the app's own CPU work (JSON, prompt building,
+SQLite, HTTP) is what limits throughput.
+
+The report lists requests/s and p50/p95 per worker count, plus the scaling
+efficiency ``rps(N) / (rps(1) * N)``.
+"""
+from __future__ import annotations
+
+import argparse
+from contextlib import contextmanager
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Iterator, Optional
+
+from bench.load_driver import RunLoad
+from bench.stub_llm import (
+    _DEFAULT_KEYWORDS_PATH,
+    StubConfig,
+    StartStubServer,
+    _LoadKeywords,
+)
+
+
+def _WaitReady(url: str, timeout_sec: float) -> None:
+    deadline = time.monotonic() + timeout_sec
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/ready", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"server at {url} did not become ready in {timeout_sec}s")
+
+
+@contextmanager
+def LaunchServer(workers: int, port: int, env: dict[str, str]) -> Iterator[str]:
+    """Run ``python -m app.server`` with ``env`` until the block exits; yields its URL."""
+    url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--workers", str(workers), "--port", str(port),
+         "--host", "127.0.0.1", "--log-level", "warning"],
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _WaitReady(url, timeout_sec=60)
+        yield url
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=40)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def CheckSharedCache(start_methods: Optional[list[str]] = None) -> None:
+    """Round-trip one entry through the supervisor's shared tool cache per start method.
+
+    Workers only ever see the cache through the manager's server process, so
+    it must be built there under ``spawn``/``forkserver`` as well as ``fork``.
+    """
+    from app.services.tool_cache import SharedToolResultCache, StartSharedCacheServer
+
+    for method in start_methods or multiprocessing.get_all_start_methods():
+        with tempfile.TemporaryDirectory() as runtime_dir:
+            address = os.path.join(runtime_dir, "tool-cache.sock")
+            authkey = os.urandom(32)
+            manager = StartSharedCacheServer(
+                address, authkey, 16, 60.0, ctx=multiprocessing.get_context(method)
+            )
+            try:
+                cache = SharedToolResultCache(address, authkey)
+                cache.Put("get_user_profile", 1, {"user_id": 1})
+                if cache.Get("get_user_profile", 1) != {"user_id": 1}:
+                    raise RuntimeError(f"shared tool cache round-trip failed under {method}")
+            finally:
+                manager.shutdown()
+
+
+def RunWorkers(
+    workers: int,
+    port: int,
+    env: dict[str, str],
+    concurrency: int,
+    requests_count: int,
+    users: int,
+) -> dict[str, Any]:
+    with LaunchServer(workers, port, env) as url:
+        # Untimed pass so every worker has warm caches and connections.
+        RunLoad(url, concurrency, min(requests_count, 50), users)
+        report = RunLoad(url, concurrency, requests_count, users)
+    return {
+        "workers": workers,
+        "throughput_rps": report["throughput_rps"],
+        "latency_ms": report["latency_ms"],
+        "statuses": report["statuses"],
+    }
+
+
+def _Main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="app.server worker scaling benchmark")
+    parser.add_argument("--workers", default="", help="comma list, default 1..CPU count")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--db-path", default="bench.db", help="seeded with bench.local_db")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    parser.add_argument(
+        "--check-shared-cache",
+        action="store_true",
+        help="only run the shared tool cache round-trip under every start method",
+    )
+    args = parser.parse_args(argv)
+    if args.check_shared_cache:
+        CheckSharedCache()
+        print("shared tool cache ok:", ",".join(multiprocessing.get_all_start_methods()))
+        return
+
+    counts = (
+        [int(value) for value in args.workers.split(",") if value.strip()]
+        if args.workers
+        else list(range(1, (os.cpu_count() or 1) + 1))
+    )
+    stub = StartStubServer(
+        StubConfig(
+            latency_ms=args.latency_ms,
+            jitter_ms=0.0,
+            max_num_seqs=max(64, args.concurrency * 2),
+            keywords=_LoadKeywords(_DEFAULT_KEYWORDS_PATH),
+            seed=7,
+        )
+    )
+    env = {
+        "LLM_BASE_URL": f"http://127.0.0.1:{stub.server_address[1]}",
+        "MODEL_ID": "stub-model",
+        "DB_BACKEND": "sqlite",
+        "DB_PATH": os.path.abspath(args.db_path),
+        "AUDIT_SINK": "off",
+        # A fixed global LLM budget, split across however many workers run.
+        "SERVER_LLM_CONCURRENCY": str(args.concurrency),
+        "LLM_MAX_QUEUE": str(args.concurrency * 4),
+    }
+    results = [
+        RunWorkers(count, args.port, env, args.concurrency, args.requests, args.users)
+        for count in counts
+    ]
+    stub.shutdown()
+    base = next((result for result in results if result["workers"] == 1), None)
+    for result in results:
+        if base and base["throughput_rps"]:
+            result["efficiency"] = round(
+                result["throughput_rps"] / (base["throughput_rps"] * result["workers"]), 3
+            )
+    report = {
+        "cpu_count": os.cpu_count(),
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "stub_latency_ms": args.latency_ms,
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    _Main()
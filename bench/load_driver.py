@@ -0,0 +1,299 @@
+"""Closed-loop load driver for ``POST /api/generate``.
+
+Runs a weighted mix of Korean prompts with a fixed number of concurrent
+clients and writes a JSON report (throughput, latency percentiles, LLM calls
+per request, Server-Timing stage averages). Reports from different commits
+can be diffed with ``--compare``.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+from typing import Any, Optional
+import urllib.error
+import urllib.request
+
+
+# (weight, prompt) pairs; covers every tool plus tool-less chat.
+WORKLOAD: tuple[tuple[int, str], ...] = (
+    (20, "이번 달 사용 내역 알려줘"),
+    (10, "총 결제 금액 알려줘"),
+    (10, "결제 내역 보여줘"),
+    (10, "최근 대여 기록 보여줘"),
+    (8, "내 정보 알려줘"),
+    (8, "지난달 요금 요약해줘"),
+    (8, "이용 요약 보여줘"),
+    (6, "대여 가능한 자전거 있어?"),
+    (10, "안녕"),
+    (10, "자전거 탈 때 안전 수칙 알려줘"),
+)
+
+
+@dataclass
+class Sample:
+    prompt: str
+    status: int
+    latency_ms: float
+    server_timing: dict[str, float]
+
+
+def _Percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def ParseServerTiming(header: str) -> dict[str, float]:
+    timings: dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, rest = part.strip().partition(";")
+        for param in rest.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                try:
+                    timings[name] = timings.get(name, 0.0) + float(value)
+                except ValueError:
+                    continue
+    return timings
+
+
+def _HttpJson(url: str, method: str = "GET", body: Optional[dict] = None) -> Any:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(
+        url, data=data, method=method, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read() or b"null")
+
+
+def _StubChatRequests(stub_url: Optional[str]) -> Optional[int]:
+    if not stub_url:
+        return None
+    try:
+        stats = _HttpJson(f"{stub_url.rstrip('/')}/stub/stats")
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+    return int((stats.get("counts") or {}).get("chat_requests", 0))
+
+
+def _GitCommit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip() or None
+
+
+class LoadDriver:
+    def __init__(
+        self,
+        url: str,
+        concurrency: int = 8,
+        total_requests: int = 200,
+        users: int = 1000,
+        timeout_sec: float = 120.0,
+        seed: int = 3,
+        path: str = "/api/generate",
+        workload: tuple[tuple[int, str], ...] = WORKLOAD,
+    ) -> None:
+        self._url = url.rstrip("/") + path
+        self._concurrency = max(1, concurrency)
+        self._total = max(1, total_requests)
+        self._users = max(1, users)
+        self._timeout = timeout_sec
+        self._workload = workload
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._issued = 0
+        self.samples: list[Sample] = []
+
+    def _Next(self) -> Optional[tuple[str, int]]:
+        with self._lock:
+            if self._issued >= self._total:
+                return None
+            self._issued += 1
+            weights = [weight for weight, _ in self._workload]
+            prompt = self._rng.choices([text for _, text in self._workload], weights)[0]
+            return prompt, self._rng.randint(1, self._users)
+
+    def _Send(self, prompt: str, user_id: int) -> Sample:
+        body = json.dumps(
+            {"message": {"role": "user", "user_id": user_id, "content": prompt}}
+        ).encode("utf-8")
+        request = urllib.request.Request(
+            self._url, data=body, method="POST", headers={"Content-Type": "application/json"}
+        )
+        started = time.perf_counter()
+        status = 0
+        timing_header = ""
+        try:
+            with urllib.request.urlopen(request, timeout=self._timeout) as response:
+                response.read()
+                status = response.status
+                timing_header = response.headers.get("Server-Timing", "")
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+            timing_header = exc.headers.get("Server-Timing", "") if exc.headers else ""
+        except (urllib.error.URLError, OSError):
+            status = 0
+        latency_ms = (time.perf_counter() - started) * 1000
+        return Sample(prompt, status, latency_ms, ParseServerTiming(timing_header))
+
+    def _Worker(self) -> None:
+        while True:
+            job = self._Next()
+            if job is None:
+                return
+            sample = self._Send(*job)
+            with self._lock:
+                self.samples.append(sample)
+
+    def Run(self) -> float:
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._Worker, name=f"load-{index}", daemon=True)
+            for index in range(self._concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+
+def BuildReport(
+    samples: list[Sample],
+    elapsed_sec: float,
+    llm_calls: Optional[int],
+    config: dict[str, Any],
+) -> dict[str, Any]:
+    ok = [sample.latency_ms for sample in samples if 200 <= sample.status < 300]
+    statuses: dict[str, int] = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    stage_totals: dict[str, float] = {}
+    for sample in samples:
+        for name, value in sample.server_timing.items():
+            stage_totals[name] = stage_totals.get(name, 0.0) + value
+    count = max(1, len(samples))
+    return {
+        "commit": _GitCommit(),
+        "timestamp": int(time.time()),
+        "config": config,
+        "requests": len(samples),
+        "statuses": statuses,
+        "elapsed_sec": round(elapsed_sec, 3),
+        "throughput_rps": round(len(samples) / elapsed_sec, 3) if elapsed_sec else 0.0,
+        "latency_ms": {
+            "p50": round(_Percentile(ok, 50), 2),
+            "p95": round(_Percentile(ok, 95), 2),
+            "p99": round(_Percentile(ok, 99), 2),
+            "mean": round(sum(ok) / len(ok), 2) if ok else 0.0,
+            "max": round(max(ok), 2) if ok else 0.0,
+        },
+        "llm_calls_per_request": round(llm_calls / count, 3) if llm_calls is not None else None,
+        "stage_avg_ms": {
+            name: round(total / count, 3) for name, total in sorted(stage_totals.items())
+        },
+    }
+
+
+def CompareReports(baseline: dict[str, Any], current: dict[str, Any]) -> dict[str, Any]:
+    def _Delta(old: Optional[float], new: Optional[float]) -> Optional[float]:
+        if not old or new is None:
+            return None
+        return round((new - old) / old * 100, 2)
+
+    return {
+        "baseline_commit": baseline.get("commit"),
+        "current_commit": current.get("commit"),
+        "throughput_rps_pct": _Delta(baseline.get("throughput_rps"), current.get("throughput_rps")),
+        "latency_pct": {
+            key: _Delta(baseline["latency_ms"].get(key), value)
+            for key, value in current.get("latency_ms", {}).items()
+        },
+        "llm_calls_per_request_pct": _Delta(
+            baseline.get("llm_calls_per_request"), current.get("llm_calls_per_request")
+        ),
+    }
+
+
+def RunLoad(
+    url: str,
+    concurrency: int,
+    total_requests: int,
+    users: int,
+    stub_url: Optional[str] = None,
+    timeout_sec: float = 120.0,
+    seed: int = 3,
+) -> dict[str, Any]:
+    before = _StubChatRequests(stub_url)
+    driver = LoadDriver(
+        url,
+        concurrency=concurrency,
+        total_requests=total_requests,
+        users=users,
+        timeout_sec=timeout_sec,
+        seed=seed,
+    )
+    elapsed = driver.Run()
+    after = _StubChatRequests(stub_url)
+    llm_calls = after - before if before is not None and after is not None else None
+    config = {
+        "url": url,
+        "concurrency": concurrency,
+        "total_requests": total_requests,
+        "users": users,
+        "seed": seed,
+    }
+    return BuildReport(driver.samples, elapsed, llm_calls, config)
+
+
+def _Main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load driver for /api/generate")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--stub-url", default=None, help="stub vLLM root for LLM call counts")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--timeout-sec", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    parser.add_argument("--compare", default=None, help="baseline JSON report to diff against")
+    args = parser.parse_args(argv)
+
+    report = RunLoad(
+        args.url,
+        args.concurrency,
+        args.requests,
+        args.users,
+        stub_url=args.stub_url,
+        timeout_sec=args.timeout_sec,
+        seed=args.seed,
+    )
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            report["comparison"] = CompareReports(json.load(handle), report)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    _Main()
@@ -0,0 +1,363 @@
+"""Seeded SQLite stand-in for the Oracle schema used by ``app/sandbox/queries``.
+
+``python -m bench.local_db seed --path bench.db --users 1000`` builds a
+deterministic dataset and ``python -m bench.local_db run --path bench.db``
+times the query shapes used by the sandbox tools against it.
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta
+import json
+import os
+import random
+import sqlite3
+import statistics
+import time
+from typing import Any, Optional
+
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL,
+        name TEXT,
+        email TEXT,
+        phone TEXT,
+        password TEXT,
+        card_number TEXT,
+        total_point INTEGER DEFAULT 0,
+        admin_level INTEGER DEFAULT 0,
+        created_at TEXT,
+        updated_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS bikes (
+        bike_id INTEGER PRIMARY KEY,
+        serial_number TEXT,
+        model_name TEXT,
+        status TEXT,
+        latitude REAL,
+        longitude REAL,
+        updated_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rentals (
+        rental_id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        bike_id INTEGER,
+        start_time TEXT,
+        end_time TEXT,
+        total_distance REAL,
+        created_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS payments (
+        payment_id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        amount INTEGER,
+        payment_status TEXT,
+        payment_method TEXT,
+        payment_key TEXT,
+        order_id TEXT,
+        remain_amount INTEGER,
+        created_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat (
+        chat_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT,
+        user_id INTEGER,
+        role TEXT,
+        content TEXT,
+        created_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_audit (
+        audit_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT,
+        user_id INTEGER,
+        content TEXT,
+        created_at TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_rentals_user ON rentals (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_payments_user ON payments (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_bikes_status ON bikes (status, updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_chat_session ON chat (session_id, user_id, chat_id)",
+)
+
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+_MODELS = ("CITY-3", "CITY-7", "E-BIKE", "MINI")
+_METHODS = ("CARD", "CARD", "CARD", "POINT")
+
+
+def Connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    return connection
+
+
+def SeedDatabase(
+    path: str,
+    users: int = 1000,
+    rentals_per_user: int = 40,
+    payments_per_user: int = 20,
+    bikes: int = 500,
+    months: int = 12,
+    seed: int = 7,
+    now: Optional[datetime] = None,
+) -> dict[str, int]:
+    """Create the schema and fill it with a deterministic dataset."""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    now = now or datetime.utcnow().replace(microsecond=0)
+    horizon = timedelta(days=30 * months)
+    connection = Connect(path)
+    with connection:
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.executemany(
+            "INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    user_id,
+                    f"user{user_id}",
+                    f"사용자{user_id}",
+                    f"user{user_id}@example.com",
+                    f"010-0000-{user_id % 10000:04d}",
+                    "x",
+                    "0000-0000-0000-0000",
+                    rng.randint(0, 5000),
+                    0,
+                    (now - horizon).strftime(_TS_FORMAT),
+                    now.strftime(_TS_FORMAT),
+                )
+                for user_id in range(1, users + 1)
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO bikes VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    bike_id,
+                    f"SN{bike_id:06d}",
+                    rng.choice(_MODELS),
+                    "AVAILABLE" if rng.random() < 0.7 else "IN_USE",
+                    37.5 + rng.random() * 0.1,
+                    127.0 + rng.random() * 0.1,
+                    (now - timedelta(minutes=rng.randint(0, 10000))).strftime(_TS_FORMAT),
+                )
+                for bike_id in range(1, bikes + 1)
+            ),
+        )
+
+        def _Rentals() -> Any:
+            for user_id in range(1, users + 1):
+                for _ in range(rentals_per_user):
+                    start = now - timedelta(seconds=rng.randint(0, int(horizon.total_seconds())))
+                    end = start + timedelta(minutes=rng.randint(3, 90))
+                    yield (
+                        None,
+                        user_id,
+                        rng.randint(1, bikes),
+                        start.strftime(_TS_FORMAT),
+                        end.strftime(_TS_FORMAT),
+                        round(rng.random() * 12, 2),
+                        start.strftime(_TS_FORMAT),
+                    )
+
+        def _Payments() -> Any:
+            for user_id in range(1, users + 1):
+                for index in range(payments_per_user):
+                    created = now - timedelta(seconds=rng.randint(0, int(horizon.total_seconds())))
+                    amount = rng.choice((1000, 1500, 2000, 3000, 5000))
+                    yield (
+                        None,
+                        user_id,
+                        amount,
+                        "DONE" if rng.random() < 0.95 else "CANCELED",
+                        rng.choice(_METHODS),
+                        f"pk_{user_id}_{index}",
+                        f"order_{user_id}_{index}",
+                        0,
+                        created.strftime(_TS_FORMAT),
+                    )
+
+        connection.executemany("INSERT INTO rentals VALUES (?, ?, ?, ?, ?, ?, ?)", _Rentals())
+        connection.executemany(
+            "INSERT INTO payments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", _Payments()
+        )
+    connection.execute("ANALYZE")
+    connection.close()
+    return {
+        "users": users,
+        "rentals": users * rentals_per_user,
+        "payments": users * payments_per_user,
+        "bikes": bikes,
+    }
+
+
+_MINUTES = (
+    "(julianday(COALESCE(end_time, created_at)) - "
+    "julianday(COALESCE(start_time, created_at))) * 1440"
+)
+
+# SQLite equivalents of the statements issued by app/sandbox/queries.
+QUERY_SHAPES: dict[str, str] = {
+    "available_bikes": (
+        "SELECT bike_id, serial_number, model_name, status, latitude, longitude, updated_at "
+        "FROM bikes WHERE status = 'AVAILABLE' ORDER BY updated_at DESC LIMIT :limit"
+    ),
+    "payments": (
+        "SELECT r.payment_id, r.user_id, u.username, r.amount, r.payment_status, "
+        "r.payment_method, r.payment_key, r.order_id, r.remain_amount, r.created_at "
+        "FROM payments r LEFT JOIN users u ON r.user_id = u.user_id "
+        "WHERE r.user_id = :user_id ORDER BY r.payment_id DESC LIMIT :limit"
+    ),
+    "rentals": (
+        "SELECT r.rental_id, r.user_id, u.username, r.bike_id, r.start_time, r.end_time, "
+        "r.total_distance, r.created_at "
+        "FROM rentals r LEFT JOIN users u ON r.user_id = u.user_id "
+        "WHERE r.user_id = :user_id ORDER BY r.rental_id DESC LIMIT :limit"
+    ),
+    "user_profile": (
+        "SELECT user_id, username, name, email, phone, total_point, admin_level, "
+        "created_at, updated_at FROM users WHERE user_id = :user_id LIMIT 1"
+    ),
+    "latest_period": (
+        "SELECT MAX(period) AS period FROM ("
+        "SELECT strftime('%Y-%m', p.created_at) AS period FROM payments p "
+        "WHERE p.user_id = :user_id UNION ALL "
+        "SELECT strftime('%Y-%m', COALESCE(r.start_time, r.created_at)) AS period "
+        "FROM rentals r WHERE r.user_id = :user_id) t"
+    ),
+    "pricing_summary": (
+        "SELECT :user_id AS user_id, :period AS period, 'KRW' AS currency, "
+        "COALESCE(SUM(p.amount), 0) AS total_amount, 0 AS discounts, "
+        "COUNT(r.rental_id) AS rides "
+        "FROM payments p LEFT JOIN rentals r ON p.user_id = r.user_id "
+        "AND strftime('%Y-%m', COALESCE(r.start_time, r.created_at)) = :period "
+        "WHERE p.user_id = :user_id AND p.payment_status = 'DONE' "
+        "AND strftime('%Y-%m', p.created_at) = :period"
+    ),
+    "usage_summary": (
+        "SELECT :user_id AS user_id, :period AS period, COUNT(rental_id) AS total_rides, "
+        "COALESCE(ROUND(SUM(total_distance), 2), 0) AS total_distance_km, "
+        f"COALESCE(SUM({_MINUTES}), 0) AS total_minutes "
+        "FROM rentals WHERE user_id = :user_id AND strftime('%Y-%m', created_at) = :period"
+    ),
+    "usage_peak_hours": (
+        "SELECT CAST(strftime('%H', start_time) AS INTEGER) AS hour_bucket FROM rentals "
+        "WHERE user_id = :user_id AND strftime('%Y-%m', created_at) = :period "
+        "GROUP BY hour_bucket ORDER BY COUNT(*) DESC LIMIT 2"
+    ),
+    "total_payments": (
+        "SELECT :user_id AS user_id, :period AS period, 'KRW' AS currency, "
+        "COALESCE(SUM(CASE WHEN payment_method = 'CARD' THEN amount ELSE 0 END), 0) "
+        "AS card_amount, "
+        "COALESCE(SUM(CASE WHEN payment_method = 'POINT' THEN amount ELSE 0 END), 0) "
+        "AS point_amount, COALESCE(SUM(amount), 0) AS total_amount "
+        "FROM payments WHERE user_id = :user_id AND payment_status = 'DONE' "
+        "AND strftime('%Y-%m', created_at) = :period"
+    ),
+    "total_usage_rentals": (
+        f"SELECT COUNT(rental_id) AS total_rentals, COALESCE(SUM({_MINUTES}), 0) "
+        "AS total_minutes FROM rentals WHERE user_id = :user_id "
+        "AND strftime('%Y-%m', created_at) = :period"
+    ),
+    "total_usage_payments": (
+        "SELECT COUNT(amount) AS total_payments, COALESCE(SUM(amount), 0) AS total_amount "
+        "FROM payments WHERE user_id = :user_id AND payment_status = 'DONE' "
+        "AND strftime('%Y-%m', created_at) = :period"
+    ),
+}
+
+
+def _Percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def RunQueryShapes(
+    path: str,
+    iterations: int = 200,
+    seed: int = 11,
+    shapes: Optional[list[str]] = None,
+) -> dict[str, dict[str, float]]:
+    """Time every query shape with random users; returns per-shape latency in ms."""
+    rng = random.Random(seed)
+    connection = Connect(path)
+    (max_user,) = connection.execute("SELECT MAX(user_id) FROM users").fetchone()
+    results: dict[str, dict[str, float]] = {}
+    for name in shapes or list(QUERY_SHAPES):
+        query = QUERY_SHAPES[name]
+        timings: list[float] = []
+        rows = 0
+        for _ in range(iterations):
+            user_id = rng.randint(1, max_user or 1)
+            params = {"user_id": user_id, "limit": 10}
+            if ":period" in query:
+                (period,) = connection.execute(
+                    QUERY_SHAPES["latest_period"], {"user_id": user_id}
+                ).fetchone()
+                params["period"] = period
+            started = time.perf_counter()
+            fetched = connection.execute(query, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+            rows += len(fetched)
+        results[name] = {
+            "iterations": iterations,
+            "avg_rows": round(rows / iterations, 2),
+            "p50_ms": round(statistics.median(timings), 4),
+            "p95_ms": round(_Percentile(timings, 95), 4),
+            "p99_ms": round(_Percentile(timings, 99), 4),
+        }
+    connection.close()
+    return results
+
+
+def _Main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Local SQLite stand-in for the Oracle schema")
+    sub = parser.add_subparsers(dest="command", required=True)
+    seed_parser = sub.add_parser("seed")
+    seed_parser.add_argument("--path", default="bench.db")
+    seed_parser.add_argument("--users", type=int, default=1000)
+    seed_parser.add_argument("--rentals-per-user", type=int, default=40)
+    seed_parser.add_argument("--payments-per-user", type=int, default=20)
+    seed_parser.add_argument("--bikes", type=int, default=500)
+    seed_parser.add_argument("--months", type=int, default=12)
+    seed_parser.add_argument("--seed", type=int, default=7)
+    run_parser = sub.add_parser("run")
+    run_parser.add_argument("--path", default="bench.db")
+    run_parser.add_argument("--iterations", type=int, default=200)
+    run_parser.add_argument("--shape", action="append", dest="shapes")
+    args = parser.parse_args(argv)
+
+    if args.command == "seed":
+        result: Any = SeedDatabase(
+            args.path,
+            users=args.users,
+            rentals_per_user=args.rentals_per_user,
+            payments_per_user=args.payments_per_user,
+            bikes=args.bikes,
+            months=args.months,
+            seed=args.seed,
+        )
+    else:
+        result = RunQueryShapes(args.path, iterations=args.iterations, shapes=args.shapes)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    _Main()
@@ -0,0 +1,286 @@
+"""Replay recorded traffic against a build and diff per-stage timings.
+
+Input is the JSONL written with ``TRAFFIC_RECORD_RATE > 0``
+(``traffic/traffic-<pid>.jsonl*``). Each recorded turn is re-sent to
+``/api/generate`` with its masked message, a local user id derived from the
+user pseudonym and, for multi-turn sessions, a session id derived from the
+session pseudonym, so follow-up questions replay against their history.
+
+Turns are sent open-loop at the recorded inter-arrival times divided by
+``--speed`` (``--speed 0`` sends them back to back, ``--concurrency`` at a
+time). Without ``--url`` the script starts ``stub_llm`` (latency defaults to
+the recorded median LLM call) and ``python -m app.server`` on a seeded
+SQLite DB, i.e. "the slow Tuesday" against the current checkout.
+
+The report compares recorded and replayed Server-Timing stages (p50/p95,
+percent change), turn latency, LLM calls and tools per turn, lists the
+turns that slowed down the most, and can be saved with ``--out``.
+"""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import json
+import os
+import statistics
+import threading
+import time
+from typing import Any, Optional
+import urllib.error
+import urllib.request
+
+from bench.bench_workers import LaunchServer
+from bench.load_driver import ParseServerTiming, _Percentile
+from bench.stub_llm import (
+    _DEFAULT_KEYWORDS_PATH,
+    StubConfig,
+    StartStubServer,
+    _LoadKeywords,
+)
+
+
+def LoadTurns(patterns: list[str]) -> list[dict[str, Any]]:
+    turns: list[dict[str, Any]] = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, "r", encoding="utf-8") as handle:
+                turns.extend(json.loads(line) for line in handle if line.strip())
+    turns.sort(key=lambda turn: turn["ts"])
+    return turns
+
+
+def _LocalUserId(pseudonym: str, users: int) -> int:
+    return int(pseudonym.rpartition("_")[2], 16) % users + 1
+
+
+def _Tools(turn: dict[str, Any]) -> list[str]:
+    return sorted({event["name"] for event in turn["events"] if event["type"] == "tool"})
+
+
+def _LlmCalls(turn: dict[str, Any]) -> int:
+    return sum(1 for event in turn["events"] if event["type"] == "llm")
+
+
+def ReplayTurn(url: str, turn: dict[str, Any], users: int, timeout_sec: float) -> dict[str, Any]:
+    body: dict[str, Any] = {
+        "message": {
+            "role": "user",
+            "user_id": _LocalUserId(turn["user"], users),
+            "content": turn["message"],
+        }
+    }
+    if turn.get("session"):
+        body["session_id"] = turn["session"]
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/api/generate",
+        data=json.dumps(body).encode("utf-8"),
+        method="POST",
+        headers={"Content-Type": "application/json", "X-Request-Id": f"replay-{turn['turn_id']}"},
+    )
+    started = time.perf_counter()
+    status, timing_header = 0, ""
+    try:
+        with urllib.request.urlopen(request, timeout=timeout_sec) as response:
+            response.read()
+            status = response.status
+            timing_header = response.headers.get("Server-Timing", "")
+    except urllib.error.HTTPError as exc:
+        status = exc.code
+        timing_header = exc.headers.get("Server-Timing", "") if exc.headers else ""
+    except (urllib.error.URLError, OSError):
+        status = 0
+    return {
+        "turn_id": turn["turn_id"],
+        "status": status,
+        "latency_ms": (time.perf_counter() - started) * 1000,
+        "stages": ParseServerTiming(timing_header),
+    }
+
+
+def Replay(
+    url: str,
+    turns: list[dict[str, Any]],
+    users: int,
+    speed: float,
+    concurrency: int,
+    timeout_sec: float,
+) -> list[dict[str, Any]]:
+    results: list[Optional[dict[str, Any]]] = [None] * len(turns)
+    first_ts = turns[0]["ts"] if turns else 0.0
+    # Open loop at recorded pace; enough threads that a slow build cannot throttle arrivals.
+    workers = concurrency if speed <= 0 else max(concurrency, 64)
+    started = time.monotonic()
+    lock = threading.Lock()
+
+    def Send(index: int) -> None:
+        result = ReplayTurn(url, turns[index], users, timeout_sec)
+        with lock:
+            results[index] = result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for index, turn in enumerate(turns):
+            if speed > 0:
+                delay = (turn["ts"] - first_ts) / speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            executor.submit(Send, index)
+    return [result for result in results if result is not None]
+
+
+def _Summary(values: list[float]) -> dict[str, float]:
+    return {
+        "p50": round(_Percentile(values, 50), 1),
+        "p95": round(_Percentile(values, 95), 1),
+        "mean": round(statistics.fmean(values), 1) if values else 0.0,
+    }
+
+
+def _Change(old: float, new: float) -> Optional[float]:
+    return round((new - old) / old * 100, 1) if old else None
+
+
+def CompareStages(
+    turns: list[dict[str, Any]], results: list[dict[str, Any]]
+) -> dict[str, Any]:
+    by_id = {result["turn_id"]: result for result in results}
+    recorded: dict[str, list[float]] = {"turn": []}
+    replayed: dict[str, list[float]] = {"turn": []}
+    tool_matches = 0
+    slowdowns: list[dict[str, Any]] = []
+    for turn in turns:
+        result = by_id.get(turn["turn_id"])
+        if result is None or not 200 <= result["status"] < 300:
+            continue
+        recorded["turn"].append(turn["elapsed_ms"])
+        replayed["turn"].append(result["latency_ms"])
+        for stage, ms in turn["stages"].items():
+            recorded.setdefault(stage, []).append(ms)
+        for stage, ms in result["stages"].items():
+            replayed.setdefault(stage, []).append(ms)
+        replay_tools = sorted(
+            stage.partition(".")[2] for stage in result["stages"] if stage.startswith("tool.")
+        )
+        tool_matches += replay_tools == _Tools(turn)
+        slowdowns.append(
+            {
+                "turn_id": turn["turn_id"],
+                "message": turn["message"],
+                "recorded_ms": turn["elapsed_ms"],
+                "replay_ms": round(result["latency_ms"], 1),
+                "delta_ms": round(result["latency_ms"] - turn["elapsed_ms"], 1),
+            }
+        )
+    stages: dict[str, Any] = {}
+    for stage in sorted(set(recorded) & set(replayed)):
+        before, after = _Summary(recorded[stage]), _Summary(replayed[stage])
+        stages[stage] = {
+            "recorded": before,
+            "replay": after,
+            "p50_pct": _Change(before["p50"], after["p50"]),
+            "p95_pct": _Change(before["p95"], after["p95"]),
+        }
+    compared = len(recorded["turn"])
+    slowdowns.sort(key=lambda item: item["delta_ms"], reverse=True)
+    return {
+        "compared_turns": compared,
+        "tool_sequence_match_rate": round(tool_matches / compared, 3) if compared else None,
+        "stages": stages,
+        "only_recorded": sorted(set(recorded) - set(replayed)),
+        "only_replay": sorted(set(replayed) - set(recorded)),
+        "slowest_turns": slowdowns[:10],
+    }
+
+
+def _RecordedLlmMs(turns: list[dict[str, Any]]) -> float:
+    values = [
+        event["elapsed_ms"]
+        for turn in turns
+        for event in turn["events"]
+        if event["type"] == "llm" and event["response"].get("status") == 200
+    ]
+    return statistics.median(values) if values else 200.0
+
+
+def _Main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded traffic and diff stage timings")
+    parser.add_argument("inputs", nargs="+", help="JSONL files or globs (traffic/traffic-*.jsonl*)")
+    parser.add_argument("--url", default=None, help="build under test; omit to launch one")
+    parser.add_argument("--speed", type=float, default=1.0, help="pace multiplier, 0 = no gaps")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=1000, help="users in the local DB")
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N turns")
+    parser.add_argument("--timeout-sec", type=float, default=120.0)
+    parser.add_argument("--port", type=int, default=8200, help="port for the launched server")
+    parser.add_argument("--workers", type=int, default=1, help="workers for the launched server")
+    parser.add_argument("--db-path", default="bench.db", help="seeded with bench.local_db")
+    parser.add_argument("--stub-latency-ms", type=float, default=None)
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    turns = LoadTurns(args.inputs)
+    if args.limit:
+        turns = turns[: args.limit]
+    if not turns:
+        parser.error("no recorded turns found")
+
+    started = time.perf_counter()
+    if args.url:
+        results = Replay(
+            args.url, turns, args.users, args.speed, args.concurrency, args.timeout_sec
+        )
+        stub_latency_ms = None
+    else:
+        stub_latency_ms = (
+            args.stub_latency_ms if args.stub_latency_ms is not None else _RecordedLlmMs(turns)
+        )
+        stub = StartStubServer(
+            StubConfig(
+                latency_ms=stub_latency_ms,
+                max_num_seqs=max(64, args.concurrency * 2),
+                keywords=_LoadKeywords(_DEFAULT_KEYWORDS_PATH),
+            )
+        )
+        env = {
+            "LLM_BASE_URL": f"http://127.0.0.1:{stub.server_address[1]}",
+            "MODEL_ID": "stub-model",
+            "DB_BACKEND": "sqlite",
+            "DB_PATH": os.path.abspath(args.db_path),
+            "AUDIT_SINK": "off",
+            "TRAFFIC_RECORD_RATE": "0",
+            # Replays one user's burst as recorded; the limiter is not under test.
+            "RATE_LIMIT_ENABLED": "0",
+        }
+        try:
+            with LaunchServer(args.workers, args.port, env) as url:
+                results = Replay(
+                    url, turns, args.users, args.speed, args.concurrency, args.timeout_sec
+                )
+        finally:
+            stub.shutdown()
+    elapsed = time.perf_counter() - started
+
+    statuses: dict[str, int] = {}
+    for result in results:
+        statuses[str(result["status"])] = statuses.get(str(result["status"]), 0) + 1
+    report = {
+        "inputs": args.inputs,
+        "turns": len(turns),
+        "speed": args.speed,
+        "stub_latency_ms": stub_latency_ms,
+        "elapsed_sec": round(elapsed, 3),
+        "statuses": statuses,
+        "recorded_llm_calls_per_turn": round(
+            sum(_LlmCalls(turn) for turn in turns) / len(turns), 3
+        ),
+        **CompareStages(turns, results),
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    _Main()
@@ -0,0 +1,467 @@
+"""OpenAI-compatible stub of a vLLM server for offline benchmarks.
+
+Run ``python -m bench.stub_llm --port 8001`` and point ``LLM_BASE_URL`` at it.
+Latency, tool-call behaviour and 404/400 failures are configurable so the
+retry and fallback paths in ``LLMService`` can be exercised without a GPU.
+Structured output (``response_format`` json_schema or ``guided_json``) is
+answered with a short JSON tool pick, like vLLM's guided decoding.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Optional
+
+
+_DEFAULT_KEYWORDS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "app",
+    "config",
+    "tool_keywords.json",
+)
+
+TOOL_MODE_NATIVE = "native"
+TOOL_MODE_CONTENT = "content"
+TOOL_MODE_NONE = "none"
+
+
+@dataclass
+class StubConfig:
+    model_id: str = "stub-model"
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    per_token_ms: float = 0.0
+    completion_tokens: int = 64
+    tool_mode: str = TOOL_MODE_NATIVE
+    tools_supported: bool = True
+    guided_supported: bool = True
+    # Chance that a tool-worthy request is answered with free text instead.
+    tool_miss_rate: float = 0.0
+    max_context: int = 4096
+    max_num_seqs: int = 8
+    fail_404_rate: float = 0.0
+    fail_400_rate: float = 0.0
+    length_rate: float = 0.0
+    seed: Optional[int] = None
+    keywords: dict[str, list[str]] = field(default_factory=dict)
+
+
+class StubStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: dict[str, int] = {}
+        self.running = 0
+        self.waiting = 0
+
+    def Count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + amount
+
+    def Adjust(self, running: int = 0, waiting: int = 0) -> None:
+        with self._lock:
+            self.running += running
+            self.waiting += waiting
+
+    def Snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "counts": dict(self._counts),
+                "running": self.running,
+                "waiting": self.waiting,
+            }
+
+    def Reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+def _LoadKeywords(path: str) -> dict[str, list[str]]:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return {key: [str(item) for item in value] for key, value in data.items()}
+
+
+def _EstimateTokens(messages: list[dict[str, Any]], tools: Any) -> int:
+    text = "".join(str(msg.get("content") or "") for msg in messages)
+    if tools:
+        text += json.dumps(tools, ensure_ascii=False)
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+def _LastUserMessage(messages: list[dict[str, Any]]) -> str:
+    for msg in reversed(messages):
+        if msg.get("role") == "user":
+            return str(msg.get("content") or "")
+    return ""
+
+
+def _PickTool(config: StubConfig, text: str, tools: list[dict[str, Any]]) -> Optional[str]:
+    available = {
+        (tool.get("function") or {}).get("name") for tool in tools if isinstance(tool, dict)
+    }
+    lowered = text.lower()
+    for tool_name, keywords in config.keywords.items():
+        if tool_name not in available:
+            continue
+        if any(keyword.lower() in lowered for keyword in keywords if keyword):
+            return tool_name
+    return None
+
+
+def _GuidedSchema(payload: dict[str, Any]) -> Optional[dict[str, Any]]:
+    if isinstance(payload.get("guided_json"), dict):
+        return payload["guided_json"]
+    response_format = payload.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return (response_format.get("json_schema") or {}).get("schema") or {}
+    return None
+
+
+def _SchemaToolNames(schema: dict[str, Any]) -> list[str]:
+    names: list[str] = []
+    for option in schema.get("anyOf") or schema.get("oneOf") or []:
+        name = ((option.get("properties") or {}).get("name") or {})
+        names.extend(name.get("enum") or ([name["const"]] if "const" in name else []))
+    return names
+
+
+def _CompletionTokens(message: dict[str, Any]) -> int:
+    text = message.get("content") or ""
+    if message.get("tool_calls"):
+        text += json.dumps(message["tool_calls"], ensure_ascii=False)
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+def _ContextError(max_context: int, input_tokens: int) -> str:
+    return json.dumps(
+        {
+            "object": "error",
+            "message": (
+                f"This model's maximum context length is {max_context} tokens and your "
+                f"request has {input_tokens} input tokens. Please reduce the length."
+            ),
+            "type": "BadRequestError",
+            "code": 400,
+        }
+    )
+
+
+class StubLlmServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: StubConfig) -> None:
+        super().__init__(address, _StubHandler)
+        self.config = config
+        self.stats = StubStats()
+        self.slots = threading.BoundedSemaphore(max(1, config.max_num_seqs))
+        self.rng = random.Random(config.seed)
+        self.rng_lock = threading.Lock()
+
+    def Random(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: StubLlmServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        return
+
+    def _Send(self, status: int, body: Any, content_type: str = "application/json") -> None:
+        if isinstance(body, bytes):
+            raw = body
+        elif isinstance(body, str):
+            raw = body.encode("utf-8")
+        else:
+            raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _ReadJson(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return {}
+
+    def do_GET(self) -> None:  # noqa: N802
+        config = self.server.config
+        stats = self.server.stats
+        if self.path in {"/v1/models", "/models"}:
+            models = [{"id": config.model_id, "object": "model"}]
+            self._Send(200, {"object": "list", "data": models})
+        elif self.path == "/health":
+            self._Send(200, b"", "text/plain")
+        elif self.path == "/metrics":
+            snapshot = stats.Snapshot()
+            body = (
+                f'vllm:num_requests_running{{model_name="{config.model_id}"}} {snapshot["running"]}\n'
+                f'vllm:num_requests_waiting{{model_name="{config.model_id}"}} {snapshot["waiting"]}\n'
+            )
+            self._Send(200, body, "text/plain")
+        elif self.path == "/stub/stats":
+            self._Send(200, stats.Snapshot())
+        else:
+            self._Send(404, {"error": "not_found"})
+
+    def do_POST(self) -> None:  # noqa: N802
+        if self.path == "/stub/reset":
+            self.server.stats.Reset()
+            self._Send(200, {"ok": True})
+            return
+        if self.path not in {"/v1/chat/completions", "/chat/completions"}:
+            self._Send(404, {"error": "not_found"})
+            return
+        payload = self._ReadJson()
+        self._HandleChat(payload)
+
+    def _HandleChat(self, payload: dict[str, Any]) -> None:
+        server = self.server
+        config = server.config
+        stats = server.stats
+        stats.Count("chat_requests")
+        messages = payload.get("messages") or []
+        tools = payload.get("tools") or []
+        if payload.get("model") != config.model_id or server.Random() < config.fail_404_rate:
+            stats.Count("status_404")
+            message = f"The model `{payload.get('model')}` does not exist."
+            self._Send(404, {"object": "error", "message": message})
+            return
+        input_tokens = _EstimateTokens(messages, tools)
+        max_tokens = int(payload.get("max_tokens") or config.completion_tokens)
+        if input_tokens + max_tokens > config.max_context or server.Random() < config.fail_400_rate:
+            stats.Count("status_400_context")
+            self._Send(400, _ContextError(config.max_context, input_tokens))
+            return
+        if tools and not config.tools_supported:
+            stats.Count("status_400_tools")
+            self._Send(400, {"object": "error", "message": "tool calling is not enabled"})
+            return
+        guided_schema = _GuidedSchema(payload)
+        if guided_schema is not None and not config.guided_supported:
+            stats.Count("status_400_guided")
+            self._Send(400, {"object": "error", "message": "structured output is not enabled"})
+            return
+
+        stream = bool(payload.get("stream"))
+        stats.Adjust(waiting=1)
+        server.slots.acquire()
+        stats.Adjust(running=1, waiting=-1)
+        try:
+            if guided_schema is not None:
+                stats.Count("guided_requests")
+                message, finish_reason = self._BuildGuidedMessage(messages, guided_schema)
+            else:
+                message, finish_reason = self._BuildMessage(
+                    payload, messages, tools, min(max_tokens, config.completion_tokens)
+                )
+            # Free text costs the configured length; tool calls and JSON picks their own size.
+            completion_tokens = min(
+                max_tokens,
+                _CompletionTokens(message)
+                if guided_schema is not None or message.get("tool_calls")
+                else config.completion_tokens,
+            )
+            delay_ms = config.latency_ms + (server.Random() * 2 - 1) * config.jitter_ms
+            if not stream:
+                delay_ms += config.per_token_ms * completion_tokens
+            time.sleep(max(0.0, delay_ms) / 1000)
+            usage = {
+                "prompt_tokens": input_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": input_tokens + completion_tokens,
+            }
+            stats.Count("status_200")
+            if message.get("tool_calls"):
+                stats.Count("tool_calls")
+            if stream:
+                stats.Count("stream_requests")
+                self._SendStream(message, finish_reason, usage)
+                return
+        finally:
+            stats.Adjust(running=-1)
+            server.slots.release()
+        self._Send(
+            200,
+            {
+                "id": f"chatcmpl-stub-{int(time.time() * 1000)}",
+                "object": "chat.completion",
+                "model": config.model_id,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage,
+            },
+        )
+
+    def _SendStream(
+        self, message: dict[str, Any], finish_reason: str, usage: dict[str, int]
+    ) -> None:
+        """Server-sent events in vLLM's chunk format, paced by ``per_token_ms``."""
+        config = self.server.config
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def Chunk(body: dict[str, Any]) -> None:
+            event = f"data: {json.dumps(body, ensure_ascii=False)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(event):x}\r\n".encode("ascii") + event + b"\r\n")
+            self.wfile.flush()
+
+        base = {"id": f"chatcmpl-stub-{int(time.time() * 1000)}", "object": "chat.completion.chunk"}
+        if message.get("tool_calls"):
+            deltas = [
+                {"tool_calls": [{"index": index, **call}]}
+                for index, call in enumerate(message["tool_calls"])
+            ]
+        else:
+            pieces = re.findall(r"\S+\s*", message.get("content") or "")
+            deltas = [{"content": piece} for piece in pieces]
+        # Spread the same per-token cost as a non-streamed reply over the chunks.
+        pause_sec = config.per_token_ms * usage["completion_tokens"] / max(1, len(deltas)) / 1000
+        for delta in deltas:
+            if pause_sec:
+                time.sleep(pause_sec)
+            Chunk({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+        Chunk({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+        Chunk({**base, "choices": [], "usage": usage})
+        done = b"data: [DONE]\n\n"
+        self.wfile.write(f"{len(done):x}\r\n".encode("ascii") + done + b"\r\n0\r\n\r\n")
+        self.wfile.flush()
+
+    def _BuildGuidedMessage(
+        self, messages: list[dict[str, Any]], schema: dict[str, Any]
+    ) -> tuple[dict[str, Any], str]:
+        config = self.server.config
+        names = _SchemaToolNames(schema)
+        # Only the question itself, not the tool catalog appended after it.
+        user_text = _LastUserMessage(messages).split("\n\n", 1)[0]
+        tools = [{"function": {"name": name}} for name in names]
+        tool_name = _PickTool(config, user_text, tools) or (names[0] if names else "none")
+        content = json.dumps({"name": tool_name, "arguments": {}}, ensure_ascii=False)
+        return {"role": "assistant", "content": content}, "stop"
+
+    def _BuildMessage(
+        self,
+        payload: dict[str, Any],
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]],
+        completion_tokens: int,
+    ) -> tuple[dict[str, Any], str]:
+        config = self.server.config
+        user_text = _LastUserMessage(messages)
+        has_tool_results = any(msg.get("role") == "tool" for msg in messages)
+        tool_name = _PickTool(config, user_text, tools) if tools and not has_tool_results else None
+        if tool_name and self.server.Random() < config.tool_miss_rate:
+            self.server.stats.Count("tool_misses")
+            tool_name = None
+        if tool_name and config.tool_mode == TOOL_MODE_NATIVE:
+            return (
+                {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [
+                        {
+                            "id": "call_stub_0",
+                            "type": "function",
+                            "function": {"name": tool_name, "arguments": "{}"},
+                        }
+                    ],
+                },
+                "tool_calls",
+            )
+        if tool_name and config.tool_mode == TOOL_MODE_CONTENT:
+            block = json.dumps({"name": tool_name, "arguments": {}}, ensure_ascii=False)
+            return {"role": "assistant", "content": f"<tool_call>{block}</tool_call>"}, "stop"
+        finish_reason = "length" if self.server.Random() < config.length_rate else "stop"
+        content = "요청하신 내용을 정리했습니다. " * max(1, completion_tokens // 16)
+        return {"role": "assistant", "content": content.strip()}, finish_reason
+
+
+def StartStubServer(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> StubLlmServer:
+    """Start the stub on a background thread; ``port=0`` picks a free port."""
+    server = StubLlmServer((host, port), config)
+    thread = threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True)
+    thread.start()
+    return server
+
+
+def _ParseArgs(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible vLLM stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--model-id", default="stub-model")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--per-token-ms", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=64)
+    parser.add_argument(
+        "--tool-mode",
+        choices=[TOOL_MODE_NATIVE, TOOL_MODE_CONTENT, TOOL_MODE_NONE],
+        default=TOOL_MODE_NATIVE,
+    )
+    parser.add_argument("--no-tools", action="store_true", help="reject tool payloads with 400")
+    parser.add_argument(
+        "--no-guided", action="store_true", help="reject structured-output payloads with 400"
+    )
+    parser.add_argument("--tool-miss-rate", type=float, default=0.0)
+    parser.add_argument("--max-context", type=int, default=4096)
+    parser.add_argument("--max-num-seqs", type=int, default=8)
+    parser.add_argument("--fail-404-rate", type=float, default=0.0)
+    parser.add_argument("--fail-400-rate", type=float, default=0.0)
+    parser.add_argument("--length-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--keywords", default=_DEFAULT_KEYWORDS_PATH)
+    return parser.parse_args(argv)
+
+
+def ConfigFromArgs(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        model_id=args.model_id,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        per_token_ms=args.per_token_ms,
+        completion_tokens=args.completion_tokens,
+        tool_mode=args.tool_mode,
+        tools_supported=not args.no_tools,
+        guided_supported=not args.no_guided,
+        tool_miss_rate=args.tool_miss_rate,
+        max_context=args.max_context,
+        max_num_seqs=args.max_num_seqs,
+        fail_404_rate=args.fail_404_rate,
+        fail_400_rate=args.fail_400_rate,
+        length_rate=args.length_rate,
+        seed=args.seed,
+        keywords=_LoadKeywords(args.keywords),
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = _ParseArgs(argv)
+    server = StubLlmServer((args.host, args.port), ConfigFromArgs(args))
+    print(f"stub vLLM listening on http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()